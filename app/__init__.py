@@ -9,6 +9,19 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 import os
 
+from .query_budget import QueryBudget
+from .metrics import Metrics
+from .login_guard import LoginGuard
+from .cors import PreflightMiddleware
+from .compression import Compression
+from .avatars import Avatars
+from .audit import AuditLog
+from .concurrency import AdaptiveConcurrency
+from .revocation import RevocationFilter
+from .traffic_capture import TrafficCapture
+from .json_provider import FastJSONProvider
+from .email import init_email
+
 # Load environment variables
 load_dotenv()
 
@@ -22,22 +35,19 @@ limiter = Limiter(
     default_limits=["200 per day", "50 per hour"],
     storage_uri="memory://"
 )
+query_budget = QueryBudget()
+metrics = Metrics()
+login_guard = LoginGuard()
+compression = Compression()
+avatars = Avatars()
+audit_log = AuditLog()
+concurrency = AdaptiveConcurrency()
+revocation_filter = RevocationFilter()
+traffic_capture = TrafficCapture()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
-    
-    # Enable CORS with more permissive settings
-    CORS(app, resources={
-        r"/*": {
-            "origins": "*",
-            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization", "Accept", "Origin", 
-                            "X-Requested-With", "Access-Control-Allow-Origin"],
-            "expose_headers": ["Content-Range", "X-Content-Range"],
-            "supports_credentials": True,
-            "max_age": 120
-        }
-    })
+    app.json = FastJSONProvider(app)
     
     # Configure Flask app
     app.config['SECRET_KEY'] = os.getenv('JWT_SECRET', 'your-secret-key-here')
@@ -52,32 +62,188 @@ def create_app():
     app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = os.getenv('MAIL_DEFAULT_SENDER')
+    app.config['EMAIL_TRANSPORT'] = os.getenv('EMAIL_TRANSPORT', 'sendgrid')  # or 'memory'
+    app.config['EMAIL_SEND_TIMEOUT'] = float(os.getenv('EMAIL_SEND_TIMEOUT', '5'))
+    app.config['EMAIL_BREAKER_FAILURES'] = int(os.getenv('EMAIL_BREAKER_FAILURES', '5'))
+    app.config['EMAIL_BREAKER_RESET_TIMEOUT'] = float(os.getenv('EMAIL_BREAKER_RESET_TIMEOUT', '30'))
+    app.config['EMAIL_MAX_CONCURRENT'] = int(os.getenv('EMAIL_MAX_CONCURRENT', '4'))
+    app.config['EMAIL_ON_UNAVAILABLE'] = os.getenv('EMAIL_ON_UNAVAILABLE', 'defer')  # or 'fail'
+    app.config['EMAIL_MAX_ATTEMPTS'] = int(os.getenv('EMAIL_MAX_ATTEMPTS', '5'))
 
     # Password policy
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
     app.config['PASSWORD_MIN_LENGTH'] = 8
     app.config['PASSWORD_REQUIRE_UPPERCASE'] = True
     app.config['PASSWORD_REQUIRE_LOWERCASE'] = True
     app.config['PASSWORD_REQUIRE_NUMBERS'] = True
     app.config['PASSWORD_REQUIRE_SPECIAL'] = True
+    app.config['PASSWORD_SPECIAL_CHARACTERS'] = os.getenv('PASSWORD_SPECIAL_CHARACTERS', '!@#$%^&*(),.?":{}|<>')
+    app.config['PASSWORD_BREACHED_HASHES_FILE'] = os.getenv('PASSWORD_BREACHED_HASHES_FILE')
+
+    # Per-request SQL statement budgets (endpoint -> max statements)
+    app.config['QUERY_BUDGETS'] = {
+        'auth.profile': 2,
+        'auth.login': 4,
+        'auth.register': 6,
+        'auth.logout': 3,
+        'auth.health_check': 1,
+        'auth.list_sessions': 2,
+        'auth.revoke_session': 3,
+        'auth.revoke_sessions_endpoint': 3,
+        'auth.upload_avatar': 3,
+        'auth.search_users': 3,
+    }
+    app.config['QUERY_BUDGET_DEFAULT'] = int(os.getenv('QUERY_BUDGET_DEFAULT', '10'))
+    # Unset means raise under app.testing and only log otherwise (see QueryBudget)
+    if os.getenv('QUERY_BUDGET_RAISE') is not None:
+        app.config['QUERY_BUDGET_RAISE'] = os.getenv('QUERY_BUDGET_RAISE').lower() == 'true'
+
+    # User prefix search (admin screens and @mentions)
+    app.config['USER_SEARCH_MAX_LIMIT'] = int(os.getenv('USER_SEARCH_MAX_LIMIT', '50'))
+    app.config['USER_SEARCH_CACHE_TTL'] = float(os.getenv('USER_SEARCH_CACHE_TTL', '5'))
+
+    # Failed-login tracking per account and per IP (memory:// or redis://)
+    app.config['LOGIN_GUARD_WINDOW'] = int(os.getenv('LOGIN_GUARD_WINDOW', '900'))
+    app.config['LOGIN_GUARD_MAX_ACCOUNT_FAILURES'] = int(os.getenv('LOGIN_GUARD_MAX_ACCOUNT_FAILURES', '5'))
+    app.config['LOGIN_GUARD_MAX_IP_FAILURES'] = int(os.getenv('LOGIN_GUARD_MAX_IP_FAILURES', '20'))
+    app.config['LOGIN_GUARD_STORAGE_URI'] = os.getenv('LOGIN_GUARD_STORAGE_URI', 'memory://')
+    app.config['LOGIN_GUARD_MAX_KEYS'] = int(os.getenv('LOGIN_GUARD_MAX_KEYS', '100000'))  # memory:// only
+
+    # Online schema migrations: how long DDL may wait for a lock before giving up
+    app.config['MIGRATION_LOCK_TIMEOUT'] = os.getenv('MIGRATION_LOCK_TIMEOUT', '3s')
+    app.config['MIGRATION_STATEMENT_TIMEOUT'] = os.getenv('MIGRATION_STATEMENT_TIMEOUT', '0')
+    app.config['MIGRATION_MAX_REPLICATION_LAG'] = float(os.getenv('MIGRATION_MAX_REPLICATION_LAG', '5'))
+
+    # Auth audit trail: buffered in memory, bulk-inserted by a background flusher
+    app.config['AUDIT_BUFFER_SIZE'] = int(os.getenv('AUDIT_BUFFER_SIZE', '10000'))
+    app.config['AUDIT_FLUSH_BATCH'] = int(os.getenv('AUDIT_FLUSH_BATCH', '500'))
+    app.config['AUDIT_FLUSH_INTERVAL_MS'] = int(os.getenv('AUDIT_FLUSH_INTERVAL_MS', '500'))
+    app.config['AUDIT_OVERFLOW'] = os.getenv('AUDIT_OVERFLOW', 'drop_oldest')
+
+    # Seconds between incremental reloads of sessions revoked by other processes
+    app.config['REVOCATION_REFRESH_INTERVAL'] = float(os.getenv('REVOCATION_REFRESH_INTERVAL', '5'))
+
+    # Adaptive concurrency limit; lower priority classes are shed first under load
+    app.config['CONCURRENCY_INITIAL_LIMIT'] = int(os.getenv('CONCURRENCY_INITIAL_LIMIT', '20'))
+    app.config['CONCURRENCY_MIN_LIMIT'] = int(os.getenv('CONCURRENCY_MIN_LIMIT', '4'))
+    app.config['CONCURRENCY_MAX_LIMIT'] = int(os.getenv('CONCURRENCY_MAX_LIMIT', '200'))
+    app.config['CONCURRENCY_PRIORITIES'] = {
+        'auth.health_check': 'critical',
+        'metrics': 'critical',
+        'auth.login': 'high',
+        'auth.logout': 'high',
+        'auth.profile': 'high',
+        'auth.register': 'low',
+        'auth.forgot_password': 'low',
+        'auth.upload_avatar': 'low',
+        'auth.export_users_endpoint': 'low',
+    }
+    # Long-running endpoints whose latency would skew the limit
+    app.config['CONCURRENCY_UNSAMPLED_ENDPOINTS'] = ['auth.export_users_endpoint']
+
+    # CORS: explicit origin allowlist (credentials can't be combined with '*')
+    app.config['CORS_ORIGINS'] = [
+        origin.strip() for origin in
+        os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
+        if origin.strip()
+    ]
+    app.config['CORS_MAX_AGE'] = int(os.getenv('CORS_MAX_AGE', '86400'))
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '500'))
+
+    # Avatar uploads: file:///path or s3://bucket, thumbnails rendered in a process pool
+    app.config['AVATAR_STORAGE_URI'] = os.getenv(
+        'AVATAR_STORAGE_URI', 'file://' + os.path.join(app.instance_path, 'avatars')
+    )
+    app.config['AVATAR_S3_ENDPOINT_URL'] = os.getenv('AVATAR_S3_ENDPOINT_URL')
+    app.config['AVATAR_URL_PREFIX'] = os.getenv('AVATAR_URL_PREFIX', '/avatars')
+    app.config['AVATAR_MAX_BYTES'] = int(os.getenv('AVATAR_MAX_BYTES', str(10 * 1024 * 1024)))
+    app.config['AVATAR_WORKERS'] = int(os.getenv('AVATAR_WORKERS', '2'))
+
+    # Opt-in traffic capture for replay (python -m traffic_replay)
+    app.config['TRAFFIC_CAPTURE_ENABLED'] = os.getenv('TRAFFIC_CAPTURE_ENABLED', 'false').lower() == 'true'
+    app.config['TRAFFIC_CAPTURE_PATH'] = os.getenv(
+        'TRAFFIC_CAPTURE_PATH', os.path.join(app.instance_path, 'traffic', 'capture.ndjson')
+    )
+    app.config['TRAFFIC_CAPTURE_MAX_BYTES'] = int(os.getenv('TRAFFIC_CAPTURE_MAX_BYTES', str(50 * 1024 * 1024)))
+    app.config['TRAFFIC_CAPTURE_BACKUPS'] = int(os.getenv('TRAFFIC_CAPTURE_BACKUPS', '10'))
+    app.config['TRAFFIC_CAPTURE_SAMPLE_RATE'] = float(os.getenv('TRAFFIC_CAPTURE_SAMPLE_RATE', '1'))
+    app.config['TRAFFIC_CAPTURE_KEY'] = os.getenv('TRAFFIC_CAPTURE_KEY')  # pseudonym HMAC key; SECRET_KEY if unset
+
+    # Overrides for tests and scripts, applied before any extension reads config
+    if test_config is not None:
+        app.config.update(test_config)
+
+    # Enable CORS for the allowed origins
+    cors_methods = ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+    cors_headers = ["Content-Type", "Authorization", "Accept", "Origin", "X-Requested-With"]
+    CORS(app, resources={
+        r"/*": {
+            "origins": app.config['CORS_ORIGINS'],
+            "methods": cors_methods,
+            "allow_headers": cors_headers,
+            "expose_headers": ["Content-Range", "X-Content-Range"],
+            "supports_credentials": True,
+            "max_age": app.config['CORS_MAX_AGE']
+        }
+    })
+
+    # Answer preflights before they reach Flask
+    app.wsgi_app = PreflightMiddleware(
+        app.wsgi_app,
+        origins=app.config['CORS_ORIGINS'],
+        methods=cors_methods,
+        allow_headers=cors_headers,
+        max_age=app.config['CORS_MAX_AGE']
+    )
     
     # Initialize extensions
+    metrics.init_app(app)
+    concurrency.init_app(app)
+    traffic_capture.init_app(app)
+    metrics.register('cors', app.wsgi_app.metrics)
     mail.init_app(app)
-    migrate.init_app(app, db)
+    init_email(app)
+    # Alembic revisions live in db_migrations/; migrations/ holds the Node backend's
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'db_migrations'))
     limiter.init_app(app)
+    # Scrapers poll every few seconds and would exhaust the default limits
+    limiter.exempt(app.view_functions['metrics'])
+    login_guard.init_app(app)
+    compression.init_app(app)
+    avatars.init_app(app)
+    # Avatar URLs are immutable files loaded on every page that shows a user
+    if 'avatar_file' in app.view_functions:
+        limiter.exempt(app.view_functions['avatar_file'])
+    audit_log.init_app(app)
     
     # Initialize Flask-Login
     login_manager.init_app(app)
     
     # Initialize database
     db.init_app(app)
+    query_budget.init_app(app)
     with app.app_context():
+        query_budget.instrument(db.engine)
         from .models import init_db
         init_db()
+    revocation_filter.init_app(app)
+    revocation_filter.start()
+
+    from .permissions import role_cache
+    role_cache.init_app(app)
     
     login_manager.login_view = 'auth.login'
 
+    # Compile the password policy once rather than per validation
+    from .auth.password_policy import PasswordPolicy
+    app.extensions['password_policy'] = PasswordPolicy.from_config(app.config)
+
     # Register blueprints
     from .auth import auth as auth_blueprint
     app.register_blueprint(auth_blueprint, url_prefix='/api/auth')
 
+    # Register CLI commands
+    from .cli import users_cli
+    app.cli.add_command(users_cli)
+
     return app
@@ -0,0 +1,227 @@
+from collections import deque
+from datetime import datetime
+from flask import request, has_request_context
+from sqlalchemy import insert, select
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+from threading import Condition, Lock, Thread
+import atexit
+import logging
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'flush')
+# auth_events column lengths; longer values are cut rather than failing the batch
+FIELD_LENGTHS = {'event_type': 32, 'email': 120, 'ip_address': 45, 'user_agent': 256}
+
+
+def clip(value, length):
+    return None if value is None else str(value)[:length]
+
+
+def is_row_error(error):
+    """True when the database rejected the row itself, not the connection"""
+    if isinstance(error, (IntegrityError, DataError)):
+        return True
+    # Raised before reaching the database, e.g. details that aren't JSON
+    return isinstance(error, StatementError) and not isinstance(error, DBAPIError)
+
+
+class AuditLog:
+    """Durable auth audit trail without a DB round trip per request
+
+    ``record`` only appends a row dict to a bounded in-memory buffer. A
+    daemon thread bulk-inserts the buffer into auth_events whenever it
+    holds AUDIT_FLUSH_BATCH events or AUDIT_FLUSH_INTERVAL_MS has passed.
+    When the buffer is full (the database is down or slow), AUDIT_OVERFLOW
+    decides what gives: ``drop_oldest`` and ``drop_newest`` discard events
+    and count them, ``flush`` makes the recording request write the
+    backlog itself, trading latency for completeness (and drops the oldest
+    event if that write fails too).
+
+    A batch the database rejects is retried row by row: rows it still
+    rejects are dropped and counted, while a connection failure puts the
+    rest back in the buffer for the next flush.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._buffer = deque()
+        self._cond = Condition()
+        self._flush_lock = Lock()
+        self._thread = None
+        self._registered_exit = False
+        self.recorded = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_errors = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AUDIT_ENABLED', True)
+        app.config.setdefault('AUDIT_ASYNC', True)
+        app.config.setdefault('AUDIT_BUFFER_SIZE', 10000)
+        app.config.setdefault('AUDIT_FLUSH_BATCH', 500)
+        app.config.setdefault('AUDIT_FLUSH_INTERVAL_MS', 500)
+        app.config.setdefault('AUDIT_OVERFLOW', 'drop_oldest')
+        if app.config['AUDIT_OVERFLOW'] not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported AUDIT_OVERFLOW: {app.config['AUDIT_OVERFLOW']}")
+
+        self.app = app
+        self.enabled = app.config['AUDIT_ENABLED']
+        self.background = app.config['AUDIT_ASYNC']
+        self.capacity = app.config['AUDIT_BUFFER_SIZE']
+        self.batch_size = app.config['AUDIT_FLUSH_BATCH']
+        self.interval = app.config['AUDIT_FLUSH_INTERVAL_MS'] / 1000
+        self.overflow = app.config['AUDIT_OVERFLOW']
+        with self._cond:
+            self._buffer.clear()
+        self.recorded = self.flushed = self.dropped = self.flush_errors = 0
+        app.extensions['audit_log'] = self
+
+        if not self._registered_exit:
+            atexit.register(self.flush)
+            self._registered_exit = True
+
+        metrics = app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.register('audit', self.metrics)
+
+    def record(self, event_type, user_id=None, email=None, **details):
+        """Queue an audit event; never touches the database on the fast path"""
+        if not self.enabled:
+            return
+        event = {
+            'event_type': clip(event_type, FIELD_LENGTHS['event_type']),
+            'user_id': user_id,
+            'email': clip(email, FIELD_LENGTHS['email']),
+            'ip_address': None,
+            'user_agent': None,
+            'details': details or None,
+            'created_at': datetime.utcnow(),
+        }
+        if has_request_context():
+            event['ip_address'] = clip(request.remote_addr, FIELD_LENGTHS['ip_address'])
+            event['user_agent'] = clip(request.user_agent.string, FIELD_LENGTHS['user_agent'])
+
+        if self.overflow == 'flush' and len(self._buffer) >= self.capacity:
+            # Write the backlog from this request before adding to it
+            self.flush()
+
+        flush_now = False
+        with self._cond:
+            if len(self._buffer) >= self.capacity:
+                self.dropped += 1
+                if self.overflow == 'drop_newest':
+                    return
+                # drop_oldest, or a 'flush' whose write failed
+                self._buffer.popleft()
+            self._buffer.append(event)
+            self.recorded += 1
+            if len(self._buffer) >= self.batch_size:
+                if self.background:
+                    self._cond.notify()
+                else:
+                    flush_now = True
+
+        if flush_now:
+            self.flush()
+        elif self.background and self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._cond:
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='audit-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Audit flusher error: {str(e)}")
+
+    def flush(self):
+        """Write everything buffered in one executemany INSERT; return the row count"""
+        if self.app is None:
+            return 0
+        from . import db
+        from .models import AuthEvent
+
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._buffer)
+                self._buffer.clear()
+            if not batch:
+                return 0
+            with self.app.app_context():
+                try:
+                    self._insert(db, AuthEvent, batch)
+                    written, pending = len(batch), []
+                except Exception as e:
+                    self.flush_errors += 1
+                    logger.error(f"Failed to write {len(batch)} audit events: {str(e)}")
+                    written, pending = self._insert_rows(db, AuthEvent, batch)
+            if pending:
+                # Put the rest back ahead of newer events, as far as capacity allows
+                with self._cond:
+                    room = max(self.capacity - len(self._buffer), 0)
+                    keep = pending[len(pending) - room:] if room < len(pending) else pending
+                    self.dropped += len(pending) - len(keep)
+                    self._buffer.extendleft(reversed(keep))
+            self.flushed += written
+            return written
+
+    @staticmethod
+    def _insert(db, AuthEvent, rows):
+        with db.engine.begin() as connection:
+            connection.execute(insert(AuthEvent.__table__), rows)
+
+    def _insert_rows(self, db, AuthEvent, batch):
+        """Write a failed batch one row at a time; return (written, rows still pending)
+
+        Rows the database rejects are dropped so one bad value can't stall
+        the log. Any other error (the database is unreachable) stops here
+        and leaves the remaining rows pending.
+        """
+        written = 0
+        for index, row in enumerate(batch):
+            try:
+                self._insert(db, AuthEvent, [row])
+            except Exception as e:
+                if not is_row_error(e):
+                    return written, batch[index:]
+                with self._cond:
+                    self.dropped += 1
+                logger.error(f"Dropped {row['event_type']} audit event the database rejected: {str(e)}")
+            else:
+                written += 1
+        return written, []
+
+    def recent(self, user_id=None, event_type=None, before_id=None, limit=100):
+        """Newest events first, after flushing anything still buffered"""
+        from . import db
+        from .models import AuthEvent
+
+        self.flush()
+        query = select(AuthEvent).order_by(AuthEvent.id.desc()).limit(limit)
+        if user_id is not None:
+            query = query.where(AuthEvent.user_id == user_id)
+        if event_type is not None:
+            query = query.where(AuthEvent.event_type == event_type)
+        if before_id is not None:
+            query = query.where(AuthEvent.id < before_id)
+        return db.session.scalars(query).all()
+
+    def metrics(self):
+        return {
+            'recorded_total': self.recorded,
+            'flushed_total': self.flushed,
+            'dropped_total': self.dropped,
+            'flush_errors_total': self.flush_errors,
+            'buffered': len(self._buffer),
+        }
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 auth = Blueprint('auth', __name__, url_prefix='/auth')
 
-from . import routes
+from . import routes, admin, sessions, search
@@ -0,0 +1,162 @@
+from flask import request, jsonify, current_app, stream_with_context
+from flask_login import current_user
+from datetime import datetime
+import base64
+import binascii
+import logging
+
+from . import auth
+from .. import audit_log
+from ..models import User, Role
+from ..json_provider import dumps
+from .export import export_users, EXPORT_FORMATS
+from .queries import user_list_query, serialize_user_row
+from .serializers import auth_event
+from ..permissions import require_permission, Permission
+
+# Create a logger
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_IDS = 100
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(user_id):
+    return base64.urlsafe_b64encode(str(user_id).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    return int(base64.urlsafe_b64decode(padded.encode()).decode())
+
+def parse_bool(value):
+    if value.lower() in ('true', '1', 'yes'):
+        return True
+    if value.lower() in ('false', '0', 'no'):
+        return False
+    raise ValueError(f'Invalid boolean: {value}')
+
+def apply_user_filters(query, args):
+    """Apply the index-backed role/is_active/created_at filters from query args
+
+    Raises ValueError for malformed filter values.
+    """
+    if args.get('role'):
+        query = query.filter(Role.name == args['role'])
+    if args.get('is_active'):
+        query = query.filter(User.is_active == parse_bool(args['is_active']))
+    if args.get('created_after'):
+        query = query.filter(User.created_at >= datetime.fromisoformat(args['created_after']))
+    if args.get('created_before'):
+        query = query.filter(User.created_at < datetime.fromisoformat(args['created_before']))
+    return query
+
+@auth.route('/users', methods=['GET'])
+@require_permission(Permission.VIEW_USERS)
+def list_users():
+    """List users with keyset pagination, or fetch a batch with ?ids=1,2,3"""
+    if 'ids' in request.args:
+        return batch_users(request.args['ids'])
+
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        query = apply_user_filters(user_list_query(), request.args)
+        if request.args.get('cursor'):
+            query = query.filter(User.id > decode_cursor(request.args['cursor']))
+    except (ValueError, binascii.Error) as e:
+        logger.warning(f"Invalid user listing parameters: {str(e)}")
+        return jsonify({'error': 'Invalid pagination or filter parameters'}), 400
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(User.id).limit(limit + 1).yield_per(500)
+
+    def generate():
+        yield b'{"users":['
+        count = 0
+        last_id = None
+        has_more = False
+        for row in rows:
+            if count == limit:
+                has_more = True
+                break
+            if count:
+                yield b','
+            yield dumps(serialize_user_row(row))
+            last_id = row.id
+            count += 1
+        next_cursor = encode_cursor(last_id) if has_more else None
+        yield b'],"next_cursor":' + dumps(next_cursor) + b'}'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+def batch_users(raw_ids):
+    """Look up many users in one query, preserving the requested order"""
+    try:
+        ids = list(dict.fromkeys(int(i) for i in raw_ids.split(',') if i.strip()))
+    except ValueError:
+        return jsonify({'error': 'ids must be a comma-separated list of integers'}), 400
+
+    if not ids:
+        return jsonify({'error': 'At least one id is required'}), 400
+    if len(ids) > MAX_BATCH_IDS:
+        return jsonify({'error': f'At most {MAX_BATCH_IDS} ids may be requested at once'}), 400
+
+    found = {row.id: row for row in user_list_query().filter(User.id.in_(ids))}
+    return current_app.response_class(dumps({
+        'users': [serialize_user_row(found[i]) for i in ids if i in found],
+        'missing': [i for i in ids if i not in found]
+    }), mimetype='application/json')
+
+@auth.route('/users/export', methods=['GET'])
+@require_permission(Permission.ADMIN)
+def export_users_endpoint():
+    """Stream the users table as NDJSON or CSV, optionally gzip-compressed"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'format must be one of: {", ".join(EXPORT_FORMATS)}'}), 400
+
+    try:
+        query = apply_user_filters(user_list_query(), request.args)
+        compress = parse_bool(request.args.get('gzip', 'false'))
+    except ValueError as e:
+        logger.warning(f"Invalid user export parameters: {str(e)}")
+        return jsonify({'error': 'Invalid export parameters'}), 400
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/csv'
+    filename = f"users-{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{fmt}"
+    response = current_app.response_class(
+        stream_with_context(export_users(fmt, compress=compress, query=query)),
+        mimetype=mimetype
+    )
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    logger.info(f"User export ({fmt}, gzip={compress}) started by {current_user.id}")
+    return response
+
+@auth.route('/audit-events', methods=['GET'])
+@require_permission(Permission.ADMIN)
+def list_audit_events():
+    """Newest auth audit events first, filtered by user_id/event_type, paged by cursor"""
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        user_id = int(request.args['user_id']) if request.args.get('user_id') else None
+        before_id = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except (ValueError, binascii.Error) as e:
+        logger.warning(f"Invalid audit event parameters: {str(e)}")
+        return jsonify({'error': 'Invalid pagination or filter parameters'}), 400
+
+    events = audit_log.recent(
+        user_id=user_id,
+        event_type=request.args.get('event_type') or None,
+        before_id=before_id,
+        limit=limit
+    )
+    next_cursor = encode_cursor(events[-1].id) if len(events) == limit else None
+    return current_app.response_class(dumps({
+        'events': [auth_event(e) for e in events],
+        'next_cursor': next_cursor
+    }), mimetype='application/json')
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+
+
+def profile_etag(user):
+    """ETag for a user's profile, derived from the user id and profile version"""
+    return f"profile-{user.id}-{user.profile_version or 0}"
+
+
+class ProfileCache:
+    """Bounded LRU of serialized profile payloads keyed by user id
+
+    Each entry remembers the profile version it was built from, so a bumped
+    version is a miss and the stale body is replaced on the next build.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, user_id, version, body):
+        with self._lock:
+            self._entries[user_id] = (version, body)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+profile_cache = ProfileCache()
+
+
+class QueryCache:
+    """Bounded LRU of serialized query results that expire after a few seconds
+
+    For read-heavy lookups where slightly stale answers are fine; entries
+    are never invalidated, only aged out.
+    """
+
+    def __init__(self, maxsize=2048, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, body, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+search_cache = QueryCache()
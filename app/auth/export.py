@@ -0,0 +1,52 @@
+import csv
+import io
+import zlib
+
+from ..models import User
+from .queries import user_list_query, serialize_user_row
+from ..json_provider import dumps
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_BATCH_SIZE = 1000
+
+# CSV column order, matching the admin listing payload
+EXPORT_FIELDS = ['id', 'username', 'email', 'first_name', 'last_name',
+                 'is_active', 'email_verified', 'created_at', 'role']
+
+def iter_export_rows(query=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield user rows through a server-side cursor, batch_size rows at a time"""
+    if query is None:
+        query = user_list_query()
+    for row in query.order_by(User.id).yield_per(batch_size):
+        yield serialize_user_row(row)
+
+def ndjson_chunks(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+def csv_chunks(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+def gzip_chunks(chunks, level=6):
+    """Compress a stream of byte chunks into a single gzip member"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def export_users(fmt='ndjson', compress=False, query=None, batch_size=EXPORT_BATCH_SIZE):
+    """Stream the users table as NDJSON or CSV byte chunks in constant memory"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    rows = iter_export_rows(query, batch_size)
+    chunks = ndjson_chunks(rows) if fmt == 'ndjson' else csv_chunks(rows)
+    return gzip_chunks(chunks) if compress else chunks
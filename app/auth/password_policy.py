@@ -0,0 +1,147 @@
+import hashlib
+import mmap
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPECIAL_CHARACTERS = '!@#$%^&*(),.?":{}|<>'
+
+# Each record in a breached-password index is a raw SHA-1 digest
+DIGEST_SIZE = 20
+
+
+class BreachedPasswordIndex:
+    """Membership test against a sorted file of raw SHA-1 digests
+
+    The file is memory-mapped and binary-searched, so a lookup touches
+    about log2(N) records and never loads the whole file into memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        if size % DIGEST_SIZE:
+            self._file.close()
+            raise ValueError(f"{path} is not a sorted SHA-1 digest file")
+        self.count = size // DIGEST_SIZE
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+
+    def __contains__(self, password):
+        digest = hashlib.sha1(password.encode('utf-8')).digest()
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._map[mid * DIGEST_SIZE:(mid + 1) * DIGEST_SIZE]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self):
+        if self.count:
+            self._map.close()
+        self._file.close()
+
+
+def build_breached_index(lines, output_path):
+    """Write a sorted digest file from plaintext passwords or SHA-1 hex lines
+
+    Accepts the "HASH:COUNT" format of published breach corpora as well as
+    bare 40-character hex digests; any other line is hashed as a password.
+    Returns the number of unique digests written.
+    """
+    digests = set()
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line:
+            continue
+        candidate = line.split(':', 1)[0]
+        if len(candidate) == DIGEST_SIZE * 2:
+            try:
+                digests.add(bytes.fromhex(candidate))
+                continue
+            except ValueError:
+                pass
+        digests.add(hashlib.sha1(line.encode('utf-8')).digest())
+
+    with open(output_path, 'wb') as out:
+        for digest in sorted(digests):
+            out.write(digest)
+    return len(digests)
+
+
+class PasswordPolicy:
+    """Password rules compiled once from app config and checked in one pass"""
+
+    def __init__(self, min_length=8, require_uppercase=True, require_lowercase=True,
+                 require_numbers=True, require_special=True,
+                 special_characters=DEFAULT_SPECIAL_CHARACTERS, breached_index=None):
+        self.min_length = min_length
+        self.require_uppercase = require_uppercase
+        self.require_lowercase = require_lowercase
+        self.require_numbers = require_numbers
+        self.require_special = require_special
+        self.special_characters = frozenset(special_characters)
+        self.breached_index = breached_index
+
+    @classmethod
+    def from_config(cls, config):
+        breached_index = None
+        path = config.get('PASSWORD_BREACHED_HASHES_FILE')
+        if path:
+            try:
+                breached_index = BreachedPasswordIndex(path)
+                logger.info(f"Loaded {breached_index.count} breached password digests from {path}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Breached password check disabled: {str(e)}")
+
+        return cls(
+            min_length=config['PASSWORD_MIN_LENGTH'],
+            require_uppercase=config['PASSWORD_REQUIRE_UPPERCASE'],
+            require_lowercase=config['PASSWORD_REQUIRE_LOWERCASE'],
+            require_numbers=config['PASSWORD_REQUIRE_NUMBERS'],
+            require_special=config['PASSWORD_REQUIRE_SPECIAL'],
+            special_characters=config.get('PASSWORD_SPECIAL_CHARACTERS', DEFAULT_SPECIAL_CHARACTERS),
+            breached_index=breached_index
+        )
+
+    def violations(self, password):
+        """Return every rule the password breaks, in a stable order"""
+        has_upper = has_lower = has_digit = has_special = False
+        special = self.special_characters
+        for char in password:
+            # ASCII [A-Z]/[a-z]/[0-9] only: 'É' is not an uppercase letter
+            # here, and Unicode digits such as '٣' or '３' are not numbers
+            if 'A' <= char <= 'Z':
+                has_upper = True
+            elif 'a' <= char <= 'z':
+                has_lower = True
+            elif '0' <= char <= '9':
+                has_digit = True
+            if char in special:
+                has_special = True
+
+        problems = []
+        if len(password) < self.min_length:
+            problems.append(f"Password must be at least {self.min_length} characters long")
+        if self.require_uppercase and not has_upper:
+            problems.append("Password must contain at least one uppercase letter")
+        if self.require_lowercase and not has_lower:
+            problems.append("Password must contain at least one lowercase letter")
+        if self.require_numbers and not has_digit:
+            problems.append("Password must contain at least one number")
+        if self.require_special and not has_special:
+            problems.append("Password must contain at least one special character")
+        if self.breached_index is not None and password in self.breached_index:
+            problems.append("Password has appeared in a data breach; please choose another")
+        return problems
+
+    def validate(self, password):
+        """Returns (bool, str) tuple: (is_valid, error_message)"""
+        problems = self.violations(password)
+        return not problems, '; '.join(problems)
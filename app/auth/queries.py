@@ -0,0 +1,98 @@
+from sqlalchemy import func, tuple_
+from .. import db
+from ..models import User, Role
+
+# Columns returned to admin screens; keeps password hashes and bios off the wire
+USER_LIST_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.is_active,
+    User.email_verified,
+    User.created_at,
+    Role.name.label('role'),
+)
+
+def user_list_query():
+    """Column-limited query over users joined to their role name"""
+    return db.session.query(*USER_LIST_COLUMNS).outerjoin(Role, User.role_id == Role.id)
+
+def serialize_user_row(row):
+    return {
+        'id': row.id,
+        'username': row.username,
+        'email': row.email,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'is_active': row.is_active,
+        'email_verified': row.email_verified,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'role': row.role
+    }
+
+# Columns returned to any signed-in user looking up someone to mention
+USER_MENTION_COLUMNS = (
+    User.id,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.avatar_url,
+)
+
+def search_key(column):
+    """lower(column) as indexed by ix_users_*_search
+
+    On PostgreSQL the indexes are built in the "C" collation, whose byte
+    order makes prefix ranges and ORDER BY usable straight off the btree
+    (what text_pattern_ops gives LIKE, plus ordering for keyset paging).
+    """
+    key = func.lower(column)
+    if db.engine.dialect.name == 'postgresql':
+        key = key.collate('C')
+    return key
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix, or None"""
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # Surrogates can't be sent to the database, and no stored text holds one
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+def user_mention_query():
+    """Public fields of active users; deactivated and unverified accounts aren't listed"""
+    # Written as IS NOT rather than = TRUE so the planner keeps walking the
+    # search index instead of switching to the unselective ix_users_is_active
+    return db.session.query(*USER_MENTION_COLUMNS).filter(
+        User.is_active.isnot(False), User.is_active.isnot(None))
+
+def user_search_query(query, field, prefix, after=None):
+    """Narrow a users query to rows whose lower-cased field starts with prefix
+
+    Rows come back in (key, id) order with the key as ``search_key``. The
+    prefix is matched as a key range rather than LIKE, so no escaping is
+    needed and every dialect can answer it from the index. ``after`` is the
+    (key, id) of the last row on the previous page.
+    """
+    key = search_key(getattr(User, field))
+    query = query.add_columns(key.label('search_key')).filter(key >= prefix)
+    upper = prefix_upper_bound(prefix)
+    if upper is not None:
+        query = query.filter(key < upper)
+    if after is not None:
+        query = query.filter(tuple_(key, User.id) > tuple_(*after))
+    return query.order_by(key, User.id)
+
+def serialize_mention_row(row):
+    return {
+        'id': row.id,
+        'username': row.username,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'avatar_url': row.avatar_url
+    }
@@ -1,30 +1,34 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app, session
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime, timedelta
 import uuid
+import secrets
 import re
 import logging
+from sqlalchemy import or_, select, text, update
+from sqlalchemy.orm import joinedload, undefer_group
 
 # Create a logger
 logger = logging.getLogger(__name__)
 
+SESSION_LIFETIME_DAYS = 30
+
 from . import auth
-from .. import db, limiter
-from ..models import User, UserSession, Role, PasswordReset
+from .. import db, limiter, login_guard, avatars, audit_log
+from ..avatars import AvatarError, AvatarTooLarge
+from ..models import User, AuthUser, AUTH_USER_COLUMNS, UserSession, Role, PasswordReset, EmailVerification
 from ..email import send_password_reset_email, send_verification_email
+from ..permissions import role_cache, Permission
 from .utils import validate_password, send_password_change_notification
+from ..json_provider import dumps
+from .cache import profile_cache, profile_etag
+from .serializers import user_summary, user_profile
+from .sessions import current_session_id, revoke_sessions
+from .tokens import issue_token, find_valid_token, consume_token, RESET_TOKEN_TTL, VERIFICATION_TOKEN_TTL
 
-@auth.route('/register', methods=['POST', 'OPTIONS'])
+@auth.route('/register', methods=['POST'])
 @limiter.limit("3 per hour")  # Limit registration attempts
 def register():
-    # Handle preflight request
-    if request.method == 'OPTIONS':
-        response = auth.make_default_options_response()
-        response.headers['Access-Control-Allow-Origin'] = '*'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
-        response.headers['Access-Control-Allow-Methods'] = 'POST,OPTIONS'
-        return response
-
     try:
         # Log the incoming request
         logger.info(f"Registration request received from {request.remote_addr}")
@@ -62,19 +66,22 @@ def register():
             logger.warning(f"Invalid email format: {data['email']}")
             return jsonify({'error': 'Invalid email format'}), 400
         
-        # Check if user already exists
-        if User.query.filter_by(username=data['username']).first():
+        # Check if user already exists (one query for both unique fields)
+        existing = db.session.query(User.username, User.email).filter(
+            or_(User.username == data['username'], User.email == data['email'])
+        ).all()
+        if any(row.username == data['username'] for row in existing):
             logger.warning(f"Username already exists: {data['username']}")
             return jsonify({'error': 'Username already exists'}), 400
-        if User.query.filter_by(email=data['email']).first():
+        if existing:
             logger.warning(f"Email already exists: {data['email']}")
             return jsonify({'error': 'Email already exists'}), 400
         
-        # Get default role
-        role = Role.query.filter_by(default=True).first()
+        # Get default role from the cached roles snapshot
+        role = next((r for r in role_cache.snapshot().values() if r.default), None)
         if role is None:
             logger.info("Creating default user role")
-            role = Role(name='User', default=True, permissions=1)
+            role = Role(name='User', default=True, permissions=Permission.BASIC)
             db.session.add(role)
             db.session.commit()
         
@@ -85,7 +92,7 @@ def register():
             first_name=data['first_name'],
             last_name=data['last_name'],
             phone_number=data.get('phone_number'),
-            role=role,
+            role_id=role.id,
             bio=data.get('bio'),
             location=data.get('location')
         )
@@ -93,12 +100,15 @@ def register():
         
         try:
             db.session.add(user)
+            db.session.flush()
+            verification_token = issue_token(EmailVerification, user, VERIFICATION_TOKEN_TTL)
             db.session.commit()
             logger.info(f"User created successfully: {user.username}")
+            audit_log.record('register', user.id)
             
             try:
                 # Send verification email
-                send_verification_email(user)
+                send_verification_email(user, verification_token)
                 logger.info(f"Verification email sent to: {user.email}")
             except Exception as e:
                 logger.error(f"Failed to send verification email: {str(e)}")
@@ -106,15 +116,8 @@ def register():
             
             response = jsonify({
                 'message': 'User registered successfully. Please check your email to verify your account.',
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name
-                }
+                'user': user_summary(user)
             })
-            response.headers['Access-Control-Allow-Origin'] = '*'
             return response, 201
             
         except Exception as e:
@@ -140,54 +143,66 @@ def login():
     
     if not data or 'email' not in data or 'password' not in data:
         return jsonify({'error': 'Email and password are required'}), 400
+    if not isinstance(data['email'], str) or not isinstance(data['password'], str):
+        return jsonify({'error': 'Email and password must be strings'}), 400
     
-    user = User.query.filter_by(email=data['email']).first()
+    # Shed attempts on hot accounts/IPs before any DB lookup or hashing
+    retry_after = login_guard.check(data['email'], request.remote_addr)
+    if retry_after is not None:
+        audit_log.record('login_blocked', email=data['email'])
+        return jsonify({'error': 'Too many failed login attempts. Please try again later.'}), 429, {'Retry-After': str(retry_after)}
+    
+    # Only the auth columns; the profile fields aren't needed to log in
+    row = db.session.execute(select(*AUTH_USER_COLUMNS).where(User.email == data['email'])).first()
+    user = AuthUser(row) if row is not None else None
     
     if user and user.verify_password(data['password']):
+        login_guard.record_success(data['email'])
         if not user.is_active:
             return jsonify({'error': 'Please verify your email before logging in'}), 401
             
-        # Create session
-        session = UserSession(
+        # Create session; its opaque token doubles as the API access token
+        token = secrets.token_hex(32)
+        user_session = UserSession(
             user_id=user.id,
+            session_token=token,
+            expires_at=datetime.utcnow() + timedelta(days=SESSION_LIFETIME_DAYS),
             ip_address=request.remote_addr,
-            user_agent=request.user_agent.string
+            user_agent=request.user_agent.string[:256]
         )
-        db.session.add(session)
+        db.session.add(user_session)
         
         try:
             db.session.commit()
             login_user(user)
-            
-            # Generate access token
-            token = user.generate_auth_token()
+            # Remember which session row this cookie belongs to (logout, revocation)
+            session['sid'] = user_session.id
+            audit_log.record('login', user.id)
             
             return jsonify({
                 'message': 'Logged in successfully',
                 'token': token,
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name
-                }
+                'user': user_summary(user)
             }), 200
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Login failed'}), 500
     
+    login_guard.record_failure(data['email'], request.remote_addr)
+    audit_log.record('login_failed', user.id if user else None, email=data['email'])
     return jsonify({'error': 'Invalid email or password'}), 401
 
 @auth.route('/verify-email/<token>')
 def verify_email(token):
-    user = User.verify_email_token(token)
-    if not user:
+    user_id = consume_token(EmailVerification, token)
+    if user_id is None:
         return jsonify({'error': 'Invalid or expired verification token'}), 400
     
-    user.email_verified = True
-    user.is_active = True
+    db.session.execute(
+        update(User).where(User.id == user_id).values(email_verified=True, is_active=True)
+    )
     db.session.commit()
+    audit_log.record('email_verified', user_id)
     
     return jsonify({'message': 'Email verified successfully'}), 200
 
@@ -206,22 +221,15 @@ def forgot_password():
     
     # Always return success to prevent email enumeration
     if user:
-        # Generate reset token
-        token = user.get_reset_password_token()
-        
-        # Create password reset record
-        reset_request = PasswordReset(
-            user_id=user.id,
-            token=token,
-            expires_at=datetime.utcnow() + timedelta(hours=1)
-        )
-        
         try:
-            db.session.add(reset_request)
+            # Create password reset record holding only the token digest
+            token = issue_token(PasswordReset, user, RESET_TOKEN_TTL)
             db.session.commit()
             
+            audit_log.record('password_reset_requested', user.id)
+            
             # Send reset email
-            send_password_reset_email(user)
+            send_password_reset_email(user, token)
             
         except Exception as e:
             db.session.rollback()
@@ -236,19 +244,8 @@ def forgot_password():
 def reset_password(token):
     """Reset password using token"""
     if request.method == 'GET':
-        # Verify token
-        user = User.verify_reset_password_token(token)
-        if not user:
-            flash('Invalid or expired reset token')
-            return redirect(url_for('auth.forgot_password'))
-        
-        # Check if token is used
-        reset_request = PasswordReset.query.filter_by(
-            token=token,
-            used=False
-        ).filter(PasswordReset.expires_at > datetime.utcnow()).first()
-        
-        if not reset_request:
+        # Verify token without consuming it
+        if find_valid_token(PasswordReset, token) is None:
             flash('Invalid or expired reset token')
             return redirect(url_for('auth.forgot_password'))
         
@@ -263,27 +260,18 @@ def reset_password(token):
     if not is_valid:
         return jsonify({'error': error_message}), 400
     
-    user = User.verify_reset_password_token(token)
-    if not user:
-        return jsonify({'error': 'Invalid or expired reset token'}), 400
-    
-    # Check if token is used
-    reset_request = PasswordReset.query.filter_by(
-        token=token,
-        used=False
-    ).filter(PasswordReset.expires_at > datetime.utcnow()).first()
-    
-    if not reset_request:
+    # Validate and mark the token used in one statement
+    user_id = consume_token(PasswordReset, token)
+    if user_id is None:
         return jsonify({'error': 'Invalid or expired reset token'}), 400
     
     try:
         # Update password
+        user = db.session.get(User, user_id)
         user.password = data['password']
         
-        # Mark token as used
-        reset_request.used = True
-        
         db.session.commit()
+        audit_log.record('password_reset', user_id)
         
         # Send notification
         send_password_change_notification(user)
@@ -309,6 +297,7 @@ def change_password():
     
     # Validate current password
     if not current_user.verify_password(data['current_password']):
+        audit_log.record('password_change_failed', current_user.id)
         return jsonify({'error': 'Current password is incorrect'}), 401
     
     # Validate new password
@@ -318,11 +307,13 @@ def change_password():
     
     try:
         # Update password
-        current_user.password = data['new_password']
+        user = current_user.load()
+        user.password = data['new_password']
         db.session.commit()
+        audit_log.record('password_changed', user.id)
         
         # Send notification
-        send_password_change_notification(current_user)
+        send_password_change_notification(user)
         
         return jsonify({'message': 'Password changed successfully'}), 200
         
@@ -335,7 +326,7 @@ def health_check():
     """Health check endpoint to verify server status"""
     try:
         # Test database connection
-        db.session.execute('SELECT 1')
+        db.session.execute(text('SELECT 1'))
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
@@ -353,49 +344,82 @@ def health_check():
 @login_required
 def profile():
     if request.method == 'GET':
-        return jsonify({
-            'user': {
-                'id': current_user.id,
-                'username': current_user.username,
-                'email': current_user.email,
-                'first_name': current_user.first_name,
-                'last_name': current_user.last_name,
-                'phone_number': current_user.phone_number,
-                'bio': current_user.bio,
-                'location': current_user.location,
-                'avatar_url': current_user.avatar_url,
-                'created_at': current_user.created_at.isoformat(),
-                'role': current_user.role.name
-            }
-        })
+        # Clients revalidating an unchanged profile get a 304 without a payload
+        etag = profile_etag(current_user)
+        if request.if_none_match.contains_weak(etag):
+            response = current_app.response_class(status=304)
+        else:
+            body = profile_cache.get(current_user.id, current_user.profile_version)
+            if body is None:
+                user = current_user.load(joinedload(User.role), undefer_group('profile'))
+                body = dumps({'user': user_profile(user, user.role.name)})
+                profile_cache.set(current_user.id, current_user.profile_version, body)
+            response = current_app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     else:  # PUT
         data = request.get_json()
         
-        # Update allowed fields
+        # Update allowed fields in one UPDATE, without loading the row
         allowed_fields = ['first_name', 'last_name', 'phone_number', 'bio', 'location']
-        for field in allowed_fields:
-            if field in data:
-                setattr(current_user, field, data[field])
+        values = {field: data[field] for field in allowed_fields if field in data}
+        user_id = current_user.id
         
         try:
+            db.session.execute(
+                update(User).where(User.id == user_id)
+                .values(**values, profile_version=User.profile_version + 1)
+            )
             db.session.commit()
+            profile_cache.invalidate(user_id)
             return jsonify({'message': 'Profile updated successfully'}), 200
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': 'Failed to update profile'}), 500
 
+@auth.route('/profile/avatar', methods=['PUT'])
+@login_required
+def upload_avatar():
+    # Raw image body; it is spooled to disk and processed off the request thread
+    if request.content_length is not None and request.content_length > avatars.max_bytes:
+        return jsonify({'error': f'Avatar exceeds {avatars.max_bytes} bytes'}), 413
+    try:
+        digest, ext, mimetype, path = avatars.receive(request.stream)
+    except AvatarTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+    except AvatarError as e:
+        return jsonify({'error': str(e)}), 415
+
+    app = current_app._get_current_object()
+    user_id = current_user.id
+
+    def set_avatar_url(url):
+        with app.app_context():
+            db.session.execute(
+                update(User).where(User.id == user_id)
+                .values(avatar_url=url, profile_version=User.profile_version + 1)
+            )
+            db.session.commit()
+        profile_cache.invalidate(user_id)
+
+    try:
+        avatars.submit(user_id, digest, ext, mimetype, path, set_avatar_url)
+    except Exception as e:
+        logger.error(f"Avatar upload failed for user {user_id}: {str(e)}")
+        return jsonify({'error': 'Failed to process avatar'}), 500
+    return jsonify({'message': 'Avatar accepted for processing', 'avatar': digest}), 202
+
 @auth.route('/logout')
 @login_required
 def logout():
-    # Invalidate current session
-    current_session = UserSession.query.filter_by(
-        user_id=current_user.id,
-        is_active=True
-    ).first()
-    
-    if current_session:
-        current_session.is_active = False
-        db.session.commit()
+    # Revoke the session this request was authenticated with
+    user_id = current_user.id
+    session_id = current_session_id()
+    if session_id is not None:
+        revoke_sessions(user_id, session_id=session_id)
     
+    audit_log.record('logout', user_id)
     logout_user()
+    session.pop('sid', None)
     return jsonify({'message': 'Logged out successfully'}), 200
@@ -0,0 +1,80 @@
+from flask import request, jsonify, current_app
+from flask_login import current_user, login_required
+import base64
+import binascii
+import json
+import logging
+
+from . import auth
+from .cache import search_cache
+from .queries import (
+    user_list_query, user_mention_query, user_search_query,
+    serialize_user_row, serialize_mention_row,
+)
+from ..json_provider import dumps
+from ..permissions import has_permission, Permission
+
+# Create a logger
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('username', 'email')
+DEFAULT_SEARCH_LIMIT = 10
+MAX_QUERY_LENGTH = 64
+
+def encode_search_cursor(key, user_id):
+    return base64.urlsafe_b64encode(dumps([key, user_id])).decode().rstrip('=')
+
+def decode_search_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    key, user_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if not isinstance(key, str) or not isinstance(user_id, int):
+        raise ValueError('Malformed search cursor')
+    return key, user_id
+
+@auth.route('/users/search', methods=['GET'])
+@login_required
+def search_users():
+    """Prefix search over usernames (and emails, for user admins), keyset paged
+
+    Anyone signed in may look up usernames for mentions and gets public
+    fields only; VIEW_USERS holders may also search emails and get the admin
+    listing fields. Identical lookups within USER_SEARCH_CACHE_TTL seconds
+    are answered from memory.
+    """
+    admin = has_permission(current_user, Permission.VIEW_USERS)
+    field = request.args.get('field', 'username')
+    if field not in SEARCH_FIELDS:
+        return jsonify({'error': f'field must be one of: {", ".join(SEARCH_FIELDS)}'}), 400
+    if field == 'email' and not admin:
+        return jsonify({'error': 'Insufficient permissions'}), 403
+
+    prefix = request.args.get('q', '').strip().lower()
+    if not prefix or len(prefix) > MAX_QUERY_LENGTH:
+        return jsonify({'error': f'q must be 1 to {MAX_QUERY_LENGTH} characters'}), 400
+
+    cursor = request.args.get('cursor') or None
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_SEARCH_LIMIT)),
+                    current_app.config['USER_SEARCH_MAX_LIMIT'])
+        if limit < 1:
+            raise ValueError('limit must be positive')
+        after = decode_search_cursor(cursor) if cursor else None
+    except (ValueError, TypeError, binascii.Error) as e:
+        logger.warning(f"Invalid user search parameters: {str(e)}")
+        return jsonify({'error': 'Invalid pagination parameters'}), 400
+
+    # Admin and mention results differ in fields, so they are cached apart
+    cache_key = (admin, field, prefix, cursor, limit)
+    body = search_cache.get(cache_key)
+    if body is None:
+        base = user_list_query() if admin else user_mention_query()
+        serialize = serialize_user_row if admin else serialize_mention_row
+        # Fetch one extra row to learn whether another page exists
+        rows = user_search_query(base, field, prefix, after).limit(limit + 1).all()
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_search_cursor(page[-1].search_key, page[-1].id)
+        body = dumps({'users': [serialize(row) for row in page], 'next_cursor': next_cursor})
+        search_cache.set(cache_key, body, current_app.config['USER_SEARCH_CACHE_TTL'])
+    return current_app.response_class(body, mimetype='application/json')
@@ -0,0 +1,38 @@
+def user_summary(user):
+    """Public user fields returned by register and login"""
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name
+    }
+
+def user_profile(user, role_name):
+    """Full profile payload returned by GET /profile"""
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'phone_number': user.phone_number,
+        'bio': user.bio,
+        'location': user.location,
+        'avatar_url': user.avatar_url,
+        'created_at': user.created_at.isoformat(),
+        'role': role_name
+    }
+
+def auth_event(event):
+    """Audit event payload returned by GET /audit-events"""
+    return {
+        'id': event.id,
+        'event_type': event.event_type,
+        'user_id': event.user_id,
+        'email': event.email,
+        'ip_address': event.ip_address,
+        'user_agent': event.user_agent,
+        'details': event.details,
+        'created_at': event.created_at.isoformat()
+    }
@@ -0,0 +1,97 @@
+from flask import request, jsonify, session, g, current_app
+from flask_login import current_user, login_required, logout_user
+from datetime import datetime
+from sqlalchemy import select, update
+import logging
+
+from . import auth
+from .. import db, audit_log, revocation_filter
+from ..json_provider import dumps
+from ..models import UserSession
+
+# Create a logger
+logger = logging.getLogger(__name__)
+
+def current_session_id():
+    """Login session behind this request: bearer token first, then the cookie"""
+    return g.get('auth_session_id') or session.get('sid')
+
+def revoke_sessions(user_id, session_id=None, keep_session_id=None):
+    """Revoke one or all active sessions of a user in a single UPDATE
+
+    Revoked rows are added to the revocation filter straight away, so this
+    process rejects them on the very next request. Returns the number revoked.
+    """
+    statement = (
+        update(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.is_active.is_(True))
+        .values(is_active=False, revoked_at=datetime.utcnow())
+        .returning(UserSession.id, UserSession.session_token, UserSession.expires_at)
+    )
+    if session_id is not None:
+        statement = statement.where(UserSession.id == session_id)
+    if keep_session_id is not None:
+        statement = statement.where(UserSession.id != keep_session_id)
+    rows = db.session.execute(statement).all()
+    db.session.commit()
+    revocation_filter.add(rows)
+    return len(rows)
+
+def serialize_session(row, current_id):
+    return {
+        'id': row.id,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'expires_at': row.expires_at.isoformat(),
+        'ip_address': row.ip_address,
+        'user_agent': row.user_agent,
+        'current': row.id == current_id
+    }
+
+@auth.route('/sessions', methods=['GET'])
+@login_required
+def list_sessions():
+    """Active login sessions of the current user, newest first"""
+    rows = db.session.execute(
+        select(UserSession.id, UserSession.created_at, UserSession.expires_at,
+               UserSession.ip_address, UserSession.user_agent)
+        .where(
+            UserSession.user_id == current_user.id,
+            UserSession.is_active.is_(True),
+            UserSession.expires_at > datetime.utcnow()
+        )
+        .order_by(UserSession.id.desc())
+    ).all()
+    current_id = current_session_id()
+    return current_app.response_class(dumps({
+        'sessions': [serialize_session(row, current_id) for row in rows]
+    }), mimetype='application/json')
+
+@auth.route('/sessions/<int:session_id>', methods=['DELETE'])
+@login_required
+def revoke_session(session_id):
+    """Revoke one of the current user's sessions"""
+    user_id = current_user.id
+    if not revoke_sessions(user_id, session_id=session_id):
+        return jsonify({'error': 'Session not found'}), 404
+    audit_log.record('session_revoked', user_id, session_id=session_id)
+    if session_id == current_session_id():
+        logout_user()
+        session.pop('sid', None)
+    return jsonify({'message': 'Session revoked'}), 200
+
+@auth.route('/sessions', methods=['DELETE'])
+@login_required
+def revoke_sessions_endpoint():
+    """Revoke all of the current user's sessions; ?others=true keeps this one"""
+    user_id = current_user.id
+    keep_current = request.args.get('others', 'false').lower() in ('true', '1', 'yes')
+    current_id = current_session_id()
+    if keep_current and current_id is None:
+        return jsonify({'error': 'The current session is not tracked; log in again'}), 400
+
+    count = revoke_sessions(user_id, keep_session_id=current_id if keep_current else None)
+    audit_log.record('sessions_revoked', user_id, count=count, kept_current=keep_current)
+    if not keep_current:
+        logout_user()
+        session.pop('sid', None)
+    return jsonify({'message': f'Revoked {count} sessions', 'revoked': count}), 200
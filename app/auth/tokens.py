@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+import hashlib
+import secrets
+
+from .. import db
+
+# Token lifetimes in seconds
+RESET_TOKEN_TTL = 3600
+VERIFICATION_TOKEN_TTL = 172800  # 48 hours
+
+def hash_token(token):
+    """Fixed-length digest stored in place of the raw token"""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def issue_token(model, user, expires_in):
+    """Create a single-use token row for user and return the raw token
+
+    Only the SHA-256 digest is persisted; the raw value exists in the
+    email sent to the user and nowhere else. The caller commits.
+    """
+    token = secrets.token_urlsafe(32)
+    db.session.add(model(
+        user_id=user.id,
+        token_hash=hash_token(token),
+        expires_at=datetime.utcnow() + timedelta(seconds=expires_in)
+    ))
+    return token
+
+def _valid(model, token):
+    return (
+        (model.token_hash == hash_token(token)) &
+        (model.used == False) &  # noqa: E712
+        (model.expires_at > datetime.utcnow())
+    )
+
+def find_valid_token(model, token):
+    """Return the user id a token belongs to without consuming it, or None"""
+    return db.session.execute(
+        select(model.user_id).where(_valid(model, token))
+    ).scalar()
+
+def consume_token(model, token):
+    """Atomically mark a token used and return its user id, or None
+
+    Validation and consumption are a single indexed UPDATE ... RETURNING,
+    so two concurrent requests can never both redeem the same token. The
+    caller commits (or rolls back to restore the token).
+    """
+    return db.session.execute(
+        update(model)
+        .where(_valid(model, token))
+        .values(used=True)
+        .returning(model.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
@@ -1,5 +1,5 @@
-import re
-from flask import current_app
+from datetime import datetime
+from flask import current_app, request
 from ..email import send_email
 
 def validate_password(password):
@@ -7,26 +7,7 @@ def validate_password(password):
     Validate password against policy requirements
     Returns (bool, str) tuple: (is_valid, error_message)
     """
-    if len(password) < current_app.config['PASSWORD_MIN_LENGTH']:
-        return False, f"Password must be at least {current_app.config['PASSWORD_MIN_LENGTH']} characters long"
-    
-    if current_app.config['PASSWORD_REQUIRE_UPPERCASE']:
-        if not re.search(r'[A-Z]', password):
-            return False, "Password must contain at least one uppercase letter"
-    
-    if current_app.config['PASSWORD_REQUIRE_LOWERCASE']:
-        if not re.search(r'[a-z]', password):
-            return False, "Password must contain at least one lowercase letter"
-    
-    if current_app.config['PASSWORD_REQUIRE_NUMBERS']:
-        if not re.search(r'\d', password):
-            return False, "Password must contain at least one number"
-    
-    if current_app.config['PASSWORD_REQUIRE_SPECIAL']:
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', password):
-            return False, "Password must contain at least one special character"
-    
-    return True, ""
+    return current_app.extensions['password_policy'].validate(password)
 
 def send_password_change_notification(user):
     """Send notification email when password is changed"""
@@ -0,0 +1,296 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import send_from_directory
+from threading import Lock
+import hashlib
+import multiprocessing
+import os
+import shutil
+import tempfile
+import logging
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # thumbnails need Pillow; without it the original is served
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes -> (extension, mimetype) of accepted uploads
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png', 'image/png'),
+    (b'\xff\xd8\xff', 'jpg', 'image/jpeg'),
+    (b'GIF87a', 'gif', 'image/gif'),
+    (b'GIF89a', 'gif', 'image/gif'),
+]
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class AvatarError(ValueError):
+    """Rejected upload; str(e) is safe to return to the client"""
+
+
+class AvatarTooLarge(AvatarError):
+    pass
+
+
+def sniff_image(head):
+    """Return (extension, mimetype) for a supported image header, else None"""
+    for signature, ext, mimetype in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext, mimetype
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp', 'image/webp'
+    return None
+
+
+def content_name(digest, suffix):
+    """Content-addressed object name, fanned out by the first digest byte"""
+    return f'{digest[:2]}/{digest}{suffix}'
+
+
+def process_context():
+    """Start method for the thumbnail pool: forkserver where available, else spawn
+
+    Forking the threaded server would copy locks other threads hold (the
+    logging, SQLAlchemy pool and job pool locks) into the children.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+def make_thumbnails(source, sizes, out_dir):
+    """Square-crop source into one WebP per size; runs in a worker process"""
+    outputs = {}
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for size in sizes:
+            thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            path = os.path.join(out_dir, f'{size}.webp')
+            thumb.save(path, 'WEBP', quality=85, method=4)
+            outputs[size] = path
+    return outputs
+
+
+class LocalStorage:
+    """Avatar objects under a local directory, served by the app itself"""
+
+    def __init__(self, root, url_prefix):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip('/')
+        os.makedirs(root, exist_ok=True)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.root, name))
+
+    def save(self, name, path, mimetype):
+        target = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Copy then rename so readers never see a partial file
+        partial = f'{target}.{os.getpid()}.part'
+        shutil.copyfile(path, partial)
+        os.replace(partial, target)
+
+    def url(self, name):
+        return f'{self.url_prefix}/{name}'
+
+
+class S3Storage:
+    """Avatar objects in an S3-compatible bucket (needs boto3)"""
+
+    def __init__(self, bucket, url_prefix, endpoint_url=None):
+        import boto3
+        self.client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.url_prefix = url_prefix.rstrip('/')
+
+    def exists(self, name):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+            return True
+        except self.client.exceptions.ClientError:
+            return False
+
+    def save(self, name, path, mimetype):
+        # upload_file streams from disk with multipart uploads for large files
+        self.client.upload_file(path, self.bucket, name, ExtraArgs={
+            'ContentType': mimetype,
+            'CacheControl': IMMUTABLE_CACHE_CONTROL,
+        })
+
+    def url(self, name):
+        return f'{self.url_prefix}/{name}'
+
+
+def storage_from_uri(uri, url_prefix, endpoint_url=None):
+    if uri.startswith('s3://'):
+        return S3Storage(uri[len('s3://'):].strip('/'), url_prefix, endpoint_url)
+    if not uri.startswith('file://'):
+        raise ValueError(f"Unsupported AVATAR_STORAGE_URI: {uri}")
+    return LocalStorage(uri[len('file://'):], url_prefix)
+
+
+class Avatars:
+    """Streamed avatar uploads with thumbnailing off the request path
+
+    ``receive`` spools the request body to a temporary file in fixed-size
+    chunks while hashing it, so memory use doesn't depend on upload size.
+    ``submit`` hands the file to a small job thread pool: thumbnails are
+    rendered in a separate process pool (image decoding is CPU bound and
+    would otherwise hold the GIL), then stored under names derived from the
+    SHA-256 of the upload. Identical uploads therefore share objects and
+    skip processing, and every URL is immutable and cacheable forever.
+    """
+
+    def __init__(self, app=None):
+        self.storage = None
+        self._jobs = None
+        self._processes = None
+        self._latest = {}
+        self._lock = Lock()
+        self.received = 0
+        self.processed = 0
+        self.deduplicated = 0
+        self.failed = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('AVATAR_STORAGE_URI', 'file://' + os.path.join(app.instance_path, 'avatars'))
+        app.config.setdefault('AVATAR_S3_ENDPOINT_URL', None)
+        app.config.setdefault('AVATAR_URL_PREFIX', '/avatars')
+        app.config.setdefault('AVATAR_MAX_BYTES', 10 * 1024 * 1024)
+        app.config.setdefault('AVATAR_CHUNK_SIZE', 64 * 1024)
+        app.config.setdefault('AVATAR_SIZES', (256, 64))
+        app.config.setdefault('AVATAR_WORKERS', 2)
+
+        self.max_bytes = app.config['AVATAR_MAX_BYTES']
+        self.chunk_size = app.config['AVATAR_CHUNK_SIZE']
+        self.sizes = tuple(sorted(app.config['AVATAR_SIZES'], reverse=True))
+        self.workers = app.config['AVATAR_WORKERS']
+        self.storage = storage_from_uri(
+            app.config['AVATAR_STORAGE_URI'], app.config['AVATAR_URL_PREFIX'],
+            app.config['AVATAR_S3_ENDPOINT_URL']
+        )
+        self.received = self.processed = self.deduplicated = self.failed = 0
+        app.extensions['avatars'] = self
+
+        if isinstance(self.storage, LocalStorage):
+            app.add_url_rule(f"{self.storage.url_prefix}/<path:name>", 'avatar_file', self.serve)
+
+        metrics = app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.register('avatars', self.metrics)
+
+    def serve(self, name):
+        response = send_from_directory(self.storage.root, name, max_age=31536000)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    def receive(self, stream):
+        """Spool an upload to disk; return (digest, extension, mimetype, path)"""
+        digest = hashlib.sha256()
+        size = 0
+        kind = None
+        fd, path = tempfile.mkstemp(prefix='avatar-')
+        try:
+            with os.fdopen(fd, 'wb') as spool:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    if kind is None:
+                        kind = sniff_image(chunk[:16])
+                        if kind is None:
+                            raise AvatarError('Unsupported image type')
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise AvatarTooLarge(f'Avatar exceeds {self.max_bytes} bytes')
+                    digest.update(chunk)
+                    spool.write(chunk)
+            if kind is None:
+                raise AvatarError('Empty upload')
+        except Exception:
+            os.unlink(path)
+            raise
+        self.received += 1
+        return digest.hexdigest(), kind[0], kind[1], path
+
+    def names(self, digest, ext):
+        """Object names for an upload: the original plus one thumbnail per size"""
+        names = {'original': content_name(digest, f'.{ext}')}
+        if Image is not None:
+            for size in self.sizes:
+                names[size] = content_name(digest, f'-{size}.webp')
+        return names
+
+    def submit(self, user_id, digest, ext, mimetype, path, on_ready):
+        """Process an upload in the background, then call on_ready(url)
+
+        Only the newest upload per user reports back, so a slow earlier job
+        can't overwrite a later avatar.
+        """
+        with self._lock:
+            self._latest[user_id] = digest
+        if not self.workers:
+            return self._run(user_id, digest, ext, mimetype, path, on_ready)
+        if self._jobs is None:
+            with self._lock:
+                if self._jobs is None:
+                    self._processes = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=process_context()
+                    ) if Image is not None else None
+                    self._jobs = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='avatar')
+        return self._jobs.submit(self._run, user_id, digest, ext, mimetype, path, on_ready)
+
+    def _run(self, user_id, digest, ext, mimetype, path, on_ready):
+        names = self.names(digest, ext)
+        primary = names[self.sizes[0]] if Image is not None else names['original']
+        try:
+            # The original is stored last, so its presence means the upload is complete
+            if self.storage.exists(names['original']):
+                self.deduplicated += 1
+            else:
+                self._process(names, mimetype, path)
+                self.processed += 1
+            with self._lock:
+                current = self._latest.get(user_id) == digest
+                if current:
+                    del self._latest[user_id]
+            if current:
+                on_ready(self.storage.url(primary))
+            return self.storage.url(primary)
+        except Exception as e:
+            self.failed += 1
+            with self._lock:
+                if self._latest.get(user_id) == digest:
+                    del self._latest[user_id]
+            logger.error(f"Avatar processing failed for user {user_id}: {str(e)}")
+            raise
+        finally:
+            os.unlink(path)
+
+    def _process(self, names, mimetype, path):
+        out_dir = tempfile.mkdtemp(prefix='avatar-thumbs-')
+        try:
+            if Image is not None:
+                if self._processes is not None:
+                    thumbnails = self._processes.submit(make_thumbnails, path, self.sizes, out_dir).result()
+                else:
+                    thumbnails = make_thumbnails(path, self.sizes, out_dir)
+                for size, thumb_path in thumbnails.items():
+                    self.storage.save(names[size], thumb_path, 'image/webp')
+            else:
+                logger.warning("Pillow is not installed; storing avatar without thumbnails")
+            self.storage.save(names['original'], path, mimetype)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    def metrics(self):
+        return {
+            'received_total': self.received,
+            'processed_total': self.processed,
+            'deduplicated_total': self.deduplicated,
+            'failed_total': self.failed,
+            'pending': len(self._latest),
+        }
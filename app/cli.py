@@ -0,0 +1,42 @@
+import sys
+import click
+from flask.cli import AppGroup
+
+from .auth.export import export_users, EXPORT_FORMATS, EXPORT_BATCH_SIZE
+from .auth.password_policy import build_breached_index
+
+users_cli = AppGroup('users', help='User administration commands.')
+
+@users_cli.command('export')
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='ndjson',
+              help='Output format.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), default='-',
+              help='Output file (default: stdout).')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip-compress the output.')
+@click.option('--batch-size', type=int, default=EXPORT_BATCH_SIZE,
+              help='Rows fetched per server-side cursor round trip.')
+def export_command(fmt, output, compress, batch_size):
+    """Export the users table as NDJSON or CSV in constant memory"""
+    if output == '-':
+        stream = sys.stdout.buffer
+    else:
+        stream = open(output, 'wb')
+    try:
+        for chunk in export_users(fmt, compress=compress, batch_size=batch_size):
+            stream.write(chunk)
+        stream.flush()
+    finally:
+        if stream is not sys.stdout.buffer:
+            stream.close()
+
+@users_cli.command('build-password-index')
+@click.argument('source', type=click.File('r', encoding='utf-8', errors='replace'))
+@click.argument('output', type=click.Path(dir_okay=False))
+def build_password_index_command(source, output):
+    """Build the sorted digest file used by PASSWORD_BREACHED_HASHES_FILE
+
+    SOURCE holds one plaintext password, SHA-1 hex digest, or HASH:COUNT
+    line per entry.
+    """
+    count = build_breached_index(source, output)
+    click.echo(f"Wrote {count} digests to {output}")
@@ -0,0 +1,74 @@
+from flask import request
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset([
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+])
+
+
+class Compression:
+    """Negotiated gzip/brotli compression for buffered responses
+
+    Only responses at least COMPRESS_MIN_SIZE bytes long with a compressible
+    mimetype are compressed; streamed responses (exports, user listings)
+    are left alone or compress themselves.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+
+        if not app.config['COMPRESS_ENABLED']:
+            return
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.level = app.config['COMPRESS_LEVEL']
+        self.brotli_quality = app.config['COMPRESS_BROTLI_QUALITY']
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+        app.after_request(self._compress)
+        app.extensions['compression'] = self
+
+    def _compress(self, response):
+        if (response.direct_passthrough
+                or response.is_streamed
+                or response.status_code < 200
+                or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        if encoding == 'br':
+            body = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            body = gzip.compress(body, compresslevel=self.level, mtime=0)
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes are a different representation of the same resource
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,201 @@
+from flask import request, g, jsonify
+from threading import Lock
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Share of the current limit each priority class may occupy. Lower classes
+# hit their ceiling first, so they are shed before higher ones; 'critical'
+# is never shed.
+DEFAULT_CLASS_SHARES = {
+    'critical': None,
+    'high': 1.0,
+    'normal': 0.8,
+    'low': 0.5,
+}
+
+
+class GradientLimit:
+    """Concurrency limit steered by the ratio of baseline to current latency
+
+    Completed request latencies are averaged over windows of
+    ``window_size`` samples, and a baseline tracks the latency the service
+    has when nothing is queueing. When a window is slower than
+    ``tolerance * baseline`` the limit shrinks in proportion (by at most
+    half); otherwise, if the limit was actually being used, it grows by its
+    square root. Each step is smoothed so single slow windows don't swing it.
+    """
+
+    def __init__(self, initial=20, minimum=4, maximum=200, window_size=20,
+                 tolerance=1.5, smoothing=0.2, baseline_decay=0.05):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.window_size = window_size
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.baseline_decay = baseline_decay
+        self.baseline = None
+        self.last_latency = 0.0
+        self._samples = 0
+        self._total = 0.0
+        self._peak_inflight = 0
+
+    def sample(self, latency, inflight):
+        """Feed one completed request; returns True when the limit was updated"""
+        self._samples += 1
+        self._total += latency
+        self._peak_inflight = max(self._peak_inflight, inflight)
+        if self._samples < self.window_size:
+            return False
+
+        current = self._total / self._samples
+        utilized = self._peak_inflight >= self.limit / 2
+        self._samples = 0
+        self._total = 0.0
+        self._peak_inflight = 0
+        self.last_latency = current
+
+        if self.baseline is None:
+            self.baseline = current
+        elif current < self.baseline:
+            self.baseline = current
+        else:
+            # Drift up slowly so a permanently slower service re-baselines
+            self.baseline += (current - self.baseline) * self.baseline_decay
+
+        gradient = max(0.5, min(1.0, self.tolerance * self.baseline / current))
+        if gradient < 1.0:
+            target = self.limit * gradient
+        elif utilized:
+            target = self.limit + math.sqrt(self.limit)
+        else:
+            return True
+        self.limit += (target - self.limit) * self.smoothing
+        self.limit = max(self.minimum, min(self.maximum, self.limit))
+        return True
+
+
+class AdaptiveConcurrency:
+    """Shed requests beyond an adaptive in-flight limit with a fast 503
+
+    Every request is assigned a priority class by endpoint
+    (CONCURRENCY_PRIORITIES, default CONCURRENCY_DEFAULT_PRIORITY). It is
+    admitted only while the number of in-flight requests is below its
+    class's share of the current limit; otherwise it gets 503 with
+    Retry-After before any session, database or hashing work happens.
+
+    Latency is sampled when the response is ready to send, so a slow client
+    reading a body doesn't look like a slow server. Streamed responses and
+    CONCURRENCY_UNSAMPLED_ENDPOINTS keep their slot until teardown but feed
+    no sample: their duration says nothing about queueing.
+    """
+
+    def __init__(self, app=None):
+        self._lock = Lock()
+        self.inflight = 0
+        self.admitted = 0
+        self.shed = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CONCURRENCY_ENABLED', True)
+        app.config.setdefault('CONCURRENCY_INITIAL_LIMIT', 20)
+        app.config.setdefault('CONCURRENCY_MIN_LIMIT', 4)
+        app.config.setdefault('CONCURRENCY_MAX_LIMIT', 200)
+        app.config.setdefault('CONCURRENCY_WINDOW_SIZE', 20)
+        app.config.setdefault('CONCURRENCY_LATENCY_TOLERANCE', 1.5)
+        app.config.setdefault('CONCURRENCY_RETRY_AFTER', 1)
+        app.config.setdefault('CONCURRENCY_PRIORITIES', {})
+        app.config.setdefault('CONCURRENCY_DEFAULT_PRIORITY', 'normal')
+        app.config.setdefault('CONCURRENCY_CLASS_SHARES', DEFAULT_CLASS_SHARES)
+        app.config.setdefault('CONCURRENCY_UNSAMPLED_ENDPOINTS', ())
+
+        self.enabled = app.config['CONCURRENCY_ENABLED']
+        self.retry_after = app.config['CONCURRENCY_RETRY_AFTER']
+        self.priorities = app.config['CONCURRENCY_PRIORITIES']
+        self.default_priority = app.config['CONCURRENCY_DEFAULT_PRIORITY']
+        self.shares = app.config['CONCURRENCY_CLASS_SHARES']
+        self.unsampled = frozenset(app.config['CONCURRENCY_UNSAMPLED_ENDPOINTS'])
+        self.limiter = GradientLimit(
+            initial=app.config['CONCURRENCY_INITIAL_LIMIT'],
+            minimum=app.config['CONCURRENCY_MIN_LIMIT'],
+            maximum=app.config['CONCURRENCY_MAX_LIMIT'],
+            window_size=app.config['CONCURRENCY_WINDOW_SIZE'],
+            tolerance=app.config['CONCURRENCY_LATENCY_TOLERANCE'],
+        )
+        self.inflight = self.admitted = 0
+        self.shed = {name: 0 for name in self.shares}
+        app.extensions['concurrency'] = self
+
+        if not self.enabled:
+            return
+        # Run before every other before_request hook so shed requests cost nothing
+        app.before_request_funcs.setdefault(None, []).insert(0, self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+        metrics = app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.register('concurrency', self.metrics)
+
+    def acquire(self, priority):
+        """Take an in-flight slot for priority; False if the request must be shed"""
+        share = self.shares.get(priority, self.shares[self.default_priority])
+        with self._lock:
+            if share is not None and self.inflight >= max(1, int(self.limiter.limit * share)):
+                self.shed[priority] = self.shed.get(priority, 0) + 1
+                return False
+            self.inflight += 1
+            self.admitted += 1
+            return True
+
+    def release(self, latency=None):
+        """Free an in-flight slot; latency=None frees it without a sample"""
+        with self._lock:
+            inflight = self.inflight
+            self.inflight -= 1
+            if latency is not None and self.limiter.sample(latency, inflight):
+                logger.debug(f"Concurrency limit now {self.limiter.limit:.1f} "
+                             f"at {self.limiter.last_latency * 1000:.1f}ms")
+
+    def _before_request(self):
+        priority = self.priorities.get(request.endpoint, self.default_priority)
+        if not self.acquire(priority):
+            logger.warning(f"Shed {priority} request to {request.endpoint} at limit {self.limiter.limit:.0f}")
+            response = jsonify({'error': 'Server is busy, please retry shortly'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(self.retry_after)
+            return response
+        g.concurrency_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.get('concurrency_started')
+        if started is not None:
+            if response.is_streamed or request.endpoint in self.unsampled:
+                g.concurrency_latency = None
+            else:
+                g.concurrency_latency = time.perf_counter() - started
+        return response
+
+    def _teardown_request(self, exc):
+        started = g.pop('concurrency_started', None)
+        if started is not None:
+            # Requests that raised never reached after_request; time them here
+            self.release(g.pop('concurrency_latency', time.perf_counter() - started))
+
+    def metrics(self):
+        samples = {
+            'limit': self.limiter.limit,
+            'inflight': self.inflight,
+            'admitted_total': self.admitted,
+            'shed_total': sum(self.shed.values()),
+            'latency_seconds': self.limiter.last_latency,
+            'baseline_latency_seconds': self.limiter.baseline or 0,
+        }
+        for priority, count in self.shed.items():
+            samples[f'shed_{priority}_total'] = count
+        return samples
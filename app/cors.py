@@ -0,0 +1,50 @@
+class PreflightMiddleware:
+    """Answer CORS preflight requests at the WSGI layer
+
+    Preflights never reach Flask, the limiter, or the session machinery.
+    Response headers are computed once per allowed origin at startup, so
+    answering a preflight is a dict lookup plus start_response.
+    """
+
+    def __init__(self, wsgi_app, origins, methods, allow_headers, max_age,
+                 supports_credentials=True):
+        self.wsgi_app = wsgi_app
+        self.allow_any = '*' in origins
+        self.handled = 0
+        self.rejected = 0
+
+        shared = [
+            ('Access-Control-Allow-Methods', ', '.join(methods)),
+            ('Access-Control-Allow-Headers', ', '.join(allow_headers)),
+            ('Access-Control-Max-Age', str(max_age)),
+            ('Content-Length', '0'),
+        ]
+        if self.allow_any:
+            # Browsers reject a wildcard origin on credentialed requests
+            self._any_headers = [('Access-Control-Allow-Origin', '*')] + shared
+        credentials = [('Access-Control-Allow-Credentials', 'true')] if supports_credentials else []
+        self._headers = {
+            origin: [('Access-Control-Allow-Origin', origin), ('Vary', 'Origin')] + credentials + shared
+            for origin in origins if origin != '*'
+        }
+        self._rejected_headers = [('Vary', 'Origin'), ('Content-Length', '0')]
+
+    def __call__(self, environ, start_response):
+        if (environ['REQUEST_METHOD'] != 'OPTIONS'
+                or 'HTTP_ACCESS_CONTROL_REQUEST_METHOD' not in environ):
+            return self.wsgi_app(environ, start_response)
+
+        headers = self._headers.get(environ.get('HTTP_ORIGIN'))
+        if headers is None and self.allow_any:
+            headers = self._any_headers
+        if headers is None:
+            self.rejected += 1
+            start_response('403 Forbidden', self._rejected_headers)
+            return [b'']
+
+        self.handled += 1
+        start_response('204 No Content', headers)
+        return [b'']
+
+    def metrics(self):
+        return {'preflights_total': self.handled, 'preflights_rejected': self.rejected}
@@ -1,15 +1,35 @@
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from flask import current_app, render_template
+from collections import deque
+from threading import BoundedSemaphore, Lock, Thread
 import os
+import time
+import logging
 
-def send_async_email(app, subject, recipients, text_body, html_body):
-    with app.app_context():
-        send_email(subject, recipients, text_body, html_body)
+logger = logging.getLogger(__name__)
 
-def send_email(subject, recipients, text_body, html_body):
-    try:
+class EmailUnavailable(Exception):
+    """The provider is failing or saturated and the message was not queued"""
+
+class EmailRejected(Exception):
+    """The provider refused the message itself; sending it again won't help"""
+
+def is_permanent_failure(error):
+    """True for 4xx responses other than timeouts and rate limiting"""
+    status = getattr(error, 'status_code', None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+class SendGridTransport:
+    """Deliver email through the SendGrid API"""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+
+    def send(self, subject, recipients, text_body, html_body):
         sg = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
+        # Bound each API call instead of waiting out the OS network timeout
+        sg.client.timeout = self.timeout
         message = Mail(
             from_email=os.getenv('MAIL_DEFAULT_SENDER'),
             to_emails=recipients,
@@ -18,12 +38,265 @@ def send_email(subject, recipients, text_body, html_body):
             html_content=html_body
         )
         sg.send(message)
+
+class MemoryTransport:
+    """Collect email in an in-process outbox instead of sending it (tests, local dev)"""
+
+    def __init__(self):
+        self.outbox = []
+
+    def send(self, subject, recipients, text_body, html_body):
+        self.outbox.append({
+            'subject': subject,
+            'recipients': recipients,
+            'text_body': text_body,
+            'html_body': html_body
+        })
+
+EMAIL_TRANSPORTS = {
+    'sendgrid': SendGridTransport,
+    'memory': MemoryTransport,
+}
+
+class CircuitBreaker:
+    """Closed -> open after consecutive failures -> half-open probe -> closed
+
+    While open, calls are refused without touching the provider. After
+    reset_timeout one probe call is let through (half-open); its outcome
+    closes the circuit or re-opens it for another reset_timeout.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened_total = 0
+        self._probing = False
+        self._lock = Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """Give back an unused half-open probe so the next caller can take it"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened_total += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+class ResilientTransport:
+    """Circuit breaker plus bulkhead in front of an email transport
+
+    At most max_concurrent sends are in flight at once; further callers and
+    all callers while the circuit is open don't wait on the provider. With
+    EMAIL_ON_UNAVAILABLE = 'defer' their (already rendered) messages go to a
+    bounded queue that a background thread drains once the circuit lets a
+    probe through; with 'fail' they get EmailUnavailable immediately.
+
+    Messages the provider rejects outright (a 4xx response) are never
+    retried or counted against the breaker, and a deferred message is given
+    up on after max_attempts failed sends, so no single message can hold
+    up the queue behind it.
+    """
+
+    SENT, REFUSED, FAILED, REJECTED = 'sent', 'refused', 'failed', 'rejected'
+
+    STATE_VALUES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+    def __init__(self, transport, breaker, max_concurrent=4, on_unavailable='defer',
+                 queue_size=1000, retry_interval=5.0, max_attempts=5):
+        self.transport = transport
+        self.breaker = breaker
+        self.on_unavailable = on_unavailable
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self._slots = BoundedSemaphore(max_concurrent)
+        self._deferred = deque(maxlen=queue_size)
+        self._lock = Lock()
+        self._retrier = None
+        self.inflight = 0
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+        self.short_circuited = 0
+        self.bulkhead_rejected = 0
+        self.deferred_dropped = 0
+
+    def _attempt(self, message):
+        """Try one send; returns SENT, or REFUSED, FAILED or REJECTED"""
+        if not self.breaker.allow():
+            with self._lock:
+                self.short_circuited += 1
+            return self.REFUSED
+        if not self._slots.acquire(blocking=False):
+            # A full bulkhead says nothing about provider health
+            self.breaker.release_probe()
+            with self._lock:
+                self.bulkhead_rejected += 1
+            return self.REFUSED
+        with self._lock:
+            self.inflight += 1
+        try:
+            self.transport.send(*message)
+        except Exception as e:
+            if is_permanent_failure(e):
+                # The provider answered; only this message is at fault
+                self.breaker.release_probe()
+                with self._lock:
+                    self.rejected += 1
+                logger.error(f"Email to {message[1]} rejected: {str(e)}")
+                return self.REJECTED
+            self.breaker.record_failure()
+            with self._lock:
+                self.failed += 1
+            logger.error(f"Email send failed ({self.breaker.state}): {str(e)}")
+            return self.FAILED
+        finally:
+            with self._lock:
+                self.inflight -= 1
+            self._slots.release()
+        self.breaker.record_success()
+        with self._lock:
+            self.sent += 1
+        return self.SENT
+
+    def send(self, subject, recipients, text_body, html_body):
+        message = (subject, recipients, text_body, html_body)
+        outcome = self._attempt(message)
+        if outcome == self.SENT:
+            return
+        if outcome == self.REJECTED:
+            raise EmailRejected(f'Email to {recipients} rejected by the provider')
+        if self.on_unavailable != 'defer':
+            raise EmailUnavailable(f'Email provider unavailable ({self.breaker.state})')
+        self._defer(message, attempts=1 if outcome == self.FAILED else 0)
+
+    def _defer(self, message, attempts=0):
+        with self._lock:
+            if len(self._deferred) == self._deferred.maxlen:
+                self.deferred_dropped += 1
+                # append() evicts the oldest message, not the one being deferred
+                logger.error(f"Email queue full; dropped message to {self._deferred[0][0][1]}")
+            self._deferred.append((message, attempts))
+            if self._retrier is None:
+                self._retrier = Thread(target=self._retry_loop, name='email-retry', daemon=True)
+                self._retrier.start()
+
+    def drain(self):
+        """Send deferred messages until the queue empties or a send is refused or fails"""
+        sent = 0
+        while True:
+            with self._lock:
+                if not self._deferred:
+                    return sent
+                message, attempts = self._deferred.popleft()
+            outcome = self._attempt(message)
+            if outcome == self.SENT:
+                sent += 1
+                continue
+            if outcome == self.REJECTED:
+                continue
+            if outcome == self.FAILED:
+                attempts += 1
+                if attempts >= self.max_attempts:
+                    with self._lock:
+                        self.deferred_dropped += 1
+                    logger.error(f"Gave up on email to {message[1]} after {attempts} attempts")
+                    continue
+            with self._lock:
+                self._deferred.appendleft((message, attempts))
+            return sent
+
+    def _retry_loop(self):
+        while True:
+            time.sleep(self.retry_interval)
+            try:
+                self.drain()
+            except Exception as e:
+                logger.error(f"Email retry loop error: {str(e)}")
+
+    def metrics(self):
+        return {
+            'circuit_state': self.STATE_VALUES[self.breaker.state],
+            'circuit_opened_total': self.breaker.opened_total,
+            'sent_total': self.sent,
+            'failed_total': self.failed,
+            'rejected_total': self.rejected,
+            'short_circuited_total': self.short_circuited,
+            'bulkhead_rejected_total': self.bulkhead_rejected,
+            'inflight': self.inflight,
+            'deferred': len(self._deferred),
+            'deferred_dropped_total': self.deferred_dropped,
+        }
+
+def init_email(app):
+    app.config.setdefault('EMAIL_SEND_TIMEOUT', 5)
+    app.config.setdefault('EMAIL_BREAKER_FAILURES', 5)
+    app.config.setdefault('EMAIL_BREAKER_RESET_TIMEOUT', 30)
+    app.config.setdefault('EMAIL_MAX_CONCURRENT', 4)
+    app.config.setdefault('EMAIL_ON_UNAVAILABLE', 'defer')
+    app.config.setdefault('EMAIL_QUEUE_SIZE', 1000)
+    app.config.setdefault('EMAIL_MAX_ATTEMPTS', 5)
+
+    transport_class = EMAIL_TRANSPORTS[app.config['EMAIL_TRANSPORT']]
+    if transport_class is SendGridTransport:
+        transport = SendGridTransport(timeout=app.config['EMAIL_SEND_TIMEOUT'])
+    else:
+        transport = transport_class()
+    app.extensions['email_transport'] = transport
+    app.extensions['email'] = ResilientTransport(
+        transport,
+        CircuitBreaker(app.config['EMAIL_BREAKER_FAILURES'], app.config['EMAIL_BREAKER_RESET_TIMEOUT']),
+        max_concurrent=app.config['EMAIL_MAX_CONCURRENT'],
+        on_unavailable=app.config['EMAIL_ON_UNAVAILABLE'],
+        queue_size=app.config['EMAIL_QUEUE_SIZE'],
+        max_attempts=app.config['EMAIL_MAX_ATTEMPTS'],
+        retry_interval=min(5.0, app.config['EMAIL_BREAKER_RESET_TIMEOUT'])
+    )
+
+    metrics = app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.register('email', app.extensions['email'].metrics)
+
+def send_async_email(app, subject, recipients, text_body, html_body):
+    with app.app_context():
+        send_email(subject, recipients, text_body, html_body)
+
+def send_email(subject, recipients, text_body, html_body):
+    try:
+        current_app.extensions['email'].send(subject, recipients, text_body, html_body)
     except Exception as e:
         print(f"Error sending email: {str(e)}")
         raise e
 
-def send_password_reset_email(user):
-    token = user.get_reset_password_token()
+def send_password_reset_email(user, token):
     send_email('[Celestial] Reset Your Password',
                [user.email],
                render_template('email/reset_password.txt',
@@ -31,8 +304,7 @@ def send_password_reset_email(user):
                render_template('email/reset_password.html',
                                user=user, token=token))
 
-def send_verification_email(user):
-    token = user.get_email_verification_token()
+def send_verification_email(user, token):
     send_email('[Celestial] Verify Your Email',
                [user.email],
                render_template('email/verify_email.txt',
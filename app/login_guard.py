@@ -0,0 +1,200 @@
+from collections import OrderedDict
+from threading import Lock
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryWindowStore:
+    """Sliding-window failure counters kept in process memory
+
+    Each key holds three integers: the current bucket number and the counts
+    for the current and previous buckets. The sliding count is the current
+    count plus the previous count weighted by how much of it still overlaps
+    the window, which is accurate to within one bucket without storing
+    per-attempt timestamps.
+
+    Keys are kept in last-update order, so keys that have aged out of the
+    window sit at the front and each ``incr`` sweeps only those. Past
+    ``max_keys`` the least recently failing keys are evicted, bounding
+    memory under credential stuffing across many accounts.
+    """
+
+    def __init__(self, window, max_keys=100000):
+        self.window = window
+        self.max_keys = max_keys
+        self.evicted = 0
+        self._counters = OrderedDict()
+        self._lock = Lock()
+
+    def _roll(self, entry, bucket):
+        if entry[0] == bucket:
+            return entry
+        previous = entry[2] if entry[0] == bucket - 1 else 0
+        return [bucket, previous, 0]
+
+    def count(self, key, now):
+        bucket, offset = divmod(now, self.window)
+        with self._lock:
+            entry = self._counters.get(key)
+            if entry is None:
+                return 0.0
+            entry = self._roll(entry, int(bucket))
+        return entry[2] + entry[1] * (1 - offset / self.window)
+
+    def incr(self, key, now):
+        bucket = int(now // self.window)
+        with self._lock:
+            entry = self._roll(self._counters.get(key, [bucket, 0, 0]), bucket)
+            entry[2] += 1
+            self._counters[key] = entry
+            self._counters.move_to_end(key)
+            self._prune(bucket)
+
+    def reset(self, key):
+        with self._lock:
+            self._counters.pop(key, None)
+
+    def _prune(self, bucket):
+        # Stale keys are the oldest, so stop at the first one still counting
+        counters = self._counters
+        while counters:
+            oldest = next(iter(counters.values()))
+            if oldest[0] >= bucket - 1:
+                break
+            counters.popitem(last=False)
+        while len(counters) > self.max_keys:
+            counters.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self):
+        return len(self._counters)
+
+
+class RedisWindowStore:
+    """The same sliding-window counters in Redis, shared across workers"""
+
+    def __init__(self, uri, window, prefix='login_guard'):
+        import redis
+        self.client = redis.Redis.from_url(uri)
+        self.window = window
+        self.prefix = prefix
+        self.evicted = 0  # Redis expires keys itself
+
+    def _key(self, key, bucket):
+        return f'{self.prefix}:{key}:{bucket}'
+
+    def count(self, key, now):
+        bucket, offset = divmod(now, self.window)
+        bucket = int(bucket)
+        current, previous = self.client.mget(self._key(key, bucket), self._key(key, bucket - 1))
+        return int(current or 0) + int(previous or 0) * (1 - offset / self.window)
+
+    def incr(self, key, now):
+        redis_key = self._key(key, int(now // self.window))
+        pipe = self.client.pipeline()
+        pipe.incr(redis_key)
+        pipe.expire(redis_key, int(self.window * 2))
+        pipe.execute()
+
+    def reset(self, key):
+        bucket = int(time.time() // self.window)
+        self.client.delete(self._key(key, bucket), self._key(key, bucket - 1))
+
+    def __len__(self):
+        return 0
+
+
+def store_from_uri(uri, window, max_keys=100000):
+    if uri.startswith('redis://') or uri.startswith('rediss://'):
+        return RedisWindowStore(uri, window)
+    if uri != 'memory://':
+        raise ValueError(f"Unsupported LOGIN_GUARD_STORAGE_URI: {uri}")
+    return MemoryWindowStore(window, max_keys=max_keys)
+
+
+class LoginGuard:
+    """Reject login attempts for hot accounts and IPs before any hashing
+
+    Failed logins are counted per account and per client IP over a sliding
+    window. Once either count reaches its limit, ``check`` returns a
+    Retry-After value and the view answers 429 without touching the
+    database or running the password hash.
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        self.shed_account = 0
+        self.shed_ip = 0
+        self.failures = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('LOGIN_GUARD_ENABLED', True)
+        app.config.setdefault('LOGIN_GUARD_WINDOW', 900)
+        app.config.setdefault('LOGIN_GUARD_MAX_ACCOUNT_FAILURES', 5)
+        app.config.setdefault('LOGIN_GUARD_MAX_IP_FAILURES', 20)
+        app.config.setdefault('LOGIN_GUARD_STORAGE_URI', 'memory://')
+        app.config.setdefault('LOGIN_GUARD_MAX_KEYS', 100000)
+
+        self.enabled = app.config['LOGIN_GUARD_ENABLED']
+        self.window = app.config['LOGIN_GUARD_WINDOW']
+        self.max_account_failures = app.config['LOGIN_GUARD_MAX_ACCOUNT_FAILURES']
+        self.max_ip_failures = app.config['LOGIN_GUARD_MAX_IP_FAILURES']
+        self.store = store_from_uri(
+            app.config['LOGIN_GUARD_STORAGE_URI'], self.window, max_keys=app.config['LOGIN_GUARD_MAX_KEYS']
+        )
+        self.shed_account = self.shed_ip = self.failures = 0
+        app.extensions['login_guard'] = self
+
+        metrics = app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.register('login_guard', self.metrics)
+
+    @staticmethod
+    def _account_key(account):
+        return 'acct:' + str(account).strip().lower()
+
+    @staticmethod
+    def _ip_key(ip):
+        # remote_addr is None outside a real socket (e.g. some WSGI test setups)
+        return 'ip:' + (ip or 'unknown')
+
+    def check(self, account, ip):
+        """Return seconds to wait if the attempt must be rejected, else None"""
+        if not self.enabled:
+            return None
+        now = time.time()
+        if self.store.count(self._account_key(account), now) >= self.max_account_failures:
+            self.shed_account += 1
+        elif self.store.count(self._ip_key(ip), now) >= self.max_ip_failures:
+            self.shed_ip += 1
+        else:
+            return None
+        logger.warning(f"Login attempt shed for {account} from {ip}")
+        # Failures age out gradually, so a full window is the honest upper bound
+        return self.window
+
+    def record_failure(self, account, ip):
+        if not self.enabled:
+            return
+        now = time.time()
+        self.failures += 1
+        self.store.incr(self._account_key(account), now)
+        self.store.incr(self._ip_key(ip), now)
+
+    def record_success(self, account):
+        if self.enabled:
+            self.store.reset(self._account_key(account))
+
+    def metrics(self):
+        return {
+            'shed_total': self.shed_account + self.shed_ip,
+            'shed_account': self.shed_account,
+            'shed_ip': self.shed_ip,
+            'failures_total': self.failures,
+            'tracked_keys': len(self.store),
+            'evicted_keys_total': self.store.evicted
+        }
@@ -0,0 +1,39 @@
+from flask import Response
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """Prometheus text exposition of in-process counters at /metrics
+
+    Subsystems register a collector, a callable returning a flat
+    {name: number} dict, under a prefix; the endpoint renders every
+    collector as ``celestial_<prefix>_<name> <value>`` on each scrape.
+    """
+
+    def __init__(self, app=None):
+        self._collectors = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.add_url_rule('/metrics', 'metrics', self.render)
+        app.extensions['metrics'] = self
+
+    def register(self, prefix, collector):
+        self._collectors[prefix] = collector
+
+    def collect(self):
+        samples = {}
+        for prefix, collector in self._collectors.items():
+            try:
+                for name, value in collector().items():
+                    samples[f'celestial_{prefix}_{name}'] = value
+            except Exception as e:
+                logger.error(f"Metrics collector {prefix} failed: {str(e)}")
+        return samples
+
+    def render(self):
+        lines = [f'{name} {float(value):g}' for name, value in sorted(self.collect().items())]
+        return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
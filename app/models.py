@@ -1,14 +1,48 @@
-from . import db, login_manager
+from . import db, login_manager, revocation_filter
+from sqlalchemy import select
+from sqlalchemy.orm import deferred
+from flask import current_app, session, g
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
-import jwt
-import os
-from time import time
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Revoked login sessions are rejected from memory, before any query
+    session_id = session.get('sid')
+    if revocation_filter.is_revoked(session_id=session_id):
+        return None
+    # A narrow row and a plain object; views needing the profile load User themselves
+    query = select(*AUTH_USER_COLUMNS).where(User.id == int(user_id))
+    if session_id is not None:
+        # Same round trip: the session row still decides once the filter has pruned it
+        query = query.join(UserSession, UserSession.user_id == User.id).where(
+            UserSession.id == session_id,
+            UserSession.is_active.is_(True),
+            UserSession.expires_at > datetime.utcnow()
+        )
+    row = db.session.execute(query).first()
+    return AuthUser(row) if row is not None else None
+
+@login_manager.request_loader
+def load_user_from_request(request):
+    """Authenticate API clients by the session token returned from login"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token or revocation_filter.is_revoked(token=token):
+        return None
+    row = db.session.execute(
+        select(*AUTH_USER_COLUMNS, UserSession.id.label('session_id'))
+        .join(UserSession, UserSession.user_id == User.id)
+        .where(
+            UserSession.session_token == token,
+            UserSession.is_active.is_(True),
+            UserSession.expires_at > datetime.utcnow()
+        )
+    ).first()
+    if row is None:
+        return None
+    g.auth_session_id = row.session_id
+    return AuthUser(row)
 
 class Role(db.Model):
     __tablename__ = 'roles'
@@ -33,17 +67,19 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(256))  # Increased from 128 to 256 to accommodate longer hash
     first_name = db.Column(db.String(64))
     last_name = db.Column(db.String(64))
-    phone_number = db.Column(db.String(20))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    is_active = db.Column(db.Boolean, default=False)  # Changed to False for email verification
+    phone_number = deferred(db.Column(db.String(20)), group='profile')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    is_active = db.Column(db.Boolean, default=False, index=True)  # Changed to False for email verification
     is_admin = db.Column(db.Boolean, default=False)
     email_verified = db.Column(db.Boolean, default=False)
-    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'))
+    role_id = db.Column(db.Integer, db.ForeignKey('roles.id'), index=True)
     
-    # Profile fields
-    bio = db.Column(db.Text)
-    location = db.Column(db.String(64))
-    avatar_url = db.Column(db.String(256))
+    # Profile fields (and phone_number above) are loaded on first access
+    # unless a query undefers the 'profile' group
+    bio = deferred(db.Column(db.Text), group='profile')
+    location = deferred(db.Column(db.String(64)), group='profile')
+    avatar_url = deferred(db.Column(db.String(256)), group='profile')
+    profile_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Add relationship to user sessions
     sessions = db.relationship('UserSession', backref='user', lazy='dynamic')
@@ -54,45 +90,57 @@ class User(UserMixin, db.Model):
 
     @password.setter
     def password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password, method=current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        )
 
     def verify_password(self, password):
         return check_password_hash(self.password_hash, password)
 
-    def get_reset_password_token(self, expires_in=600):
-        return jwt.encode(
-            {'reset_password': self.id, 'exp': time() + expires_in},
-            os.getenv('JWT_SECRET'),
-            algorithm='HS256'
-        )
+    def __repr__(self):
+        return f'<User {self.username}>'
 
-    @staticmethod
-    def verify_reset_password_token(token):
-        try:
-            id = jwt.decode(token, os.getenv('JWT_SECRET'),
-                          algorithms=['HS256'])['reset_password']
-        except:
-            return None
-        return User.query.get(id)
-
-    def get_email_verification_token(self, expires_in=172800):  # 48 hours
-        return jwt.encode(
-            {'email_verify': self.id, 'exp': time() + expires_in},
-            os.getenv('JWT_SECRET'),
-            algorithm='HS256'
-        )
+# What authentication and the login response need from a users row
+AUTH_USER_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.first_name,
+    User.last_name,
+    User.password_hash,
+    User.is_active,
+    User.is_admin,
+    User.role_id,
+    User.profile_version,
+)
+AUTH_USER_FIELDS = tuple(column.key for column in AUTH_USER_COLUMNS)
+
+class AuthUser(UserMixin):
+    """Read-only slice of a users row used as current_user
+
+    Built from AUTH_USER_COLUMNS by the user loaders and login, so ordinary
+    requests skip the profile columns and ORM identity bookkeeping. It is
+    not attached to the session: views that read profile fields or change
+    the user load the User entity with ``load()``.
+    """
+
+    # A column value here; shadows UserMixin's always-True property
+    is_active = None
+
+    def __init__(self, row):
+        # row starts with AUTH_USER_COLUMNS in order; positional access is
+        # several times cheaper than looking each field up by name
+        self.__dict__.update(zip(AUTH_USER_FIELDS, row))
 
-    @staticmethod
-    def verify_email_token(token):
-        try:
-            id = jwt.decode(token, os.getenv('JWT_SECRET'),
-                          algorithms=['HS256'])['email_verify']
-        except:
-            return None
-        return User.query.get(id)
+    def verify_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+    def load(self, *options):
+        """The full User entity for this user"""
+        return db.session.get(User, self.id, options=list(options))
 
     def __repr__(self):
-        return f'<User {self.username}>'
+        return f'<AuthUser {self.username}>'
 
 class UserSession(db.Model):
     __tablename__ = 'user_sessions'
@@ -103,6 +151,9 @@ class UserSession(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
+    revoked_at = db.Column(db.DateTime, index=True)  # read incrementally by app.revocation
+    ip_address = db.Column(db.String(45))
+    user_agent = db.Column(db.String(256))
     
     def __repr__(self):
         return f'<UserSession {self.user_id}>'
@@ -113,13 +164,40 @@ class PasswordReset(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    token = db.Column(db.String(100), unique=True, nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the emailed token
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     expires_at = db.Column(db.DateTime, nullable=False)
     used = db.Column(db.Boolean, default=False)
     
     user = db.relationship('User', backref=db.backref('password_resets', lazy='dynamic'))
 
+class EmailVerification(db.Model):
+    """Pending email address verifications"""
+    __tablename__ = 'email_verifications'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)  # SHA-256 of the emailed token
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    used = db.Column(db.Boolean, default=False)
+
+class AuthEvent(db.Model):
+    """Audit trail of authentication events, written in batches by app.audit"""
+    __tablename__ = 'auth_events'
+    __table_args__ = (
+        db.Index('ix_auth_events_user_id_id', 'user_id', 'id'),
+    )
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    event_type = db.Column(db.String(32), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    email = db.Column(db.String(120))  # as submitted, for events without a known user
+    ip_address = db.Column(db.String(45))
+    user_agent = db.Column(db.String(256))
+    details = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+
 # Create tables
 def init_db():
     """Initialize the database tables"""
@@ -127,8 +205,8 @@ def init_db():
     
     # Create default roles if they don't exist
     if Role.query.count() == 0:
-        roles = ['user', 'admin', 'moderator']
-        for role_name in roles:
-            role = Role(name=role_name)
+        from .permissions import DEFAULT_ROLES
+        for role_name, (default, permissions) in DEFAULT_ROLES.items():
+            role = Role(name=role_name, default=default, permissions=permissions)
             db.session.add(role)
         db.session.commit()
@@ -0,0 +1,110 @@
+from collections import namedtuple
+from functools import wraps
+from types import MappingProxyType
+from flask import current_app, jsonify
+from flask_login import current_user
+from sqlalchemy import event, select
+import time
+import logging
+
+from . import db
+from .models import Role
+
+logger = logging.getLogger(__name__)
+
+
+class Permission:
+    """Bits of Role.permissions"""
+    BASIC = 0x01
+    WRITE = 0x02
+    MODERATE = 0x04
+    VIEW_USERS = 0x08
+    MANAGE_USERS = 0x10
+    ADMIN = 0x80
+
+
+# Role name -> (is default, permission bits); see init_db.py
+DEFAULT_ROLES = {
+    'User': (True, Permission.BASIC),
+    'Moderator': (False, Permission.BASIC | Permission.WRITE | Permission.MODERATE | Permission.VIEW_USERS),
+    'Admin': (False, 0xff),
+}
+
+RoleSnapshot = namedtuple('RoleSnapshot', ['id', 'name', 'permissions', 'default'])
+
+
+class RoleCache:
+    """Immutable in-process snapshot of the (tiny) roles table
+
+    The whole table is loaded in one query and swapped in atomically. Role
+    writes in this process invalidate it immediately; ROLE_CACHE_TTL bounds
+    how long changes made by other processes take to show up.
+    """
+
+    def __init__(self, app=None):
+        self.ttl = 60
+        self._roles = None
+        self._loaded_at = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ROLE_CACHE_TTL', 60)
+        self.ttl = app.config['ROLE_CACHE_TTL']
+        self.invalidate()
+        app.extensions['role_cache'] = self
+
+        for event_name in ('after_insert', 'after_update', 'after_delete'):
+            if not event.contains(Role, event_name, self._on_role_change):
+                event.listen(Role, event_name, self._on_role_change)
+
+    def _on_role_change(self, mapper, connection, target):
+        self.invalidate()
+
+    def invalidate(self):
+        self._roles = None
+
+    def snapshot(self):
+        roles = self._roles
+        if roles is None or time.monotonic() - self._loaded_at > self.ttl:
+            rows = db.session.execute(
+                select(Role.id, Role.name, Role.permissions, Role.default)
+            ).all()
+            roles = MappingProxyType({
+                row.id: RoleSnapshot(row.id, row.name, row.permissions or 0, bool(row.default))
+                for row in rows
+            })
+            self._roles = roles
+            self._loaded_at = time.monotonic()
+            logger.debug(f"Loaded {len(roles)} roles into the role cache")
+        return roles
+
+    def get(self, role_id):
+        return self.snapshot().get(role_id)
+
+
+role_cache = RoleCache()
+
+
+def has_permission(user, permission):
+    """Check permission bits for user against the cached role snapshot"""
+    if not user.is_authenticated:
+        return False
+    if user.is_admin:
+        return True
+    role = role_cache.get(user.role_id)
+    return role is not None and role.permissions & permission == permission
+
+
+def require_permission(permission):
+    """Restrict a view to authenticated users whose role grants permission"""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not current_user.is_authenticated:
+                return current_app.login_manager.unauthorized()
+            if not has_permission(current_user, permission):
+                return jsonify({'error': 'Insufficient permissions'}), 403
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
@@ -0,0 +1,96 @@
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from collections import Counter
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised when a request issues more SQL statements than its budget allows"""
+
+
+class QueryBudget:
+    """Count SQL statements and DB time per request and enforce per-endpoint budgets
+
+    Budgets are read from ``QUERY_BUDGETS`` (endpoint -> max statements) with
+    ``QUERY_BUDGET_DEFAULT`` as the fallback. Over-budget requests and repeated
+    identical statements (the usual N+1 signature) are logged as warnings, or
+    raised as ``QueryBudgetExceeded`` when ``QUERY_BUDGET_RAISE`` is set.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_BUDGET_ENABLED', True)
+        app.config.setdefault('QUERY_BUDGETS', {})
+        app.config.setdefault('QUERY_BUDGET_DEFAULT', 10)
+        app.config.setdefault('QUERY_BUDGET_REPEAT_THRESHOLD', 3)
+        app.config.setdefault('QUERY_BUDGET_RAISE', app.testing)
+
+        if not app.config['QUERY_BUDGET_ENABLED']:
+            return
+
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions['query_budget'] = self
+
+    def instrument(self, engine):
+        """Attach the statement counters to a SQLAlchemy engine"""
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _start(self):
+        g.query_count = 0
+        g.query_time = 0.0
+        g.query_statements = Counter()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'query_count' in g:
+            conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not (has_request_context() and 'query_count' in g):
+            return
+        start_times = conn.info.get('query_start_time')
+        if start_times:
+            g.query_time += time.perf_counter() - start_times.pop()
+        g.query_count += 1
+        g.query_statements[statement] += 1
+
+    def _finish(self, response):
+        if 'query_count' not in g:
+            return response
+
+        config = current_app.config
+        endpoint = request.endpoint or request.path
+        count = g.query_count
+        elapsed_ms = g.query_time * 1000
+
+        response.headers['Server-Timing'] = f'db;dur={elapsed_ms:.2f};desc="{count} queries"'
+
+        problems = []
+        budget = config['QUERY_BUDGETS'].get(endpoint, config['QUERY_BUDGET_DEFAULT'])
+        if budget is not None and count > budget:
+            problems.append(f"{endpoint} issued {count} SQL statements (budget {budget})")
+
+        threshold = config['QUERY_BUDGET_REPEAT_THRESHOLD']
+        for statement, repeats in g.query_statements.items():
+            if repeats >= threshold:
+                problems.append(
+                    f"{endpoint} repeated a statement {repeats} times (possible N+1): "
+                    f"{' '.join(statement.split())[:200]}"
+                )
+
+        if problems:
+            message = '; '.join(problems)
+            if config['QUERY_BUDGET_RAISE']:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        else:
+            logger.debug(f"{endpoint}: {count} SQL statements in {elapsed_ms:.2f} ms")
+
+        return response
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from threading import Lock, Thread, Event
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationFilter:
+    """In-process set of revoked, not yet expired login sessions
+
+    Session cookies and bearer tokens are checked against it on every
+    request without touching the database. Revocations made by this process
+    are added immediately; a daemon thread picks up revocations from other
+    processes every REVOCATION_REFRESH_INTERVAL seconds by reading only rows
+    whose revoked_at is newer than the last one seen (less an overlap that
+    absorbs clock skew between app servers). Entries are dropped
+    once their session would have expired anyway, so the set stays small;
+    the session row itself still rejects revoked and expired sessions.
+    """
+
+    overlap = timedelta(seconds=30)
+
+    def __init__(self, app=None):
+        self.app = None
+        self._ids = {}
+        self._tokens = {}
+        self._lock = Lock()
+        self._watermark = None
+        self._thread = None
+        self._stop = Event()
+        self.rejected = 0
+        self.refreshes = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('REVOCATION_REFRESH_INTERVAL', 5)
+        self.app = app
+        self.interval = app.config['REVOCATION_REFRESH_INTERVAL']
+        with self._lock:
+            self._ids.clear()
+            self._tokens.clear()
+            self._watermark = None
+        self.rejected = self.refreshes = 0
+        app.extensions['revocation_filter'] = self
+
+        metrics = app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.register('revocation', self.metrics)
+
+    def start(self):
+        """Load current revocations and keep refreshing them in the background"""
+        try:
+            self.refresh()
+        except Exception as e:
+            # e.g. revoked_at not migrated yet; the refresher retries
+            logger.error(f"Initial revocation load failed: {str(e)}")
+        if self.interval and self._thread is None:
+            self._thread = Thread(target=self._run, name='revocation-refresh', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Revocation refresh failed: {str(e)}")
+
+    def add(self, rows):
+        """Record revoked sessions given (id, session_token, expires_at) rows"""
+        with self._lock:
+            for session_id, token, expires_at in rows:
+                self._ids[session_id] = expires_at
+                if token:
+                    self._tokens[token] = expires_at
+
+    def is_revoked(self, session_id=None, token=None):
+        revoked = (session_id is not None and session_id in self._ids) or \
+            (token is not None and token in self._tokens)
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def refresh(self):
+        """Pull revocations newer than the watermark and prune expired entries"""
+        from . import db
+        from .models import UserSession
+
+        now = datetime.utcnow()
+        query = select(UserSession.id, UserSession.session_token, UserSession.expires_at,
+                       UserSession.revoked_at).where(UserSession.expires_at > now)
+        if self._watermark is not None:
+            query = query.where(UserSession.revoked_at >= self._watermark - self.overlap)
+        else:
+            query = query.where(UserSession.revoked_at.isnot(None))
+
+        with self.app.app_context():
+            with db.engine.connect() as connection:
+                rows = connection.execute(query).all()
+
+        self.add((row.id, row.session_token, row.expires_at) for row in rows)
+        with self._lock:
+            if rows:
+                latest = max(row.revoked_at for row in rows)
+                self._watermark = latest if self._watermark is None else max(self._watermark, latest)
+            elif self._watermark is None:
+                self._watermark = now
+            for entries in (self._ids, self._tokens):
+                for key in [k for k, expires_at in entries.items() if expires_at <= now]:
+                    del entries[key]
+        self.refreshes += 1
+        return len(rows)
+
+    def metrics(self):
+        return {
+            'revoked_sessions': len(self._ids),
+            'rejected_total': self.rejected,
+            'refreshes_total': self.refreshes,
+        }
@@ -0,0 +1,199 @@
+from flask import request, g
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# Values of these fields identify a person; they are replaced by a keyed
+# hash so one user stays one (anonymous) user across a capture
+IDENTITY_FIELDS = ('email', 'username')
+# Short enumerations and flags that are safe to keep and needed to replay
+PLAIN_FIELDS = ('field', 'format', 'gzip', 'is_active', 'others', 'role', 'event_type')
+# Page sizes; row ids (id, ids, *_id) are kept as well
+PAGINATION_FIELDS = ('limit',)
+
+
+def is_secret_field(name):
+    name = name.lower()
+    return 'password' in name or 'token' in name or 'secret' in name
+
+
+def is_kept_field(name):
+    """Fields whose values are kept verbatim: enumerations, ids and page sizes"""
+    if name is None:
+        return False
+    return name in PLAIN_FIELDS or name in PAGINATION_FIELDS or name in ('id', 'ids') or name.endswith('_id')
+
+
+class Sanitizer:
+    """Replace everything personal in a request with typed placeholders
+
+    Passwords become ``<password>``, tokens ``<secret:N>``, identity fields
+    ``<email:HASH>`` / ``<username:HASH>`` (HMAC with the capture key), other
+    strings ``<str:N>``, numbers ``<num:N>`` (N digits) and booleans
+    ``<bool>``. Only PLAIN_FIELDS, ids and page sizes keep their values, so
+    a phone number or a postcode never reaches the file, whatever its type.
+    None stays None. The replayer turns placeholders back into synthetic
+    values of the same shape.
+    """
+
+    def __init__(self, key):
+        self.key = key.encode() if isinstance(key, str) else key
+
+    def pseudonym(self, kind, value):
+        digest = hmac.new(self.key, str(value).strip().lower().encode(), hashlib.sha256).hexdigest()
+        return f'<{kind}:{digest[:16]}>'
+
+    def value(self, name, value):
+        if isinstance(value, dict):
+            return {k: self.value(k, v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.value(name, v) for v in value]
+        if name is not None and is_secret_field(name):
+            return '<password>' if 'password' in name.lower() else f'<secret:{len(str(value))}>'
+        if value is None or is_kept_field(name):
+            return value
+        if isinstance(value, bool):
+            return '<bool>'
+        if isinstance(value, (int, float)):
+            return f'<num:{sum(c.isdigit() for c in str(value)) or 1}>'
+        if not isinstance(value, str):
+            return f'<str:{len(str(value))}>'
+        if name in IDENTITY_FIELDS:
+            return self.pseudonym(name, value)
+        return f'<str:{len(value)}>'
+
+    def mapping(self, items):
+        return {name: self.value(name, value) for name, value in items}
+
+
+class TrafficCapture:
+    """Record sanitized request shapes and timings to rotating NDJSON files
+
+    Opt-in (TRAFFIC_CAPTURE_ENABLED). One line per matched request: start
+    time, method, URL rule with sanitized view args, query and JSON body
+    (see Sanitizer), who made it (pseudonymized) and what came back, with
+    the server-side duration. Lines go through a queue to a background
+    RotatingFileHandler, so requests never wait on the disk.
+    ``python -m traffic_replay`` replays the files.
+    """
+
+    def __init__(self, app=None):
+        self._listener = None
+        self._handler = None
+        self._registered_exit = False
+        self.captured = 0
+        self.sampled_out = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TRAFFIC_CAPTURE_ENABLED', False)
+        app.config.setdefault('TRAFFIC_CAPTURE_PATH', os.path.join(app.instance_path, 'traffic', 'capture.ndjson'))
+        app.config.setdefault('TRAFFIC_CAPTURE_MAX_BYTES', 50 * 1024 * 1024)
+        app.config.setdefault('TRAFFIC_CAPTURE_BACKUPS', 10)
+        app.config.setdefault('TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0)
+        app.config.setdefault('TRAFFIC_CAPTURE_KEY', None)
+
+        self.stop()
+        self.captured = self.sampled_out = 0
+        app.extensions['traffic_capture'] = self
+        if not app.config['TRAFFIC_CAPTURE_ENABLED']:
+            return
+
+        self.sample_rate = app.config['TRAFFIC_CAPTURE_SAMPLE_RATE']
+        self.sanitizer = Sanitizer(app.config['TRAFFIC_CAPTURE_KEY'] or app.config['SECRET_KEY'])
+        path = app.config['TRAFFIC_CAPTURE_PATH']
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._handler = RotatingFileHandler(
+            path, maxBytes=app.config['TRAFFIC_CAPTURE_MAX_BYTES'],
+            backupCount=app.config['TRAFFIC_CAPTURE_BACKUPS'], encoding='utf-8'
+        )
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+        queue = SimpleQueue()
+        self._listener = QueueListener(queue, self._handler)
+        self._listener.start()
+        self._writer = logging.getLogger(f'{__name__}.writer')
+        self._writer.propagate = False
+        self._writer.setLevel(logging.INFO)
+        self._writer.handlers = [QueueHandler(queue)]
+        if not self._registered_exit:
+            atexit.register(self.stop)
+            self._registered_exit = True
+
+        # First before_request hook, so shed and rejected requests are timed too
+        app.before_request_funcs.setdefault(None, []).insert(0, self._before_request)
+        app.after_request(self._after_request)
+
+        metrics = app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.register('traffic_capture', self.metrics)
+
+    def stop(self):
+        """Write out queued lines and close the current file"""
+        if self._listener is not None:
+            self._listener.stop()
+            self._handler.close()
+            self._listener = self._handler = None
+
+    def _before_request(self):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            g.capture_started = (time.time(), time.perf_counter())
+        else:
+            self.sampled_out += 1
+
+    def _after_request(self, response):
+        started = g.pop('capture_started', None)
+        if started is None or request.url_rule is None:
+            return response
+        try:
+            self._writer.info(json.dumps(self.record(started, response), separators=(',', ':')))
+            self.captured += 1
+        except Exception as e:
+            logger.error(f"Traffic capture failed for {request.endpoint}: {str(e)}")
+        return response
+
+    def record(self, started, response):
+        sanitize = self.sanitizer
+        record = {
+            'ts': round(started[0], 6),
+            'method': request.method,
+            'endpoint': request.endpoint,
+            'rule': request.url_rule.rule,
+            'args': sanitize.mapping((request.view_args or {}).items()),
+            'query': sanitize.mapping(request.args.items(multi=True)),
+            'content_type': request.mimetype or None,
+            'body': None,
+            'body_bytes': request.content_length or 0,
+            'auth': None,
+            'user': None,
+            'role': None,
+            'status': response.status_code,
+            'response_bytes': response.calculate_content_length(),
+            'duration_ms': round((time.perf_counter() - started[1]) * 1000, 3),
+        }
+        if request.is_json:
+            record['body'] = sanitize.value(None, request.get_json(silent=True))
+        # Only a user the request already loaded; capture must not add queries
+        user = g.get('_login_user')
+        if user is not None and user.is_authenticated:
+            from .permissions import role_cache
+            role = role_cache.get(user.role_id)
+            record['auth'] = 'bearer' if request.headers.get('Authorization') else 'session'
+            record['user'] = sanitize.pseudonym('email', user.email)
+            record['role'] = role.name if role is not None else None
+        return record
+
+    def metrics(self):
+        return {
+            'captured_total': self.captured,
+            'sampled_out_total': self.sampled_out,
+        }
@@ -0,0 +1,67 @@
+"""Micro-benchmark of JSON serialization cost per auth endpoint payload.
+
+Compares the stdlib json settings Flask used by default (sorted keys,
+compact separators) against the orjson path used by FastJSONProvider.
+Run from the repository root:
+
+    python benchmarks/serialization_benchmark.py
+"""
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.json_provider import orjson  # noqa: E402
+from app.auth.serializers import user_summary, user_profile  # noqa: E402
+
+NUMBER = 20000
+
+
+def make_user(i=1):
+    return SimpleNamespace(
+        id=i, username=f'user{i}', email=f'user{i}@example.com',
+        first_name='Ada', last_name='Lovelace', phone_number='+15555550100',
+        bio='Astronomer. ' * 20, location='London', avatar_url=None,
+        created_at=datetime(2024, 3, 21, 12, 0, 0)
+    )
+
+
+def stdlib_dumps(payload):
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def bench(label, func):
+    seconds = timeit.timeit(func, number=NUMBER)
+    return label, seconds / NUMBER * 1e6
+
+
+def main():
+    user = make_user()
+    page = [dict(user_summary(make_user(i)), is_active=True, role='User',
+                 created_at=make_user(i).created_at.isoformat()) for i in range(100)]
+    payloads = {
+        'register': {'message': 'User registered successfully.', 'user': user_summary(user)},
+        'login': {'message': 'Logged in successfully', 'token': 'x' * 43, 'user': user_summary(user)},
+        'profile': {'user': user_profile(user, 'User')},
+        'users (100 rows)': {'users': page, 'next_cursor': 'MTAw'},
+    }
+
+    results = []
+    for endpoint, payload in payloads.items():
+        results.append((endpoint,) + bench('stdlib json', lambda: stdlib_dumps(payload)))
+        if orjson is not None:
+            results.append((endpoint,) + bench('orjson', lambda: orjson.dumps(payload)))
+
+    print(f"{'endpoint':<18} {'serializer':<24} {'us/op':>8}")
+    for endpoint, label, micros in results:
+        print(f"{endpoint:<18} {label:<24} {micros:>8.2f}")
+    if orjson is None:
+        print("\norjson is not installed; only the stdlib path was measured")
+
+
+if __name__ == '__main__':
+    main()
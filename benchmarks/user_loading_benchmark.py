@@ -0,0 +1,132 @@
+"""Benchmark of the per-request user load: full User entity vs AuthUser.
+
+Fills an in-memory SQLite database with users whose profile fields look
+like real ones (a few hundred bytes of bio, avatar URL, location), then
+times the two ways of loading the user behind a request:
+
+- entity:  the previous loader, a User with its role joined and every
+           column loaded (deferred profile group undone)
+- auth:    the current loader, AUTH_USER_COLUMNS into an AuthUser
+
+Row bytes are the summed size of the values in the fetched row, i.e. what
+the database has to send; us/object is the per-user cost of fetching 500
+users at once, where building objects dominates. Run from the repository
+root:
+
+    python benchmarks/user_loading_benchmark.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.orm import joinedload, undefer_group  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import User, Role, AuthUser, AUTH_USER_COLUMNS  # noqa: E402
+
+USERS = 2000
+NUMBER = 5000
+
+CONFIG = {
+    'TESTING': True,
+    'SECRET_KEY': 'benchmark',
+    'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+    'SQLALCHEMY_ECHO': False,
+    'EMAIL_TRANSPORT': 'memory',
+    'RATELIMIT_ENABLED': False,
+    'RATELIMIT_STORAGE_URI': 'memory://',
+    'REVOCATION_REFRESH_INTERVAL': 0,
+    'AUDIT_ENABLED': False,
+}
+
+
+def populate():
+    role_id = Role.query.filter_by(name='User').first().id
+    db.session.execute(User.__table__.insert(), [{
+        'username': f'user{i}',
+        'email': f'user{i}@example.com',
+        'password_hash': 'scrypt:32768:8:1$' + 'x' * 16 + '$' + 'f' * 128,
+        'first_name': 'Ada',
+        'last_name': 'Lovelace',
+        'phone_number': '+15555550100',
+        'created_at': datetime(2024, 3, 21, 12, 0, 0),
+        'is_active': True,
+        'role_id': role_id,
+        'bio': 'Amateur astronomer mapping variable stars from a backyard observatory. ' * 6,
+        'location': 'London, United Kingdom',
+        'avatar_url': f'/avatars/ab/{"0" * 64}-256.webp',
+    } for i in range(1, USERS + 1)])
+    db.session.commit()
+
+
+def row_bytes(row):
+    return sum(len(str(value).encode()) if not isinstance(value, (int, bool)) else 8
+               for value in row if value is not None)
+
+
+def load_entity(user_id):
+    user = db.session.get(User, user_id, options=[joinedload(User.role), undefer_group('profile')])
+    db.session.expunge_all()  # every request starts with an empty identity map
+    return user
+
+
+def load_auth(user_id):
+    row = db.session.execute(select(*AUTH_USER_COLUMNS).where(User.id == user_id)).first()
+    return AuthUser(row)
+
+
+def main():
+    app = create_app(CONFIG)
+    with app.app_context():
+        populate()
+        ids = iter(range(NUMBER * 4))
+
+        def next_id():
+            return next(ids) % USERS + 1
+
+        entity_columns = select(*User.__table__.columns, *Role.__table__.columns) \
+            .outerjoin(Role, User.role_id == Role.id).where(User.id == 1)
+        auth_columns = select(*AUTH_USER_COLUMNS).where(User.id == 1)
+        sizes = {
+            'entity': row_bytes(db.session.execute(entity_columns).one()),
+            'auth': row_bytes(db.session.execute(auth_columns).one()),
+        }
+
+        load_times = {
+            'entity': timeit.timeit(lambda: load_entity(next_id()), number=NUMBER) / NUMBER * 1e6,
+            'auth': timeit.timeit(lambda: load_auth(next_id()), number=NUMBER) / NUMBER * 1e6,
+        }
+
+        # Bulk fetch of 500 users, where per-object construction cost dominates
+        entity_page = select(User).options(joinedload(User.role), undefer_group('profile')) \
+            .where(User.id <= 500)
+        auth_page = select(*AUTH_USER_COLUMNS).where(User.id <= 500)
+
+        def build_entities():
+            db.session.execute(entity_page).all()
+            db.session.expunge_all()
+
+        def build_auth():
+            return [AuthUser(row) for row in db.session.execute(auth_page)]
+
+        build_times = {
+            'entity': timeit.timeit(build_entities, number=50) / 50 / 500 * 1e6,
+            'auth': timeit.timeit(build_auth, number=50) / 50 / 500 * 1e6,
+        }
+        db.session.remove()
+        db.engine.dispose()
+
+    print(f"{'loader':<8} {'row bytes':>10} {'us/load':>10} {'us/object':>10}")
+    for name in ('entity', 'auth'):
+        print(f"{name:<8} {sizes[name]:>10} {load_times[name]:>10.1f} {build_times[name]:>10.2f}")
+    print(f"\nAuthUser rows are {1 - sizes['auth'] / sizes['entity']:.0%} smaller, loads "
+          f"{load_times['entity'] / load_times['auth']:.1f}x and bulk builds "
+          f"{build_times['entity'] / build_times['auth']:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
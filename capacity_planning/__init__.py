@@ -0,0 +1,14 @@
+"""Capacity planning from load-test results
+
+Ingests benchmark output (the Node capacity/heavy-load test JSON, or raw
+per-request CSV samples), summarizes each concurrency level with NumPy,
+fits the Universal Scalability Law to the measured throughput and writes
+plots plus the generated sections of system-capacity-scaling-report.md.
+
+    python -m capacity_planning src/scripts/system-capacity-results
+"""
+from .ingest import LoadLevel, load_results
+from .stats import summarize
+from .usl import USLModel, fit_usl
+
+__all__ = ['LoadLevel', 'load_results', 'summarize', 'USLModel', 'fit_usl']
@@ -0,0 +1,57 @@
+import argparse
+import logging
+import math
+import os
+
+from .ingest import load_results
+from .plots import plot_capacity
+from .report import render_sections, write_report
+from .stats import summarize
+from .usl import fit_usl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RESULTS = os.path.join(ROOT, 'src', 'scripts', 'system-capacity-results')
+DEFAULT_REPORT = os.path.join(ROOT, 'system-capacity-scaling-report.md')
+DEFAULT_PLOT = os.path.join(ROOT, 'performance-metrics-visualization.png')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m capacity_planning',
+        description='Fit a scalability model to load-test results and regenerate the capacity report'
+    )
+    parser.add_argument('results', nargs='*', default=[DEFAULT_RESULTS],
+                        help='result files or directories (*.json from the Node load tests, *.csv samples)')
+    parser.add_argument('--report', default=DEFAULT_REPORT, help='markdown report to update')
+    parser.add_argument('--plot', default=DEFAULT_PLOT, help='PNG to write')
+    parser.add_argument('--headroom', type=float, default=0.8,
+                        help='share of peak throughput at which to recommend scaling out')
+    parser.add_argument('--no-report', action='store_true', help='print the analysis only')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    levels = load_results(args.results)
+    stats = summarize(levels)
+    model = fit_usl(stats['concurrency'], stats['throughput'])
+    n_star, x_star = model.peak()
+
+    print(f"Levels: {len(levels)} ({stats['concurrency'].min():,.0f}-{stats['concurrency'].max():,.0f} concurrent users)")
+    print(f"USL fit: lambda={model.lam:,.2f} req/s sigma={model.sigma:.4g} kappa={model.kappa:.4g} R2={model.r2:.3f}")
+    if math.isfinite(n_star):
+        print(f"Saturation: {n_star:,.0f} concurrent users at {x_star:,.0f} req/s")
+    else:
+        print(f"Saturation: not reached (asymptote {x_star:,.0f} req/s)")
+    print(f"Scale-out threshold ({args.headroom:.0%} of peak): {model.threshold(args.headroom):,.0f} concurrent users")
+
+    if args.no_report:
+        return
+    plot_capacity(stats, model, args.plot, args.headroom)
+    report_dir = os.path.dirname(os.path.abspath(args.report))
+    sources = [os.path.relpath(os.path.abspath(p), report_dir) for p in args.results]
+    plot_link = os.path.relpath(os.path.abspath(args.plot), report_dir)
+    write_report(args.report, render_sections(stats, model, sources, plot_link, args.headroom))
+    print(f"Wrote {args.plot} and {args.report}")
+
+
+if __name__ == '__main__':
+    main()
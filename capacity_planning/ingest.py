@@ -0,0 +1,132 @@
+from collections import namedtuple
+import csv
+import glob
+import json
+import logging
+import os
+
+import numpy as np
+
+# One concurrency level of a load test. latencies_ms holds per-request
+# samples when the source has them; summary-only sources fill mean/min/max.
+logger = logging.getLogger(__name__)
+
+LoadLevel = namedtuple('LoadLevel', [
+    'concurrency', 'requests', 'failures', 'duration_ms',
+    'latencies_ms', 'mean_ms', 'min_ms', 'max_ms', 'source'
+])
+
+
+def _level(concurrency, requests, failures, duration_ms, latencies, source,
+           mean_ms=np.nan, min_ms=np.nan, max_ms=np.nan):
+    latencies = np.asarray(latencies, dtype=float) if latencies is not None and len(latencies) else None
+    if latencies is not None:
+        mean_ms, min_ms, max_ms = latencies.mean(), latencies.min(), latencies.max()
+    return LoadLevel(int(concurrency), int(requests), int(failures), float(duration_ms),
+                     latencies, mean_ms, min_ms, max_ms, source)
+
+
+def load_capacity_report(data, source):
+    """src/scripts/system-capacity-load-test.js output (summaries only)"""
+    return [
+        _level(r['concurrentUsers'], r['concurrentUsers'], 0, r['totalProcessingTime'], None, source,
+               r['averageProcessingTime'], r['minProcessingTime'], r['maxProcessingTime'])
+        for r in data['capacityResults']
+    ]
+
+
+def load_heavy_load_batch(data, source):
+    """src/scripts/heavy-load-test.js batch output: one level per file"""
+    latencies = []
+    for result in data['results']:
+        value = result.get('value') or {}
+        started = (value.get('user') or {}).get('timestamp')
+        finished = value.get('registrationTimestamp')
+        if result.get('status') == 'fulfilled' and started and finished:
+            latencies.append(finished - started)
+    return [_level(len(data['results']), data['successCount'] + data['failedCount'],
+                   data['failedCount'], data['processingTime'], latencies, source)]
+
+
+def load_samples_csv(path):
+    """Raw samples: concurrency,latency_ms[,ok][,started_ms] with a header row
+
+    Without started_ms the level's wall-clock duration is estimated from
+    Little's law (requests * mean latency / concurrency).
+    """
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        return []
+    concurrency = np.array([float(r['concurrency']) for r in rows])
+    latency = np.array([float(r['latency_ms']) for r in rows])
+    ok = np.array([r.get('ok', 'true').strip().lower() in ('1', 'true', 'yes') for r in rows])
+    started = np.array([float(r['started_ms']) for r in rows]) if 'started_ms' in rows[0] else None
+
+    levels = []
+    for n in np.unique(concurrency):
+        mask = concurrency == n
+        if started is not None:
+            duration = (started[mask] + latency[mask]).max() - started[mask].min()
+        else:
+            duration = mask.sum() * latency[mask].mean() / n
+        levels.append(_level(n, mask.sum(), (~ok[mask]).sum(), duration, latency[mask & ok], path))
+    return levels
+
+
+def load_file(path):
+    if path.endswith('.csv'):
+        return load_samples_csv(path)
+    with open(path) as f:
+        data = json.load(f)
+    if 'capacityResults' in data:
+        return load_capacity_report(data, path)
+    if 'results' in data and 'processingTime' in data:
+        return load_heavy_load_batch(data, path)
+    raise ValueError(f"Unrecognized benchmark result format: {path}")
+
+
+def merge_levels(levels):
+    """Pool runs at the same concurrency: requests and time add, samples concatenate"""
+    merged = {}
+    for level in levels:
+        merged.setdefault(level.concurrency, []).append(level)
+    result = []
+    for concurrency, group in sorted(merged.items()):
+        if len(group) == 1:
+            result.append(group[0])
+            continue
+        samples = [g.latencies_ms for g in group if g.latencies_ms is not None]
+        requests = np.array([g.requests for g in group], dtype=float)
+        means = np.array([g.mean_ms for g in group], dtype=float)
+        known = ~np.isnan(means)
+        mean_ms = (means[known] * requests[known]).sum() / requests[known].sum() if known.any() else np.nan
+        result.append(_level(
+            concurrency, requests.sum(), sum(g.failures for g in group), sum(g.duration_ms for g in group),
+            np.concatenate(samples) if samples else None, ', '.join(sorted({g.source for g in group})),
+            mean_ms,
+            min((g.min_ms for g in group if not np.isnan(g.min_ms)), default=np.nan),
+            max((g.max_ms for g in group if not np.isnan(g.max_ms)), default=np.nan)
+        ))
+    return result
+
+
+def load_results(paths):
+    """Load files and directories of results (*.json, *.csv) into sorted levels
+
+    Unrecognized files inside a directory are skipped; an unrecognized file
+    named explicitly is an error.
+    """
+    levels = []
+    for path in paths:
+        if not os.path.isdir(path):
+            levels.extend(load_file(path))
+            continue
+        for name in sorted(glob.glob(os.path.join(path, '*.json')) + glob.glob(os.path.join(path, '*.csv'))):
+            try:
+                levels.extend(load_file(name))
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping {name}: {str(e)}")
+    if not levels:
+        raise ValueError('No benchmark results found')
+    return merge_levels(levels)
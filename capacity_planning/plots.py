@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+
+
+def plot_capacity(stats, model, path, headroom=0.8):
+    """Throughput with the USL fit, and latency percentiles, side by side"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    n = stats['concurrency']
+    fig, (left, right) = plt.subplots(1, 2, figsize=(13, 5.5))
+
+    n_star, x_star = model.peak()
+    upper = n.max() * 1.25
+    if math.isfinite(n_star):
+        upper = max(upper, n_star * 1.25)
+    grid = np.linspace(1, upper, 400)
+    left.plot(n, stats['throughput'], 'o', color='tab:blue', label='measured')
+    left.plot(grid, model.throughput(grid), '-', color='tab:orange',
+              label=f'USL fit (σ={model.sigma:.3g}, κ={model.kappa:.3g})')
+    if math.isfinite(n_star) and n_star >= n.min():
+        left.axvline(n_star, color='tab:red', linestyle='--', label=f'saturation N*={n_star:,.0f}')
+    threshold = model.threshold(headroom)
+    if math.isfinite(threshold) and threshold >= n.min():
+        left.axvline(threshold, color='tab:green', linestyle=':', label=f'{headroom:.0%} of peak at N={threshold:,.0f}')
+    left.set_title('Throughput vs Concurrent Users')
+    left.set_xlabel('Concurrent Users')
+    left.set_ylabel('Throughput (requests/s)')
+    left.grid(True)
+    left.legend()
+
+    right.fill_between(n, stats['min_ms'], stats['max_ms'], color='tab:green', alpha=0.15, label='min-max')
+    right.plot(n, stats['mean_ms'], 'o-', color='tab:green', label='mean')
+    for key, color in (('p50_ms', 'tab:blue'), ('p95_ms', 'tab:orange'), ('p99_ms', 'tab:red')):
+        if not np.isnan(stats[key]).all():
+            right.plot(n, stats[key], '.--', color=color, label=key[:-3])
+    right.set_title('Request Latency vs Concurrent Users')
+    right.set_xlabel('Concurrent Users')
+    right.set_ylabel('Latency (ms)')
+    right.grid(True)
+    right.legend()
+
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
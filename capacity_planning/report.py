@@ -0,0 +1,132 @@
+from datetime import date
+import math
+import os
+
+import numpy as np
+
+BEGIN = '<!-- capacity-planning:begin -->'
+END = '<!-- capacity-planning:end -->'
+TITLE = '# Celestial Sphere X: System Capacity and Scaling Strategy Report'
+
+
+def _num(value, fmt='{:,.2f}', suffix=''):
+    if value is None or (isinstance(value, float) and not math.isfinite(value)) or np.isnan(value):
+        return '–'
+    return fmt.format(value) + suffix
+
+
+def _range(values, fmt='{:,.2f}', suffix=''):
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return '–'
+    return f'{_num(values.min(), fmt)}-{_num(values.max(), fmt)}{suffix}'
+
+
+def render_sections(stats, model, sources, plot_path=None, headroom=0.8):
+    """Markdown for the generated summary and metrics sections"""
+    n = stats['concurrency']
+    n_star, x_star = model.peak()
+    threshold = model.threshold(headroom)
+    best = int(np.nanargmax(stats['throughput']))
+
+    if n_star < n.min():
+        # The fit puts the peak before the first measurement: nothing measured scaled
+        saturation = f'at or below {n.min():,.0f} concurrent users (throughput is flat across the measured range)'
+        threshold = n.min()
+    elif math.isfinite(n_star):
+        saturation = f'{n_star:,.0f} concurrent users at {x_star:,.0f} req/s (USL peak)'
+    else:
+        saturation = f'not reached; throughput approaches {_num(x_star, "{:,.0f}")} req/s'
+
+    lines = [
+        BEGIN,
+        '## 🌐 Executive Summary',
+        '',
+        f'_Generated {date.today().isoformat()} by `python -m capacity_planning` from '
+        + ', '.join(f'`{s}`' for s in sources) + '. Edit outside the generated markers only._',
+        '',
+        '### Performance Capacity',
+        f'- **Measured Concurrency Range**: {n.min():,.0f} - {n.max():,.0f} concurrent users',
+        f'- **Peak Measured Throughput**: {stats["throughput"][best]:,.0f} req/s at {n[best]:,.0f} concurrent users',
+        f'- **Average Request Processing Time**: {_range(stats["mean_ms"], "{:,.0f}", "ms")}',
+        f'- **Modelled Saturation Point**: {saturation}',
+        f'- **Recommended Scaling Threshold**: {_num(threshold, "{:,.0f}")} concurrent users '
+        f'({headroom:.0%} of peak throughput)',
+        f'- **Requests Actually in Service** (Little\'s law, throughput x latency): '
+        f'{_range(stats["effective_concurrency"], "{:,.0f}")}',
+    ]
+
+    notes = []
+    effective = np.nanmax(stats['effective_concurrency']) if not np.isnan(stats['effective_concurrency']).all() else np.nan
+    if effective < 0.5 * n.max():
+        notes.append(
+            f'At most ~{effective:,.0f} requests were in service at once while nominal load rose to '
+            f'{n.max():,.0f} users: the rest were queued (by the load generator or the server), '
+            'so higher nominal counts add waiting time, not throughput.'
+        )
+    if model.r2 < 0.8:
+        notes.append(
+            f'The USL fit explains little of the variation (R² = {model.r2:.2f}); throughput barely '
+            'changes across the measured range, so treat the modelled figures as indicative.'
+        )
+    if notes:
+        lines += [''] + [f'> {note}' for note in notes]
+
+    lines += [
+        '',
+        '### Universal Scalability Law Fit',
+        '| Parameter | Value |',
+        '|-----------|-------|',
+        f'| λ (single-user throughput) | {model.lam:,.2f} req/s |',
+        f'| σ (contention) | {model.sigma:.4g} |',
+        f'| κ (coherency) | {model.kappa:.4g} |',
+        f'| R² | {model.r2:.3f} |',
+        '',
+        '## 📊 Detailed Performance Metrics',
+        '',
+        '### Performance Progression',
+        '| Concurrent Users | Requests | Throughput | Total Processing Time | Avg | p50 | p95 | p99 '
+        '| Min | Max | Error Rate | In Service |',
+        '|-----------------|----------|------------|----------------------|-----|-----|-----|-----'
+        '|-----|-----|------------|------------|',
+    ]
+    for i in range(len(n)):
+        lines.append('| ' + ' | '.join([
+            f'{n[i]:,.0f}',
+            f'{stats["requests"][i]:,.0f}',
+            _num(stats['throughput'][i], '{:,.0f}', ' req/s'),
+            _num(stats['duration_ms'][i], suffix='ms'),
+            _num(stats['mean_ms'][i], suffix='ms'),
+            _num(stats['p50_ms'][i], suffix='ms'),
+            _num(stats['p95_ms'][i], suffix='ms'),
+            _num(stats['p99_ms'][i], suffix='ms'),
+            _num(stats['min_ms'][i], suffix='ms'),
+            _num(stats['max_ms'][i], suffix='ms'),
+            _num(stats['error_rate'][i] * 100, '{:.1f}', '%'),
+            _num(stats['effective_concurrency'][i], '{:,.0f}'),
+        ]) + ' |')
+
+    if plot_path:
+        lines += ['', f'![Throughput and latency vs concurrent users]({plot_path})']
+    lines.append(END)
+    return '\n'.join(lines)
+
+
+def write_report(path, sections):
+    """Replace the generated block of the report, keeping the hand-written rest"""
+    existing = ''
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            existing = f.read()
+
+    if BEGIN in existing and END in existing:
+        head, rest = existing.split(BEGIN, 1)
+        tail = rest.split(END, 1)[1]
+        content = head + sections + tail
+    elif existing:
+        content = existing.rstrip('\n') + '\n\n' + sections + '\n'
+    else:
+        content = TITLE + '\n\n' + sections + '\n'
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
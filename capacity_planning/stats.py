@@ -0,0 +1,43 @@
+import numpy as np
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(levels):
+    """Column-wise statistics for every level as a dict of NumPy arrays
+
+    Percentiles are computed in one nanpercentile call over a NaN-padded
+    (levels x samples) matrix; levels without raw samples get NaN.
+    """
+    concurrency = np.array([l.concurrency for l in levels], dtype=float)
+    requests = np.array([l.requests for l in levels], dtype=float)
+    failures = np.array([l.failures for l in levels], dtype=float)
+    duration_s = np.array([l.duration_ms for l in levels], dtype=float) / 1000
+    mean_ms = np.array([l.mean_ms for l in levels], dtype=float)
+
+    width = max((len(l.latencies_ms) for l in levels if l.latencies_ms is not None), default=0)
+    samples = np.full((len(levels), max(width, 1)), np.nan)
+    for i, level in enumerate(levels):
+        if level.latencies_ms is not None:
+            samples[i, :len(level.latencies_ms)] = level.latencies_ms
+    has_samples = ~np.isnan(samples).all(axis=1)
+    percentiles = np.full((len(PERCENTILES), len(levels)), np.nan)
+    if has_samples.any():
+        percentiles[:, has_samples] = np.nanpercentile(samples[has_samples], PERCENTILES, axis=1)
+
+    throughput = (requests - failures) / duration_s
+    stats = {
+        'concurrency': concurrency,
+        'requests': requests,
+        'error_rate': np.divide(failures, requests, out=np.zeros_like(requests), where=requests > 0),
+        'duration_ms': duration_s * 1000,
+        'throughput': throughput,
+        'mean_ms': mean_ms,
+        'min_ms': np.array([l.min_ms for l in levels], dtype=float),
+        'max_ms': np.array([l.max_ms for l in levels], dtype=float),
+        # Little's law: requests actually in service = throughput * time in system
+        'effective_concurrency': throughput * mean_ms / 1000,
+    }
+    for p, row in zip(PERCENTILES, percentiles):
+        stats[f'p{p}_ms'] = row
+    return stats
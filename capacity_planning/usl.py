@@ -0,0 +1,79 @@
+from collections import namedtuple
+import math
+
+import numpy as np
+
+
+class USLModel(namedtuple('USLModel', ['lam', 'sigma', 'kappa', 'r2'])):
+    """Universal Scalability Law: X(N) = lam*N / (1 + sigma*(N-1) + kappa*N*(N-1))
+
+    lam is the single-client throughput, sigma the contention (serialized
+    fraction) and kappa the coherency (crosstalk) penalty.
+    """
+    __slots__ = ()
+
+    def throughput(self, n):
+        n = np.asarray(n, dtype=float)
+        return self.lam * n / (1 + self.sigma * (n - 1) + self.kappa * n * (n - 1))
+
+    def latency_ms(self, n):
+        """Mean time in system at concurrency n (Little's law), in milliseconds"""
+        n = np.asarray(n, dtype=float)
+        return n / self.throughput(n) * 1000
+
+    def peak(self):
+        """(N*, X(N*)): where throughput stops growing; N* is inf without coherency cost"""
+        if self.kappa <= 0:
+            ceiling = self.lam / self.sigma if self.sigma > 0 else math.inf
+            return math.inf, ceiling
+        n_star = max(1.0, math.sqrt((1 - self.sigma) / self.kappa))
+        return n_star, float(self.throughput(n_star))
+
+    def threshold(self, fraction=0.8):
+        """Smallest concurrency reaching fraction of the peak (or asymptotic) throughput"""
+        n_star, x_star = self.peak()
+        if not math.isfinite(x_star):
+            return math.inf
+        # X(N) is increasing up to N*, so the crossing is the first grid point above target
+        upper = n_star if math.isfinite(n_star) else 1e7
+        grid = np.geomspace(1, upper, 4096)
+        reached = np.nonzero(self.throughput(grid) >= fraction * x_star)[0]
+        return float(grid[reached[0]]) if len(reached) else upper
+
+
+def _fit_grid(n, x, sigmas, kappas):
+    # denominators for every (sigma, kappa) pair at once: shape (S, K, len(n))
+    denom = 1 + sigmas[:, None, None] * (n - 1) + kappas[None, :, None] * n * (n - 1)
+    g = n / denom
+    # With sigma and kappa fixed, the least-squares lam is closed form
+    lam = (g * x).sum(axis=2) / (g * g).sum(axis=2)
+    sse = ((lam[:, :, None] * g - x) ** 2).sum(axis=2)
+    i, k = np.unravel_index(np.argmin(sse), sse.shape)
+    return lam[i, k], sigmas[i], kappas[k], sse[i, k]
+
+
+def fit_usl(concurrency, throughput):
+    """Least-squares USL fit with 0 <= sigma <= 1 and kappa >= 0
+
+    Searches a coarse (sigma, kappa) grid and then a finer grid around the
+    best cell, solving lam in closed form for each pair. This keeps the
+    parameters physically meaningful, which an unconstrained linearized fit
+    does not when throughput is flat or noisy.
+    """
+    n = np.asarray(concurrency, dtype=float)
+    x = np.asarray(throughput, dtype=float)
+    if len(n) < 3:
+        raise ValueError('At least three concurrency levels are needed to fit the USL')
+
+    sigmas = np.linspace(0, 1, 201)
+    kappas = np.concatenate([[0.0], np.geomspace(1e-9, 1e-1, 200)])
+    lam, sigma, kappa, sse = _fit_grid(n, x, sigmas, kappas)
+
+    step = sigmas[1]
+    fine_sigmas = np.clip(np.linspace(sigma - step, sigma + step, 101), 0, 1)
+    fine_kappas = np.concatenate([[0.0], np.geomspace(max(kappa, 1e-9) / 3, max(kappa, 1e-9) * 3, 100)])
+    lam, sigma, kappa, sse = _fit_grid(n, x, fine_sigmas, fine_kappas)
+
+    total = ((x - x.mean()) ** 2).sum()
+    r2 = 1 - sse / total if total > 0 else 1.0
+    return USLModel(float(lam), float(sigma), float(kappa), float(r2))
@@ -27,6 +27,14 @@ export const adminService = {
       params: { page, pageSize, search, status } 
     }),
   
+  listAuthUsers: (cursor?: string, limit = 50, filters: Record<string, string> = {}) =>
+    api.get('/auth/users', {
+      params: { cursor, limit, ...filters }
+    }),
+
+  getAuthUsersByIds: (ids: number[]) =>
+    api.get('/auth/users', { params: { ids: ids.join(',') } }),
+  
   updateUserStatus: (userId: string, status: string, reason?: string) => 
     api.patch(`/admin/users/${userId}/status`, { status, reason }),
   
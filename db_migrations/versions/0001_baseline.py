@@ -0,0 +1,74 @@
+"""Baseline schema as created by the original db.create_all()
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.online_migrations import table_exists
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing deployments already have these tables; only create what's missing
+    if not table_exists('roles'):
+        op.create_table(
+            'roles',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(64), unique=True),
+            sa.Column('default', sa.Boolean(), index=True),
+            sa.Column('permissions', sa.Integer()),
+        )
+    if not table_exists('users'):
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(64), unique=True, nullable=False),
+            sa.Column('email', sa.String(120), unique=True, nullable=False),
+            sa.Column('password_hash', sa.String(256)),
+            sa.Column('first_name', sa.String(64)),
+            sa.Column('last_name', sa.String(64)),
+            sa.Column('phone_number', sa.String(20)),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('is_active', sa.Boolean()),
+            sa.Column('is_admin', sa.Boolean()),
+            sa.Column('email_verified', sa.Boolean()),
+            sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id')),
+            sa.Column('bio', sa.Text()),
+            sa.Column('location', sa.String(64)),
+            sa.Column('avatar_url', sa.String(256)),
+        )
+    if not table_exists('user_sessions'):
+        op.create_table(
+            'user_sessions',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('session_token', sa.String(64), unique=True),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('is_active', sa.Boolean()),
+        )
+    if not table_exists('password_resets'):
+        op.create_table(
+            'password_resets',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('token', sa.String(100), unique=True, nullable=False),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('used', sa.Boolean()),
+        )
+
+
+def downgrade():
+    for table in ('password_resets', 'user_sessions', 'users', 'roles'):
+        op.drop_table(table)
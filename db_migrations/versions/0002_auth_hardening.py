@@ -0,0 +1,85 @@
+"""Profile versions, listing indexes, hashed tokens and session client details
+
+Replaces update_db.py's table rebuild and the hand-run update_*.sql files.
+Every step is safe under live traffic: columns are added without a table
+rewrite, indexes are built concurrently, and nothing drops users.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:05:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.online_migrations import (
+    add_column, backfill_in_batches, column_exists, create_index_concurrently,
+    drop_index_concurrently, table_exists,
+)
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+USER_INDEXES = {
+    'ix_users_created_at': ['created_at'],
+    'ix_users_is_active': ['is_active'],
+    'ix_users_role_id': ['role_id'],
+}
+
+
+def upgrade():
+    # Constant default: metadata-only change on PostgreSQL 11+
+    add_column('users', sa.Column('profile_version', sa.Integer(), server_default='0', nullable=False))
+    add_column('user_sessions', sa.Column('ip_address', sa.String(45)))
+    add_column('user_sessions', sa.Column('user_agent', sa.String(256)))
+
+    # Store only SHA-256 digests of reset tokens. Outstanding reset links
+    # stop working; users can request a new one.
+    if column_exists('password_resets', 'token'):
+        op.execute('DELETE FROM password_resets')
+        with op.batch_alter_table('password_resets') as batch:
+            batch.drop_column('token')
+            batch.add_column(sa.Column('token_hash', sa.String(64), nullable=False))
+            batch.create_unique_constraint('password_resets_token_hash_key', ['token_hash'])
+
+    if not table_exists('email_verifications'):
+        op.create_table(
+            'email_verifications',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('token_hash', sa.String(64), unique=True, nullable=False),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('expires_at', sa.DateTime(), nullable=False),
+            sa.Column('used', sa.Boolean()),
+        )
+
+    for name, columns in USER_INDEXES.items():
+        create_index_concurrently(name, 'users', columns)
+
+
+def downgrade():
+    for name in USER_INDEXES:
+        drop_index_concurrently(name, 'users')
+    op.drop_table('email_verifications')
+    # The plain tokens are gone. Existing rows get a unique placeholder that
+    # no emailed link can match, so NOT NULL can be restored without
+    # deleting rows or failing on a non-empty table.
+    add_column('password_resets', sa.Column('token', sa.String(100)))
+    backfill_in_batches(
+        'password_resets', "token = 'expired-' || token_hash, used = :used", 'token IS NULL',
+        params={'used': True}
+    )
+    with op.batch_alter_table('password_resets') as batch:
+        batch.alter_column('token', existing_type=sa.String(100), nullable=False)
+        batch.create_unique_constraint('password_resets_token_key', ['token'])
+        batch.drop_constraint('password_resets_token_hash_key', type_='unique')
+        batch.drop_column('token_hash')
+    with op.batch_alter_table('user_sessions') as batch:
+        batch.drop_column('user_agent')
+        batch.drop_column('ip_address')
+    with op.batch_alter_table('users') as batch:
+        batch.drop_column('profile_version')
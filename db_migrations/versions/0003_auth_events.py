@@ -0,0 +1,40 @@
+"""Auth audit events
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.online_migrations import create_index_concurrently, table_exists
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not table_exists('auth_events'):
+        op.create_table(
+            'auth_events',
+            sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), primary_key=True),
+            sa.Column('event_type', sa.String(32), nullable=False),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id')),
+            sa.Column('email', sa.String(120)),
+            sa.Column('ip_address', sa.String(45)),
+            sa.Column('user_agent', sa.String(256)),
+            sa.Column('details', sa.JSON()),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+        )
+    create_index_concurrently('ix_auth_events_event_type', 'auth_events', ['event_type'])
+    create_index_concurrently('ix_auth_events_created_at', 'auth_events', ['created_at'])
+    create_index_concurrently('ix_auth_events_user_id_id', 'auth_events', ['user_id', 'id'])
+
+
+def downgrade():
+    op.drop_table('auth_events')
@@ -0,0 +1,30 @@
+"""Session revocation timestamps
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.online_migrations import add_column, create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable, no default: metadata-only on PostgreSQL
+    add_column('user_sessions', sa.Column('revoked_at', sa.DateTime()))
+    create_index_concurrently('ix_user_sessions_revoked_at', 'user_sessions', ['revoked_at'])
+
+
+def downgrade():
+    drop_index_concurrently('ix_user_sessions_revoked_at', 'user_sessions')
+    with op.batch_alter_table('user_sessions') as batch:
+        batch.drop_column('revoked_at')
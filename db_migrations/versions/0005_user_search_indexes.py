@@ -0,0 +1,38 @@
+"""Prefix search indexes on users.username and users.email
+
+Indexes lower(column) together with id. On PostgreSQL the key is in the
+"C" collation, so the btree serves prefix ranges (like text_pattern_ops)
+and also the (key, id) ordering used for keyset pages; see
+app.auth.queries.search_key.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:30:00
+
+"""
+import sqlalchemy as sa
+
+from app.online_migrations import create_index_concurrently, drop_index_concurrently, is_postgres
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+SEARCH_INDEXES = {
+    'ix_users_username_search': 'username',
+    'ix_users_email_search': 'email',
+}
+
+
+def upgrade():
+    collation = ' COLLATE "C"' if is_postgres() else ''
+    for name, column in SEARCH_INDEXES.items():
+        create_index_concurrently(name, 'users', [sa.text(f'lower({column}){collation}'), 'id'])
+
+
+def downgrade():
+    for name in SEARCH_INDEXES:
+        drop_index_concurrently(name, 'users')
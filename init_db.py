@@ -2,6 +2,7 @@ import sys
 import logging
 from app import create_app, db
 from app.models import User, Role, UserSession
+from app.permissions import DEFAULT_ROLES
 from datetime import datetime
 from sqlalchemy.exc import ProgrammingError, OperationalError
 
@@ -24,18 +25,12 @@ def init_db():
             logger.info("Created all database tables")
             
             # Create default roles if they don't exist
-            roles = {
-                'User': {'default': True, 'permissions': 0x01},
-                'Admin': {'default': False, 'permissions': 0xff},
-                'Moderator': {'default': False, 'permissions': 0x0f}
-            }
-            
-            for role_name, attrs in roles.items():
+            for role_name, (default, permissions) in DEFAULT_ROLES.items():
                 if not Role.query.filter_by(name=role_name).first():
                     role = Role(
                         name=role_name,
-                        default=attrs['default'],
-                        permissions=attrs['permissions']
+                        default=default,
+                        permissions=permissions
                     )
                     db.session.add(role)
                     logger.info(f"Created role: {role_name}")
@@ -1,20 +1,19 @@
-from flask_migrate import Migrate, upgrade
+from flask_migrate import upgrade
 from app import create_app, db
-from app.models import User, Role
+from app.models import Role
+from app.permissions import DEFAULT_ROLES
 
 app = create_app()
-migrate = Migrate(app, db)
 
 def init_db():
     with app.app_context():
-        # Create tables
-        db.create_all()
+        # Bring the schema up to date
+        upgrade()
         
         # Create default roles if they don't exist
         if Role.query.count() == 0:
-            roles = ['user', 'admin', 'moderator']
-            for role_name in roles:
-                role = Role(name=role_name, default=(role_name == 'user'))
+            for role_name, (default, permissions) in DEFAULT_ROLES.items():
+                role = Role(name=role_name, default=default, permissions=permissions)
                 db.session.add(role)
             db.session.commit()
             print("Created default roles")
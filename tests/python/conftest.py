@@ -0,0 +1,97 @@
+import pytest
+
+from app import create_app, db, limiter, audit_log
+from app.auth.cache import profile_cache, search_cache
+from app.models import User, Role
+
+PASSWORD = 'Test@123456'
+
+
+def make_test_config(**overrides):
+    """Config for an isolated app: in-memory SQLite, stub email, no rate limits"""
+    config = {
+        'TESTING': True,
+        'SECRET_KEY': 'test-secret',
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_ECHO': False,
+        'EMAIL_TRANSPORT': 'memory',
+        'PASSWORD_HASH_METHOD': 'pbkdf2:sha256:1000',  # fast hashes; scrypt costs ~50ms each
+        'PASSWORD_BREACHED_HASHES_FILE': None,
+        'RATELIMIT_ENABLED': False,
+        'RATELIMIT_STORAGE_URI': 'memory://',
+        'LOGIN_GUARD_STORAGE_URI': 'memory://',
+        'QUERY_BUDGET_RAISE': True,
+        'REVOCATION_REFRESH_INTERVAL': 0,
+        'AUDIT_ASYNC': False,  # events stay buffered until a test flushes them
+    }
+    config.update(overrides)
+    return config
+
+
+@pytest.fixture
+def app_config():
+    """Override in a test module (or parametrize) to change the app config"""
+    return {}
+
+
+@pytest.fixture
+def app(app_config):
+    # Each test gets its own app and therefore its own in-memory database
+    app = create_app(make_test_config(**app_config))
+    if limiter.enabled:
+        limiter.reset()
+    profile_cache.clear()
+    search_cache.clear()
+    yield app
+    # Write leftover audit events now rather than at exit, after the database is gone
+    audit_log.flush()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def outbox(app):
+    return app.extensions['email_transport'].outbox
+
+
+@pytest.fixture
+def make_user(app):
+    """Create an active user directly in the database and return its id"""
+    counter = iter(range(1, 10000))
+
+    def factory(role_name='User', password=PASSWORD, **fields):
+        n = next(counter)
+        with app.app_context():
+            role = Role.query.filter_by(name=role_name).first()
+            user = User(
+                username=fields.pop('username', f'user{n}'),
+                email=fields.pop('email', f'user{n}@example.com'),
+                first_name=fields.pop('first_name', 'Test'),
+                last_name=fields.pop('last_name', 'User'),
+                role_id=role.id,
+                is_active=fields.pop('is_active', True),
+                email_verified=True,
+                **fields
+            )
+            user.password = password
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+
+    return factory
+
+
+@pytest.fixture
+def login(client):
+    """Log a user in via the session cookie, bypassing the login endpoint"""
+    def do_login(user_id):
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    return do_login
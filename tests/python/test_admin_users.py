@@ -0,0 +1,51 @@
+import csv
+import gzip
+import io
+
+
+def test_listing_pages_with_keyset_cursor(client, make_user, login):
+    login(make_user(role_name='Admin'))
+    for _ in range(4):
+        make_user()
+
+    first = client.get('/api/auth/users?limit=3').get_json()
+    second = client.get(f"/api/auth/users?limit=3&cursor={first['next_cursor']}").get_json()
+
+    assert [u['id'] for u in first['users']] == [1, 2, 3]
+    assert [u['id'] for u in second['users']] == [4, 5]
+    assert second['next_cursor'] is None
+    assert 'password_hash' not in first['users'][0]
+
+
+def test_batch_lookup_preserves_order_and_reports_missing(client, make_user, login):
+    login(make_user(role_name='Admin'))
+    make_user()
+
+    body = client.get('/api/auth/users?ids=2,1,99').get_json()
+
+    assert [u['id'] for u in body['users']] == [2, 1]
+    assert body['missing'] == [99]
+
+
+def test_listing_requires_permission(client, make_user, login):
+    login(make_user(role_name='User'))
+
+    assert client.get('/api/auth/users').status_code == 403
+
+
+def test_moderator_can_list_but_not_export(client, make_user, login):
+    login(make_user(role_name='Moderator'))
+
+    assert client.get('/api/auth/users').status_code == 200
+    assert client.get('/api/auth/users/export').status_code == 403
+
+
+def test_export_streams_gzipped_csv(client, make_user, login):
+    login(make_user(role_name='Admin'))
+    make_user(is_active=False)
+
+    response = client.get('/api/auth/users/export?format=csv&gzip=true&is_active=false')
+
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.data).decode())))
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert [row['id'] for row in rows] == ['2']
@@ -0,0 +1,82 @@
+import pytest
+import sqlalchemy as sa
+
+from app import audit_log, db
+from conftest import PASSWORD
+
+
+def test_auth_events_are_buffered_then_bulk_written(client, make_user, login, app):
+    user_id = make_user(email='stargazer@example.com')
+    client.post('/api/auth/login', json={'email': 'stargazer@example.com', 'password': 'wrong'})
+    client.post('/api/auth/login', json={'email': 'stargazer@example.com', 'password': PASSWORD})
+
+    assert audit_log.metrics()['buffered'] == 2
+    with app.app_context():
+        assert audit_log.flush() == 2
+        events = audit_log.recent(user_id=user_id)
+    assert [e.event_type for e in events] == ['login', 'login_failed']
+    assert events[1].email == 'stargazer@example.com'
+
+
+def test_audit_events_endpoint_requires_admin_and_pages(client, make_user, login):
+    for _ in range(3):
+        audit_log.record('login_failed', email='nobody@example.com')
+
+    login(make_user())
+    assert client.get('/api/auth/audit-events').status_code == 403
+
+    login(make_user('Admin'))
+    page = client.get('/api/auth/audit-events?event_type=login_failed&limit=2').get_json()
+    assert len(page['events']) == 2
+    rest = client.get(f"/api/auth/audit-events?event_type=login_failed&cursor={page['next_cursor']}").get_json()
+    assert len(rest['events']) == 1 and rest['next_cursor'] is None
+
+
+@pytest.mark.parametrize('app_config', [{'AUDIT_BUFFER_SIZE': 2, 'AUDIT_FLUSH_BATCH': 100}])
+def test_full_buffer_drops_oldest_events(app):
+    for event_type in ('first', 'second', 'third'):
+        audit_log.record(event_type)
+
+    with app.app_context():
+        audit_log.flush()
+        assert [e.event_type for e in audit_log.recent()] == ['third', 'second']
+    assert audit_log.metrics()['dropped_total'] == 1
+
+
+def test_oversized_fields_are_truncated(client, app):
+    email = 'x' * 300 + '@example.com'
+    client.post('/api/auth/login', json={'email': email, 'password': 'wrong'})
+
+    with app.app_context():
+        assert audit_log.flush() == 1
+        assert audit_log.recent()[0].email == email[:120]
+
+
+def test_rejected_rows_are_dropped_without_stalling_the_batch(app):
+    audit_log.record('first')
+    audit_log.record(None)  # event_type is NOT NULL
+    audit_log.record('third')
+
+    with app.app_context():
+        assert audit_log.flush() == 2
+        assert [e.event_type for e in audit_log.recent()] == ['third', 'first']
+    metrics = audit_log.metrics()
+    assert metrics['dropped_total'] == 1 and metrics['buffered'] == 0
+
+
+@pytest.mark.parametrize('app_config', [{'AUDIT_BUFFER_SIZE': 2, 'AUDIT_FLUSH_BATCH': 100, 'AUDIT_OVERFLOW': 'flush'}])
+def test_unreachable_database_keeps_events_within_capacity(app):
+    with app.app_context():
+        db.session.execute(sa.text('ALTER TABLE auth_events RENAME TO auth_events_away'))
+        db.session.commit()
+        for event_type in ('first', 'second', 'third'):
+            audit_log.record(event_type)
+
+        # The failed flush kept the events, but never more than the buffer holds
+        assert audit_log.flush() == 0
+        assert audit_log.metrics()['buffered'] == 2
+
+        db.session.execute(sa.text('ALTER TABLE auth_events_away RENAME TO auth_events'))
+        db.session.commit()
+        assert audit_log.flush() == 2
+        assert [e.event_type for e in audit_log.recent()] == ['third', 'second']
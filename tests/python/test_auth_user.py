@@ -0,0 +1,41 @@
+import sqlalchemy as sa
+from flask_login import current_user
+
+from app import db
+from app.models import AUTH_USER_FIELDS, AuthUser, User
+from conftest import PASSWORD
+
+
+def test_requests_authenticate_with_the_auth_projection(app, client, make_user):
+    user_id = make_user(email='stargazer@example.com', bio='Astronomer. ' * 100)
+    token = client.post('/api/auth/login', json={
+        'email': 'stargazer@example.com', 'password': PASSWORD
+    }).get_json()['token']
+
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        assert isinstance(current_user._get_current_object(), AuthUser)
+        assert current_user.id == user_id
+        assert not hasattr(current_user, 'bio')
+
+    # The full profile is still served, bio included
+    profile = client.get('/api/auth/profile', headers={'Authorization': f'Bearer {token}'}).get_json()
+    assert profile['user']['bio'].startswith('Astronomer.')
+
+
+def test_profile_columns_are_deferred_on_user_entities(app, make_user):
+    user_id = make_user(bio='Astronomer.', location='London')
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        assert {'bio', 'location', 'avatar_url', 'phone_number'} <= sa.inspect(user).unloaded
+        assert user.bio == 'Astronomer.'  # loads the whole group on first access
+        assert 'location' not in sa.inspect(user).unloaded
+
+
+def test_auth_user_fields_come_from_the_row():
+    row = dict.fromkeys(AUTH_USER_FIELDS, 'x')
+    row.update(id=7, is_active=False)
+    user = AuthUser(tuple(row.values()))
+
+    assert user.id == 7 and user.username == 'x'
+    # The row's flag wins over UserMixin's always-True is_active
+    assert user.is_active is False
@@ -0,0 +1,95 @@
+import hashlib
+import io
+
+import pytest
+from flask import Flask
+
+from app.avatars import Avatars, Image
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 2048
+
+
+def make_png():
+    """A decodable PNG when Pillow is installed, otherwise just the signature"""
+    if Image is None:
+        return PNG
+    buffer = io.BytesIO()
+    Image.new('RGB', (320, 200), (30, 60, 120)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def app_config(tmp_path, request):
+    # Process uploads inline so the new avatar_url is visible immediately
+    config = {
+        'AVATAR_STORAGE_URI': f'file://{tmp_path}',
+        'AVATAR_WORKERS': 0,
+        'AVATAR_MAX_BYTES': 4096,
+        'AVATAR_CHUNK_SIZE': 512,
+    }
+    config.update(getattr(request, 'param', {}))
+    return config
+
+
+def test_avatar_upload_is_content_addressed(client, make_user, login, app):
+    login(make_user())
+    etag = client.get('/api/auth/profile').headers['ETag']
+    image = make_png()
+
+    response = client.put('/api/auth/profile/avatar', data=image, content_type='image/png')
+    assert response.status_code == 202
+    digest = response.get_json()['avatar']
+
+    profile = client.get('/api/auth/profile', headers={'If-None-Match': etag})
+    assert profile.status_code == 200
+    url = profile.get_json()['user']['avatar_url']
+
+    served = client.get(url)
+    assert 'immutable' in served.headers['Cache-Control']
+    if Image is None:
+        assert url == f'/avatars/{digest[:2]}/{digest}.png'
+        assert served.data == image
+    else:
+        assert url == f'/avatars/{digest[:2]}/{digest}-256.webp'
+        assert Image.open(io.BytesIO(served.data)).size == (256, 256)
+        assert client.get(f'/avatars/{digest[:2]}/{digest}-64.webp').status_code == 200
+
+    # The same bytes again are deduplicated instead of reprocessed
+    client.put('/api/auth/profile/avatar', data=image, content_type='image/png')
+    assert app.extensions['avatars'].metrics()['deduplicated_total'] == 1
+
+
+def test_avatar_rejects_non_images_and_oversized_uploads(client, make_user, login):
+    login(make_user())
+
+    assert client.put('/api/auth/profile/avatar', data=b'<svg/>' * 10).status_code == 415
+    assert client.put('/api/auth/profile/avatar', data=PNG * 3).status_code == 413
+
+
+@pytest.mark.parametrize('app_config', [{'RATELIMIT_ENABLED': True}], indirect=True)
+def test_avatar_files_exempt_from_rate_limits(client, make_user, login):
+    login(make_user())
+    client.put('/api/auth/profile/avatar', data=make_png(), content_type='image/png')
+    url = client.get('/api/auth/profile').get_json()['user']['avatar_url']
+
+    statuses = {client.get(url).status_code for _ in range(60)}
+
+    assert statuses == {200}
+
+
+@pytest.mark.skipif(Image is None, reason='thumbnails need Pillow')
+def test_thumbnail_pool_does_not_fork(tmp_path):
+    app = Flask(__name__)
+    app.config.update(AVATAR_STORAGE_URI=f'file://{tmp_path / "store"}', AVATAR_WORKERS=1)
+    avatars = Avatars(app)
+    image = make_png()
+    upload = tmp_path / 'upload.png'
+    upload.write_bytes(image)
+    ready = []
+
+    url = avatars.submit(1, hashlib.sha256(image).hexdigest(), 'png', 'image/png', str(upload), ready.append)
+
+    assert url.result(timeout=60) == ready[0]
+    assert avatars._processes._mp_context.get_start_method() in ('forkserver', 'spawn')
+    avatars._jobs.shutdown()
+    avatars._processes.shutdown()
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from capacity_planning import USLModel, fit_usl, load_results, summarize
+from capacity_planning.report import BEGIN, END, render_sections, write_report
+
+
+def test_usl_fit_recovers_saturation_point():
+    true = USLModel(lam=100, sigma=0.05, kappa=0.0002, r2=1)
+    n = np.array([1, 2, 4, 8, 16, 32, 64, 128, 256])
+    noisy = true.throughput(n) * (1 + np.random.default_rng(0).normal(0, 0.01, len(n)))
+
+    model = fit_usl(n, noisy)
+
+    assert model.r2 > 0.99
+    assert model.peak()[0] == pytest.approx(true.peak()[0], rel=0.1)
+
+
+def test_samples_are_summarized_and_report_block_replaced(tmp_path):
+    samples = tmp_path / 'run.csv'
+    rows = ['concurrency,latency_ms,ok'] + [f'{n},{n + i},true' for n in (10, 20, 40) for i in range(100)]
+    samples.write_text('\n'.join(rows))
+    (tmp_path / 'notes.json').write_text(json.dumps({'unrelated': True}))
+
+    stats = summarize(load_results([str(tmp_path)]))
+    assert list(stats['concurrency']) == [10, 20, 40]
+    assert stats['p50_ms'][0] == pytest.approx(59.5)
+    assert stats['p99_ms'][2] == pytest.approx(138.01)
+
+    report = tmp_path / 'report.md'
+    report.write_text(f'# Report\n\n{BEGIN}\nstale\n{END}\n\n## Strategy\nkept\n')
+    model = fit_usl(stats['concurrency'], stats['throughput'])
+    write_report(str(report), render_sections(stats, model, ['run.csv']))
+
+    content = report.read_text()
+    assert 'stale' not in content and '## Strategy\nkept' in content
+    assert '| 40 | 100 |' in content
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+from flask import Response, stream_with_context
+
+from app import concurrency
+from app.concurrency import GradientLimit
+
+
+def test_limit_grows_while_latency_holds_and_shrinks_when_it_climbs():
+    limit = GradientLimit(initial=20, window_size=1)
+    for _ in range(10):
+        limit.sample(0.05, inflight=20)
+    grown = limit.limit
+    assert grown > 20
+
+    for _ in range(10):
+        limit.sample(0.5, inflight=grown)
+    assert limit.limit < grown / 2
+
+
+def test_idle_traffic_does_not_inflate_the_limit():
+    limit = GradientLimit(initial=20, window_size=1)
+    for _ in range(10):
+        limit.sample(0.05, inflight=1)
+    assert limit.limit == 20
+
+
+@pytest.mark.parametrize('app_config', [{'CONCURRENCY_INITIAL_LIMIT': 2, 'CONCURRENCY_MIN_LIMIT': 2}])
+def test_low_priority_is_shed_first_with_retry_after(client):
+    # One request already in flight fills the 'low' class share (half the limit)
+    assert concurrency.acquire('high')
+
+    shed = client.post('/api/auth/register', json={})
+    assert shed.status_code == 503
+    assert shed.headers['Retry-After'] == '1'
+
+    assert client.post('/api/auth/login', json={}).status_code == 400
+    assert client.get('/api/auth/health').status_code == 200
+    assert concurrency.metrics()['shed_low_total'] == 1
+
+
+@pytest.mark.parametrize('app_config', [{'CONCURRENCY_WINDOW_SIZE': 1}])
+def test_streamed_responses_hold_a_slot_without_sampling(app, client):
+    def slow_body():
+        assert concurrency.inflight == 1
+        time.sleep(0.2)
+        yield b'done'
+
+    app.add_url_rule('/stream', 'stream', lambda: Response(stream_with_context(slow_body())))
+
+    assert client.get('/stream').data == b'done'
+    assert concurrency.inflight == 0
+    assert concurrency.limiter.last_latency == 0.0
+
+    client.get('/api/auth/health')
+    assert 0 < concurrency.limiter.last_latency < 0.2
@@ -0,0 +1,173 @@
+import threading
+
+import pytest
+
+from app.email import CircuitBreaker, EmailRejected, EmailUnavailable, MemoryTransport, ResilientTransport
+
+MESSAGE = ('Subject', ['stargazer@example.com'], 'text', '<p>html</p>')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+class FlakyTransport(MemoryTransport):
+    """Memory outbox that raises while ``down`` is set, and always for ``invalid`` recipients"""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+        self.invalid = set()
+        self.calls = 0
+
+    def send(self, *message):
+        self.calls += 1
+        if self.invalid.intersection(message[1]):
+            raise BadRequest('invalid recipient')
+        if self.down:
+            raise ConnectionError('provider timeout')
+        super().send(*message)
+
+
+def make_transport(on_unavailable='fail', max_concurrent=4, queue_size=1000, max_attempts=5):
+    clock = FakeClock()
+    transport = FlakyTransport()
+    resilient = ResilientTransport(
+        transport, CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock),
+        max_concurrent=max_concurrent, on_unavailable=on_unavailable, queue_size=queue_size,
+        retry_interval=3600, max_attempts=max_attempts
+    )
+    return resilient, transport, clock
+
+
+def test_breaker_opens_fails_fast_and_recovers_through_one_probe():
+    resilient, transport, clock = make_transport()
+    transport.down = True
+    for _ in range(3):
+        with pytest.raises(EmailUnavailable):
+            resilient.send(*MESSAGE)
+    assert resilient.breaker.state == CircuitBreaker.OPEN
+
+    # Open: refused without calling the provider
+    with pytest.raises(EmailUnavailable):
+        resilient.send(*MESSAGE)
+    assert transport.calls == 3
+    assert resilient.metrics()['short_circuited_total'] == 1
+
+    # A failed probe re-opens the circuit for another reset_timeout
+    clock.now = 30
+    with pytest.raises(EmailUnavailable):
+        resilient.send(*MESSAGE)
+    assert transport.calls == 4 and resilient.breaker.state == CircuitBreaker.OPEN
+
+    clock.now = 60
+    transport.down = False
+    resilient.send(*MESSAGE)
+    assert resilient.breaker.state == CircuitBreaker.CLOSED
+    assert len(transport.outbox) == 1
+    assert resilient.metrics()['circuit_state'] == 0
+
+
+def test_deferred_messages_are_delivered_once_the_circuit_closes():
+    resilient, transport, clock = make_transport(on_unavailable='defer')
+    transport.down = True
+    for _ in range(4):
+        resilient.send(*MESSAGE)
+    assert resilient.metrics()['deferred'] == 4
+    assert resilient.drain() == 0  # still open
+
+    clock.now = 30
+    transport.down = False
+    assert resilient.drain() == 4
+    assert len(transport.outbox) == 4
+    assert resilient.metrics()['deferred'] == 0
+
+
+def test_full_queue_drops_and_logs_the_oldest_message(caplog):
+    resilient, transport, clock = make_transport(on_unavailable='defer', queue_size=2)
+    transport.down = True
+    for n in range(3):
+        resilient.send('Subject', [f'user{n}@example.com'], 'text', '<p>html</p>')
+
+    assert resilient.metrics()['deferred_dropped_total'] == 1
+    assert "dropped message to ['user0@example.com']" in caplog.text
+
+    clock.now = 30
+    transport.down = False
+    assert resilient.drain() == 2
+    assert [message['recipients'] for message in transport.outbox] == [['user1@example.com'], ['user2@example.com']]
+
+
+def test_rejected_message_is_dropped_without_blocking_the_queue():
+    resilient, transport, clock = make_transport(on_unavailable='defer')
+    transport.down = True
+    resilient.send('Subject', ['bad@example.com'], 'text', '<p>html</p>')
+    resilient.send('Subject', ['good@example.com'], 'text', '<p>html</p>')
+
+    clock.now = 30
+    transport.down = False
+    transport.invalid.add('bad@example.com')
+    assert resilient.drain() == 1
+    assert [message['recipients'] for message in transport.outbox] == [['good@example.com']]
+    assert resilient.metrics()['rejected_total'] == 1 and resilient.metrics()['deferred'] == 0
+    assert resilient.breaker.state == CircuitBreaker.CLOSED
+
+    # Sent directly, a rejection is the caller's error, never deferred or held against the breaker
+    for _ in range(3):
+        with pytest.raises(EmailRejected):
+            resilient.send('Subject', ['bad@example.com'], 'text', '<p>html</p>')
+    assert resilient.breaker.state == CircuitBreaker.CLOSED
+    assert resilient.metrics()['deferred'] == 0
+
+
+def test_deferred_message_is_given_up_after_max_attempts():
+    resilient, transport, clock = make_transport(on_unavailable='defer', max_attempts=2)
+    transport.down = True
+    resilient.send(*MESSAGE)  # first failed attempt
+    clock.now = 30
+    assert resilient.drain() == 0  # the probe fails: second attempt, given up
+
+    assert resilient.metrics()['deferred'] == 0
+    assert resilient.metrics()['deferred_dropped_total'] == 1
+
+
+def test_bulkhead_rejects_sends_beyond_the_concurrency_cap():
+    resilient, transport, _ = make_transport(max_concurrent=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_send(*message):
+        started.set()
+        release.wait(5)
+
+    transport.send = slow_send
+    worker = threading.Thread(target=resilient.send, args=MESSAGE)
+    worker.start()
+    started.wait(5)
+    try:
+        with pytest.raises(EmailUnavailable):
+            resilient.send(*MESSAGE)
+        assert resilient.metrics()['inflight'] == 1
+    finally:
+        release.set()
+        worker.join()
+    metrics = resilient.metrics()
+    assert metrics['bulkhead_rejected_total'] == 1 and metrics['sent_total'] == 1
+    # Saturation alone must not trip the breaker
+    assert resilient.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_send_email_goes_through_the_resilient_wrapper(app, outbox):
+    from app.email import send_email
+
+    with app.app_context():
+        send_email('Hello', ['stargazer@example.com'], 'text', '<p>html</p>')
+    assert len(outbox) == 1
+    assert app.extensions['metrics'].collect()['celestial_email_sent_total'] == 1
@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from app.login_guard import MemoryWindowStore
+from conftest import PASSWORD
+
+
+def test_login_returns_session_token(client, make_user):
+    make_user(email='ada@example.com')
+
+    response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': PASSWORD})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body['token']) == 64
+    assert body['user']['email'] == 'ada@example.com'
+
+
+def test_login_rejects_wrong_password(client, make_user):
+    make_user(email='ada@example.com')
+
+    response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 'nope'})
+
+    assert response.status_code == 401
+
+
+def test_login_requires_verified_email(client, make_user):
+    make_user(email='ada@example.com', is_active=False)
+
+    response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': PASSWORD})
+
+    assert response.status_code == 401
+    assert 'verify your email' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('app_config', [{'LOGIN_GUARD_MAX_ACCOUNT_FAILURES': 3}])
+def test_login_guard_sheds_before_database(client, make_user):
+    make_user(email='ada@example.com')
+    for _ in range(3):
+        client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': 'wrong'})
+
+    response = client.post('/api/auth/login', json={'email': 'ada@example.com', 'password': PASSWORD})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After']
+    assert 'desc="0 queries"' in response.headers['Server-Timing']
+
+
+@pytest.mark.parametrize('body', [
+    {'email': ['ada@example.com'], 'password': PASSWORD},
+    {'email': 'ada@example.com', 'password': 123456},
+])
+def test_login_rejects_non_string_credentials(client, body):
+    response = client.post('/api/auth/login', json=body)
+
+    assert response.status_code == 400
+
+
+def test_login_guard_tolerates_missing_remote_addr(app):
+    guard = app.extensions['login_guard']
+
+    guard.record_failure('ada@example.com', None)
+
+    assert guard.check('ada@example.com', None) is None
+    assert guard.store.count('ip:unknown', time.time()) == 1
+
+
+def test_memory_store_sweeps_stale_keys_and_caps_the_rest():
+    store = MemoryWindowStore(window=60, max_keys=3)
+    store.incr('old', 0)
+    store.incr('a', 120)
+    assert len(store) == 1  # 'old' left the window and was swept
+
+    for key in ('b', 'c', 'a', 'd'):
+        store.incr(key, 121)
+
+    # Over the cap, the least recently failing key goes first
+    assert len(store) == 3 and store.evicted == 1
+    assert store.count('b', 121) == 0
+    assert store.count('a', 121) == 2
+
+
+def test_memory_store_incr_stays_cheap_when_full():
+    store = MemoryWindowStore(window=900, max_keys=50000)
+    for n in range(60000):
+        store.incr(f'ip:{n}', 1000)
+
+    started = time.perf_counter()
+    for n in range(1000):
+        store.incr(f'acct:{n}', 1000)
+
+    assert len(store) == 50000
+    assert time.perf_counter() - started < 0.5
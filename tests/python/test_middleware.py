@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import pytest
+from flask import jsonify
+
+from app import create_app, db
+from app.query_budget import QueryBudgetExceeded
+from conftest import make_test_config
+
+PREFLIGHT = {'Access-Control-Request-Method': 'POST'}
+
+
+def test_preflight_answered_for_allowed_origin(client):
+    response = client.options('/api/auth/register', headers=dict(PREFLIGHT, Origin='http://localhost:3000'))
+
+    assert response.status_code == 204
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:3000'
+    assert response.headers['Access-Control-Allow-Credentials'] == 'true'
+    assert response.headers['Access-Control-Max-Age'] == '86400'
+
+
+def test_preflight_rejected_for_unknown_origin(client):
+    response = client.options('/api/auth/register', headers=dict(PREFLIGHT, Origin='http://evil.example'))
+
+    assert response.status_code == 403
+    assert 'Access-Control-Allow-Origin' not in response.headers
+
+
+@pytest.mark.parametrize('app_config', [{'QUERY_BUDGETS': {'auth.health_check': 0}}])
+def test_query_budget_raises_in_tests(client):
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/api/auth/health')
+
+
+def test_query_budget_raise_defaults_to_testing(monkeypatch):
+    monkeypatch.delenv('QUERY_BUDGET_RAISE', raising=False)
+    config = make_test_config()
+    del config['QUERY_BUDGET_RAISE']
+
+    for testing in (True, False):
+        app = create_app(dict(config, TESTING=testing))
+        assert app.config['QUERY_BUDGET_RAISE'] is testing
+        with app.app_context():
+            db.engine.dispose()
+
+
+def test_metrics_exposes_counters(client):
+    client.options('/api/auth/login', headers=dict(PREFLIGHT, Origin='http://localhost:3000'))
+
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert 'celestial_cors_preflights_total 1' in body
+    assert 'celestial_login_guard_shed_total 0' in body
+
+
+@pytest.mark.parametrize('app_config', [{'RATELIMIT_ENABLED': True}])
+def test_metrics_exempt_from_rate_limits(client):
+    statuses = {client.get('/metrics').status_code for _ in range(60)}
+
+    assert statuses == {200}
+
+
+def test_json_keeps_http_dates(app):
+    when = datetime(2024, 1, 2, 3, 4, 5)
+
+    with app.test_request_context():
+        body = jsonify({'at': when}).get_json()
+
+    assert body == {'at': 'Tue, 02 Jan 2024 03:04:05 GMT'}
+    assert app.json.dumps({'at': when}) == '{"at":"Tue, 02 Jan 2024 03:04:05 GMT"}'
@@ -0,0 +1,102 @@
+import sqlite3
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from flask_migrate import downgrade, upgrade
+
+from app import create_app, db
+from app.online_migrations import backfill_in_batches
+from conftest import make_test_config
+
+# Schema as it looked before the first revision
+LEGACY_SCHEMA = """
+CREATE TABLE roles (id INTEGER PRIMARY KEY, name VARCHAR(64) UNIQUE, "default" BOOLEAN, permissions INTEGER);
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY, username VARCHAR(64) UNIQUE NOT NULL, email VARCHAR(120) UNIQUE NOT NULL,
+    password_hash VARCHAR(256), first_name VARCHAR(64), last_name VARCHAR(64), phone_number VARCHAR(20),
+    created_at DATETIME, is_active BOOLEAN, is_admin BOOLEAN, email_verified BOOLEAN,
+    role_id INTEGER REFERENCES roles(id), bio TEXT, location VARCHAR(64), avatar_url VARCHAR(256)
+);
+CREATE TABLE user_sessions (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), session_token VARCHAR(64) UNIQUE,
+    created_at DATETIME, expires_at DATETIME NOT NULL, is_active BOOLEAN
+);
+CREATE TABLE password_resets (
+    id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users(id), token VARCHAR(100) UNIQUE NOT NULL,
+    created_at DATETIME, expires_at DATETIME NOT NULL, used BOOLEAN
+);
+INSERT INTO users (id, username, email) VALUES (1, 'legacy', 'legacy@example.com');
+"""
+
+
+def columns(table):
+    return {c['name'] for c in sa.inspect(db.engine).get_columns(table)}
+
+
+def test_upgrade_migrates_legacy_schema_in_place(tmp_path):
+    path = tmp_path / 'legacy.db'
+    with sqlite3.connect(path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+
+    app = create_app(make_test_config(SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}'))
+    with app.app_context():
+        upgrade()
+
+        assert 'profile_version' in columns('users')
+        assert {'ip_address', 'user_agent'} <= columns('user_sessions')
+        assert 'token_hash' in columns('password_resets') and 'token' not in columns('password_resets')
+        indexes = set(db.session.execute(sa.text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users'"
+        )).scalars())
+        assert {'ix_users_created_at', 'ix_users_is_active', 'ix_users_role_id'} <= indexes
+        assert {'ix_users_username_search', 'ix_users_email_search'} <= indexes
+        # Existing rows survive and pick up the column default
+        assert db.session.execute(sa.text('SELECT profile_version FROM users WHERE id = 1')).scalar() == 0
+
+        # Re-running is a no-op
+        upgrade()
+        db.engine.dispose()
+
+
+def test_downgrade_keeps_existing_reset_requests(tmp_path):
+    path = tmp_path / 'legacy.db'
+    with sqlite3.connect(path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+
+    app = create_app(make_test_config(SQLALCHEMY_DATABASE_URI=f'sqlite:///{path}'))
+    with app.app_context():
+        upgrade()
+        db.session.execute(sa.text(
+            "INSERT INTO password_resets (user_id, token_hash, expires_at, used) "
+            "VALUES (1, :digest, '2030-01-01', 0)"
+        ), {'digest': 'ab' * 32})
+        db.session.commit()
+
+        downgrade(revision='0001')
+
+        assert 'token' in columns('password_resets') and 'token_hash' not in columns('password_resets')
+        row = db.session.execute(sa.text('SELECT token, used FROM password_resets')).one()
+        assert row.token == 'expired-' + 'ab' * 32 and row.used
+        token = next(c for c in sa.inspect(db.engine).get_columns('password_resets') if c['name'] == 'token')
+        assert not token['nullable']
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_backfill_runs_in_bounded_batches(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(sa.text("INSERT INTO users (id, username, email) VALUES (:id, :u, :e)"),
+                         [{'id': i, 'u': f'u{i}', 'e': f'u{i}@example.com'} for i in range(1, 26)])
+            statements = []
+            sa.event.listen(conn, 'before_cursor_execute',
+                            lambda *args: statements.append(args[2]) if args[2].startswith('UPDATE') else None)
+
+            with Operations.context(MigrationContext.configure(conn)):
+                updated = backfill_in_batches('users', 'profile_version = 7', 'profile_version = 0',
+                                              batch_size=10, max_replication_lag=None)
+
+            assert updated == 25
+            assert len(statements) == 3
+            assert conn.execute(sa.text('SELECT COUNT(*) FROM users WHERE profile_version = 7')).scalar() == 25
@@ -0,0 +1,57 @@
+import re
+
+import pytest
+
+from app.auth.password_policy import PasswordPolicy, BreachedPasswordIndex, build_breached_index
+
+
+def test_policy_collects_all_violations_in_order():
+    policy = PasswordPolicy()
+
+    assert policy.violations('abc') == [
+        'Password must be at least 8 characters long',
+        'Password must contain at least one uppercase letter',
+        'Password must contain at least one number',
+        'Password must contain at least one special character',
+    ]
+    assert policy.validate('Test@123456') == (True, '')
+
+
+def test_special_characters_are_configurable():
+    policy = PasswordPolicy(special_characters='~')
+
+    assert policy.violations('Test@123456') == ['Password must contain at least one special character']
+    assert policy.violations('Test~123456') == []
+
+
+def test_breached_index_lookup(tmp_path):
+    path = tmp_path / 'breached.idx'
+    count = build_breached_index([
+        'Password1!\n',
+        '5BAA61E4C9B93F3F0682250B6CF8331B7EE68FD8:3730471\n',  # "password"
+    ], str(path))
+    index = BreachedPasswordIndex(str(path))
+    policy = PasswordPolicy(breached_index=index)
+
+    assert count == 2
+    assert 'password' in index
+    assert 'Password1!' in index
+    assert 'Test@123456' not in index
+    assert policy.violations('Password1!') == ['Password has appeared in a data breach; please choose another']
+    index.close()
+
+
+def test_character_classes_are_ascii():
+    policy = PasswordPolicy()
+
+    assert policy.violations('Éabcdef@1') == ['Password must contain at least one uppercase letter']
+    assert policy.violations('Abcdefg@٣') == ['Password must contain at least one number']
+
+
+@pytest.mark.parametrize('digit', ['٣', '３', '߁'])
+def test_only_ascii_digits_satisfy_the_number_rule(digit):
+    policy = PasswordPolicy()
+
+    assert re.search(r'\d', digit)  # the rule this replaced accepted these
+    assert policy.violations(f'Abcdefg@{digit}') == ['Password must contain at least one number']
+    assert policy.violations('Abcdefg@3') == []
@@ -0,0 +1,19 @@
+def test_profile_etag_revalidates_until_updated(client, make_user, login):
+    login(make_user())
+
+    first = client.get('/api/auth/profile')
+    etag = first.headers['ETag']
+    assert first.status_code == 200
+    assert first.get_json()['user']['role'] == 'User'
+
+    assert client.get('/api/auth/profile', headers={'If-None-Match': etag}).status_code == 304
+
+    assert client.put('/api/auth/profile', json={'bio': 'Astronomer'}).status_code == 200
+    updated = client.get('/api/auth/profile', headers={'If-None-Match': etag})
+    assert updated.status_code == 200
+    assert updated.headers['ETag'] != etag
+    assert updated.get_json()['user']['bio'] == 'Astronomer'
+
+
+def test_profile_requires_login(client):
+    assert client.get('/api/auth/profile').status_code in (302, 401)
@@ -0,0 +1,50 @@
+from app.models import User
+
+VALID = {
+    'username': 'ada',
+    'email': 'ada@example.com',
+    'password': 'Test@123456',
+    'first_name': 'Ada',
+    'last_name': 'Lovelace',
+}
+
+
+def test_register_creates_inactive_user_and_sends_verification(app, client, outbox):
+    response = client.post('/api/auth/register', json=VALID)
+
+    assert response.status_code == 201
+    assert response.get_json()['user']['username'] == 'ada'
+    assert len(outbox) == 1
+    assert outbox[0]['recipients'] == ['ada@example.com']
+    with app.app_context():
+        user = User.query.filter_by(username='ada').one()
+        assert not user.is_active
+        assert user.role_id is not None
+
+
+def test_register_rejects_duplicate_username_and_email(client):
+    client.post('/api/auth/register', json=VALID)
+
+    same_username = dict(VALID, email='other@example.com')
+    same_email = dict(VALID, username='other')
+
+    assert client.post('/api/auth/register', json=same_username).get_json() == {'error': 'Username already exists'}
+    assert client.post('/api/auth/register', json=same_email).get_json() == {'error': 'Email already exists'}
+
+
+def test_register_reports_every_password_violation(client):
+    response = client.post('/api/auth/register', json=dict(VALID, password='abc'))
+
+    assert response.status_code == 400
+    error = response.get_json()['error']
+    assert 'at least 8 characters' in error
+    assert 'uppercase' in error
+    assert 'number' in error
+    assert 'special character' in error
+
+
+def test_register_requires_fields(client):
+    response = client.post('/api/auth/register', json={'username': 'ada'})
+
+    assert response.status_code == 400
+    assert 'Missing required fields' in response.get_json()['error']
@@ -0,0 +1,81 @@
+from app import revocation_filter
+from conftest import PASSWORD
+
+
+def log_in(app, email):
+    """Log in through the endpoint with a fresh client; return (client, token)"""
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+    return client, response.get_json()['token']
+
+
+def test_sessions_listed_and_logout_revokes_current_one(app, make_user):
+    make_user(email='vega@example.com')
+    laptop, _ = log_in(app, 'vega@example.com')
+    phone, _ = log_in(app, 'vega@example.com')
+
+    sessions = laptop.get('/api/auth/sessions').get_json()['sessions']
+    assert len(sessions) == 2
+    assert [s['current'] for s in sessions] == [False, True]
+
+    assert phone.get('/api/auth/logout').status_code == 200
+    remaining = laptop.get('/api/auth/sessions').get_json()['sessions']
+    assert [s['id'] for s in remaining] == [sessions[1]['id']]
+
+
+def test_revoked_bearer_token_rejected_without_query(app, make_user):
+    make_user(email='vega@example.com')
+    browser, token = log_in(app, 'vega@example.com')
+    api = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    assert api.get('/api/auth/profile', headers=headers).status_code == 200
+
+    # Revoke everything but the browser session making the request
+    api_session = api.get('/api/auth/sessions', headers=headers).get_json()['sessions'][0]['id']
+    assert browser.delete(f'/api/auth/sessions/{api_session}').status_code == 200
+
+    response = api.get('/api/auth/profile', headers=headers)
+    assert response.status_code in (302, 401)
+    assert 'desc="0 queries"' in response.headers['Server-Timing']
+    assert revocation_filter.metrics()['rejected_total'] == 1
+
+
+def test_revoke_all_but_current_in_one_update(app, make_user):
+    make_user(email='vega@example.com')
+    first, _ = log_in(app, 'vega@example.com')
+    second, _ = log_in(app, 'vega@example.com')
+    third, _ = log_in(app, 'vega@example.com')
+
+    response = third.delete('/api/auth/sessions?others=true')
+    assert response.get_json()['revoked'] == 2
+    assert third.get('/api/auth/profile').status_code == 200
+    assert first.get('/api/auth/profile').status_code in (302, 401)
+
+    # Another process revoking the last session is picked up by an incremental refresh
+    with app.app_context():
+        from app.auth.sessions import revoke_sessions
+        from app.models import User
+        user_id = User.query.filter_by(email='vega@example.com').one().id
+        assert revoke_sessions(user_id) == 1
+        revocation_filter._ids.clear()  # as if revoked elsewhere
+        revocation_filter.refresh()
+    assert third.get('/api/auth/profile').status_code in (302, 401)
+
+
+def test_cookie_session_rejected_once_expired_or_pruned(app, make_user):
+    make_user(email='vega@example.com')
+    revoked, _ = log_in(app, 'vega@example.com')
+    expired, _ = log_in(app, 'vega@example.com')
+    assert expired.delete('/api/auth/sessions?others=true').get_json()['revoked'] == 1
+
+    with app.app_context():
+        from app import db
+        from app.models import UserSession
+        from datetime import datetime, timedelta
+        # Both sessions lapse, and the filter prunes the revoked one
+        UserSession.query.update({'expires_at': datetime.utcnow() - timedelta(minutes=1)})
+        db.session.commit()
+        revocation_filter._ids.clear()
+
+    assert revoked.get('/api/auth/profile').status_code in (302, 401)
+    assert expired.get('/api/auth/profile').status_code in (302, 401)
@@ -0,0 +1,47 @@
+import re
+
+from app import db
+from app.models import User, PasswordReset
+
+from conftest import PASSWORD
+
+
+def token_from(email):
+    return re.search(r'/([A-Za-z0-9_-]{43})\b', email['text_body']).group(1)
+
+
+def test_verify_email_activates_user_once(app, client, outbox):
+    client.post('/api/auth/register', json={
+        'username': 'ada', 'email': 'ada@example.com', 'password': PASSWORD,
+        'first_name': 'Ada', 'last_name': 'Lovelace'
+    })
+    token = token_from(outbox[0])
+
+    assert client.get(f'/api/auth/verify-email/{token}').status_code == 200
+    assert client.get(f'/api/auth/verify-email/{token}').status_code == 400
+    with app.app_context():
+        assert User.query.filter_by(username='ada').one().is_active
+
+
+def test_reset_password_token_is_hashed_and_single_use(app, client, outbox, make_user):
+    user_id = make_user(email='ada@example.com')
+    client.post('/api/auth/forgot-password', json={'email': 'ada@example.com'})
+    token = token_from(outbox[-1])
+
+    with app.app_context():
+        stored = PasswordReset.query.filter_by(user_id=user_id).one()
+        assert stored.token_hash != token and len(stored.token_hash) == 64
+
+    first = client.post(f'/api/auth/reset-password/{token}', json={'password': 'New@pass123'})
+    second = client.post(f'/api/auth/reset-password/{token}', json={'password': 'New@pass123'})
+
+    assert first.status_code == 200
+    assert second.status_code == 400
+    with app.app_context():
+        assert db.session.get(User, user_id).verify_password('New@pass123')
+
+
+def test_reset_password_rejects_unknown_token(client):
+    response = client.post('/api/auth/reset-password/not-a-token', json={'password': 'New@pass123'})
+
+    assert response.status_code == 400
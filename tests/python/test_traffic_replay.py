@@ -0,0 +1,115 @@
+import json
+
+from app import create_app, db, audit_log
+from app.traffic_capture import Sanitizer
+from conftest import make_test_config, PASSWORD
+from traffic_replay import Materializer, Replayer, load_records, replay_app, seed_users, summarize
+
+
+def capture_app(tmp_path):
+    return create_app(make_test_config(
+        TRAFFIC_CAPTURE_ENABLED=True, TRAFFIC_CAPTURE_PATH=str(tmp_path / 'traffic' / 'capture.ndjson')
+    ))
+
+
+def close(app):
+    app.extensions['traffic_capture'].stop()
+    audit_log.flush()
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def replay(tmp_path, records):
+    app = replay_app(f"sqlite:///{tmp_path / 'replay.db'}", PASSWORD_HASH_METHOD='pbkdf2:sha256:1000',
+                     LOGIN_GUARD_STORAGE_URI='memory://', REVOCATION_REFRESH_INTERVAL=0, AUDIT_ASYNC=False)
+    tokens = seed_users(app, records)
+    results = Replayer(app, tokens, speed=0, workers=1).replay(records)
+    close(app)
+    return tokens, results
+
+
+def capture_traffic(tmp_path):
+    app = capture_app(tmp_path)
+    client = app.test_client(use_cookies=False)
+    with app.app_context():
+        from app.models import Role, User
+        user = User(username='stargazer', email='stargazer@example.com', first_name='Ada',
+                    last_name='Lovelace', is_active=True, email_verified=True,
+                    role_id=Role.query.filter_by(name='User').first().id)
+        user.password = PASSWORD
+        db.session.add(user)
+        db.session.commit()
+
+    client.post('/api/auth/login', json={'email': 'stargazer@example.com', 'password': 'Wrong@123456'})
+    token = client.post('/api/auth/login', json={
+        'email': 'stargazer@example.com', 'password': PASSWORD
+    }).get_json()['token']
+    client.get('/api/auth/profile', headers={'Authorization': f'Bearer {token}'})
+    client.post('/api/auth/register', json={
+        'username': 'newcomer', 'email': 'newcomer@example.com', 'password': PASSWORD,
+        'first_name': 'Nova', 'last_name': 'Star', 'phone_number': '07700900123'
+    })
+    close(app)
+    return tmp_path / 'traffic'
+
+
+def test_capture_writes_sanitized_request_shapes(tmp_path):
+    directory = capture_traffic(tmp_path)
+    text = (directory / 'capture.ndjson').read_text()
+    assert 'stargazer' not in text and 'newcomer' not in text and PASSWORD not in text
+
+    records = [json.loads(line) for line in text.splitlines()]
+    assert [r['endpoint'] for r in records] == ['auth.login', 'auth.login', 'auth.profile', 'auth.register']
+    failed, login, profile, register = records
+    assert failed['body']['password'] == '<password>' and failed['status'] == 401
+    assert login['body']['email'].startswith('<email:')
+    # The same person has the same pseudonym in request bodies and as the caller
+    assert profile['user'] == login['body']['email'] and profile['auth'] == 'bearer'
+    assert profile['role'] == 'User' and profile['duration_ms'] > 0
+    assert register['body']['first_name'] == '<str:4>'
+    # Digit strings and numbers are personal data too
+    assert '07700900123' not in text and register['body']['phone_number'] == '<str:11>'
+
+
+def test_sanitizer_keeps_only_enumerations_ids_and_page_sizes():
+    sanitizer = Sanitizer('key')
+
+    assert sanitizer.mapping([('limit', '50'), ('user_id', '7'), ('format', 'csv'), ('q', '0770')]) == {
+        'limit': '50', 'user_id': '7', 'format': 'csv', 'q': '<str:4>'
+    }
+    assert sanitizer.value(None, {'age': 42, 'height': 1.8, 'opt_in': True, 'bio': None}) == {
+        'age': '<num:2>', 'height': '<num:2>', 'opt_in': '<bool>', 'bio': None
+    }
+    assert Materializer().value(['<num:2>', '<bool>'], {'status': 200}) == [11, False]
+
+
+def test_replay_reproduces_the_captured_mix(tmp_path):
+    records = load_records([str(capture_traffic(tmp_path))])
+
+    tokens, results = replay(tmp_path, records)
+
+    assert len(tokens) == 1  # the login user; the registration creates its own
+    assert [(r.endpoint, r.status) for r in results] == [
+        ('auth.login', 401), ('auth.login', 200), ('auth.profile', 200), ('auth.register', 201)
+    ]
+    stats = summarize(results)
+    assert stats['POST auth.login'].count == 2
+    assert all(s.status_mismatches == 0 for s in stats.values())
+
+
+def test_replay_does_not_shed_failures_spread_over_many_clients(tmp_path):
+    # 25 failed logins from 25 addresses: nothing for the login guard to shed
+    app = capture_app(tmp_path)
+    client = app.test_client(use_cookies=False)
+    for n in range(25):
+        client.post('/api/auth/login', json={'email': f'guest{n}@example.com', 'password': 'Wrong@123456'},
+                    environ_base={'REMOTE_ADDR': f'203.0.113.{n}'})
+    close(app)
+    records = load_records([str(tmp_path / 'traffic')])
+    assert [r['status'] for r in records] == [401] * 25
+
+    # Replayed, they all come from one address
+    _, results = replay(tmp_path, records)
+
+    assert [r.status for r in results] == [401] * 25
@@ -0,0 +1,84 @@
+import sqlalchemy as sa
+from flask_migrate import upgrade
+
+from app import create_app, db
+from app.auth.queries import prefix_upper_bound, user_mention_query, user_search_query
+from conftest import make_test_config
+
+
+def make_users(make_user, *usernames):
+    return {name: make_user(username=name, email=f'{name.lower()}@example.com') for name in usernames}
+
+
+def test_mention_search_matches_username_prefix_and_pages(client, make_user, login):
+    ids = make_users(make_user, 'Astra', 'astro_bob', 'asteria', 'Nova', 'as%wild')
+    login(ids['Nova'])
+
+    page = client.get('/api/auth/users/search?q=AST&limit=2').get_json()
+    assert [u['username'] for u in page['users']] == ['asteria', 'Astra']
+    assert 'email' not in page['users'][0]
+    rest = client.get(f"/api/auth/users/search?q=ast&limit=2&cursor={page['next_cursor']}").get_json()
+    assert [u['username'] for u in rest['users']] == ['astro_bob']
+    assert rest['next_cursor'] is None
+
+    # The query is a key range, so LIKE wildcards match only themselves
+    wild = client.get('/api/auth/users/search?q=as%25').get_json()
+    assert [u['username'] for u in wild['users']] == ['as%wild']
+
+
+def test_mention_search_skips_inactive_users(client, make_user, login):
+    ids = make_users(make_user, 'vega', 'vela')
+    make_user(username='venus', is_active=False)
+    login(ids['vega'])
+    assert [u['username'] for u in client.get('/api/auth/users/search?q=ve').get_json()['users']] == ['vega', 'vela']
+
+    login(make_user('Admin'))
+    found = client.get('/api/auth/users/search?q=ve').get_json()['users']
+    assert [(u['username'], u['is_active']) for u in found] == [('vega', True), ('vela', True), ('venus', False)]
+
+
+def test_prefix_upper_bound_never_ends_in_a_surrogate(client, make_user, login):
+    assert prefix_upper_bound('ab') == 'ac'
+    assert prefix_upper_bound('a\ud7ff') == 'a\ue000'
+    assert prefix_upper_bound('a\U0010ffff') == 'b'
+    assert prefix_upper_bound('\U0010ffff') is None
+    # The bound reaches the database encoded as UTF-8
+    prefix_upper_bound('\ud7ff').encode('utf-8')
+
+    login(make_user())
+    response = client.get('/api/auth/users/search?q=%ED%9F%BF')  # U+D7FF
+    assert response.status_code == 200 and response.get_json()['users'] == []
+
+
+def test_email_search_is_limited_to_user_admins(client, make_user, login):
+    login(make_user())
+    assert client.get('/api/auth/users/search?q=user&field=email').status_code == 403
+    assert client.get('/api/auth/users/search?q=').status_code == 400
+    assert client.get('/api/auth/users/search?q=a&cursor=!!').status_code == 400
+
+    login(make_user('Moderator', email='mod@example.com'))
+    found = client.get('/api/auth/users/search?q=MOD@&field=email').get_json()['users']
+    assert [u['email'] for u in found] == ['mod@example.com']
+    assert found[0]['role'] == 'Moderator'
+
+
+def test_repeated_lookups_are_served_from_cache(client, make_user, login):
+    ids = make_users(make_user, 'vega', 'vela')
+    login(ids['vega'])
+    first = client.get('/api/auth/users/search?q=ve').get_json()
+
+    make_user(username='venus')
+    # Within USER_SEARCH_CACHE_TTL the cached page is returned unchanged
+    assert client.get('/api/auth/users/search?q=ve').get_json() == first
+
+
+def test_search_query_is_answered_from_the_search_index(tmp_path):
+    app = create_app(make_test_config(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'search.db'}"))
+    with app.app_context():
+        upgrade()
+        query = user_search_query(user_mention_query(), 'username', 'ast', ('astra', 1)).limit(11)
+        sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(str(row) for row in db.session.execute(sa.text(f'EXPLAIN QUERY PLAN {sql}')))
+        db.engine.dispose()
+    assert 'ix_users_username_search' in plan
+    assert 'TEMP B-TREE' not in plan  # no sort step: rows come out in index order
@@ -0,0 +1,18 @@
+"""Replay captured auth API traffic and compare latencies per endpoint
+
+Reads the NDJSON files written by app.traffic_capture, seeds a fresh
+database with stand-in users for the pseudonymized ones, replays every
+request against create_app() on the captured schedule (or scaled by
+--speed) with asyncio driving a pool of worker threads, and reports
+latency deltas per endpoint against the capture or an earlier replay.
+
+    python -m traffic_replay instance/traffic --speed 2 --save build-a.json
+    python -m traffic_replay instance/traffic --speed 2 --baseline build-a.json
+"""
+from .replay import Materializer, Replayer, ReplayResult, load_records, replay_app, seed_users
+from .report import EndpointStats, compare, format_report, load_report, save_report, summarize
+
+__all__ = [
+    'Materializer', 'Replayer', 'ReplayResult', 'load_records', 'replay_app', 'seed_users',
+    'EndpointStats', 'compare', 'format_report', 'load_report', 'save_report', 'summarize',
+]
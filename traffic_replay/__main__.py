@@ -0,0 +1,53 @@
+import argparse
+import logging
+import os
+
+from .replay import Replayer, load_records, replay_app, seed_users
+from .report import format_report, load_report, save_report, summarize
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CAPTURE = os.path.join(ROOT, 'instance', 'traffic')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m traffic_replay',
+        description='Replay captured auth API traffic against create_app() and report latency deltas'
+    )
+    parser.add_argument('captures', nargs='*', default=[DEFAULT_CAPTURE],
+                        help='capture files or directories written by TRAFFIC_CAPTURE_ENABLED')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='time scale: 2 replays twice as fast, 0 as fast as possible')
+    parser.add_argument('--workers', type=int, default=32, help='concurrent in-flight requests')
+    parser.add_argument('--endpoint', action='append', dest='endpoints',
+                        help='only replay this endpoint (repeatable), e.g. auth.login')
+    parser.add_argument('--limit', type=int, help='replay only the first N requests')
+    parser.add_argument('--database-uri', help='database to replay into (default: a scratch SQLite file)')
+    parser.add_argument('--keep-rate-limits', action='store_true', help='leave Flask-Limiter and the login guard enabled')
+    parser.add_argument('--save', help='write per-endpoint results as JSON (a baseline for another build)')
+    parser.add_argument('--baseline', help='compare with a saved replay instead of the capture')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    records = load_records(args.captures, endpoints=args.endpoints)
+    if args.limit:
+        records = records[:args.limit]
+    if not records:
+        parser.error('no captured requests found')
+    span = records[-1]['ts'] - records[0]['ts']
+    print(f"Replaying {len(records)} requests captured over {span:.1f}s at speed {args.speed:g}")
+
+    app = replay_app(args.database_uri, keep_rate_limits=args.keep_rate_limits)
+    tokens = seed_users(app, records)
+    results = Replayer(app, tokens, speed=args.speed, workers=args.workers).replay(records)
+
+    stats = summarize(results)
+    baseline = load_report(args.baseline) if args.baseline else None
+    print(format_report(stats, baseline))
+    if args.save:
+        save_report(stats, args.save)
+        print(f"\nWrote {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,264 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import asyncio
+import glob
+import json
+import logging
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER = re.compile(r'^<(password|secret|email|username|str|num|bool):?([0-9a-f]*)>$')
+RULE_ARGUMENT = re.compile(r'<(?:[^<>:]+:)?([^<>]+)>')
+# Meets the default password policy; requests that failed in the capture get
+# a password the policy (and every account) rejects
+REPLAY_PASSWORD = 'Replay@Passw0rd'
+REJECTED_PASSWORD = 'x'
+# Endpoints whose body email refers to an account that must already exist
+ACCOUNT_LOOKUP_ENDPOINTS = ('auth.login', 'auth.forgot_password')
+
+ReplayResult = namedtuple('ReplayResult', [
+    'endpoint', 'method', 'captured_ms', 'replay_ms', 'captured_status', 'status', 'lag_ms'
+])
+
+
+def capture_files(path):
+    """Capture files under path, oldest first (capture.ndjson.N ... capture.ndjson)"""
+    if not os.path.isdir(path):
+        return [path]
+
+    def age(name):
+        suffix = name.rsplit('.ndjson', 1)[-1].lstrip('.')
+        return int(suffix) if suffix.isdigit() else 0
+
+    files = glob.glob(os.path.join(path, '*.ndjson')) + glob.glob(os.path.join(path, '*.ndjson.*'))
+    return sorted(files, key=age, reverse=True)
+
+
+def load_records(paths, endpoints=None):
+    """Captured requests from files or capture directories, ordered by start time"""
+    records = []
+    skipped = 0
+    for path in paths:
+        for name in capture_files(path):
+            with open(name, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    if endpoints is None or record['endpoint'] in endpoints:
+                        records.append(record)
+    if skipped:
+        logger.warning(f"Skipped {skipped} unreadable capture lines")
+    records.sort(key=lambda r: r['ts'])
+    return records
+
+
+def placeholder_digest(value, kind='email'):
+    match = PLACEHOLDER.match(value) if isinstance(value, str) else None
+    return match.group(2) if match and match.group(1) == kind else None
+
+
+class Materializer:
+    """Turn a captured record's placeholders back into concrete values
+
+    The same pseudonym always maps to the same synthetic email/username, so
+    a user's login, profile reads and logout still belong together.
+    """
+
+    @staticmethod
+    def email(digest):
+        return f'{digest}@replay.example.com'
+
+    @staticmethod
+    def username(digest):
+        return f'u{digest}'
+
+    def value(self, value, record):
+        if isinstance(value, dict):
+            return {k: self.value(v, record) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.value(v, record) for v in value]
+        match = PLACEHOLDER.match(value) if isinstance(value, str) else None
+        if match is None:
+            return value
+        kind, arg = match.groups()
+        if kind == 'password':
+            return REPLAY_PASSWORD if record['status'] < 400 else REJECTED_PASSWORD
+        if kind == 'email':
+            return self.email(arg)
+        if kind == 'username':
+            return self.username(arg)
+        if kind == 'num':
+            return int('1' * int(arg or 1))
+        if kind == 'bool':
+            return False
+        return ('s' if kind == 'secret' else 'x') * int(arg or 1)
+
+    def request(self, record):
+        """(method, path, query, kwargs for the test client) for a record"""
+        args = self.value(record['args'], record)
+        path = RULE_ARGUMENT.sub(lambda m: str(args.get(m.group(1), '')), record['rule'])
+        kwargs = {}
+        if record['body'] is not None:
+            kwargs['json'] = self.value(record['body'], record)
+        elif record['body_bytes']:
+            kwargs['data'] = b'\0' * record['body_bytes']
+            kwargs['content_type'] = record['content_type']
+        return record['method'], path, self.value(record['query'], record), kwargs
+
+
+def account_roles(records):
+    """Email digest -> role name for every account the replay needs up front
+
+    Accounts registered during the capture are left out; the replayed
+    registration creates them.
+    """
+    registered = {placeholder_digest((r['body'] or {}).get('email'))
+                  for r in records if r['endpoint'] == 'auth.register' and isinstance(r['body'], dict)}
+    accounts = {}
+    for record in records:
+        if record['user']:
+            digest = placeholder_digest(record['user'])
+            if accounts.get(digest) is None:
+                accounts[digest] = record['role']
+        elif record['endpoint'] in ACCOUNT_LOOKUP_ENDPOINTS and isinstance(record['body'], dict):
+            accounts.setdefault(placeholder_digest(record['body'].get('email')), None)
+    accounts.pop(None, None)
+    for digest in registered:
+        accounts.pop(digest, None)
+    return accounts
+
+
+def seed_users(app, records):
+    """Create the captured accounts with REPLAY_PASSWORD; return digest -> bearer token"""
+    from werkzeug.security import generate_password_hash
+    from app import db
+    from app.models import Role, User, UserSession
+
+    accounts = account_roles(records)
+    tokens = {}
+    with app.app_context():
+        roles = {role.name: role.id for role in Role.query.all()}
+        default_role = next(role.id for role in Role.query.filter_by(default=True))
+        password_hash = generate_password_hash(
+            REPLAY_PASSWORD, method=app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        )
+        for digest, role in accounts.items():
+            user = User(
+                username=Materializer.username(digest), email=Materializer.email(digest),
+                first_name='Replay', last_name='User', password_hash=password_hash,
+                role_id=roles.get(role, default_role), is_active=True, email_verified=True
+            )
+            db.session.add(user)
+            db.session.flush()
+            tokens[digest] = secrets.token_hex(32)
+            db.session.add(UserSession(
+                user_id=user.id, session_token=tokens[digest],
+                expires_at=datetime.utcnow() + timedelta(days=1)
+            ))
+        db.session.commit()
+    logger.info(f"Seeded {len(tokens)} replay accounts")
+    return tokens
+
+
+def replay_app(database_uri=None, keep_rate_limits=False, **config):
+    """create_app() on a scratch database, with side effects switched off"""
+    from app import create_app
+
+    scratch = tempfile.mkdtemp(prefix='traffic-replay-')
+    overrides = {
+        'SECRET_KEY': os.getenv('SECRET_KEY') or secrets.token_hex(32),
+        'SQLALCHEMY_DATABASE_URI': database_uri or f"sqlite:///{os.path.join(scratch, 'replay.db')}",
+        'EMAIL_TRANSPORT': 'memory',
+        'TRAFFIC_CAPTURE_ENABLED': False,
+        'AVATAR_STORAGE_URI': 'file://' + os.path.join(scratch, 'avatars'),
+        'SQLALCHEMY_ECHO': False,
+        'QUERY_BUDGET_RAISE': False,
+    }
+    if not keep_rate_limits:
+        # Every replayed user arrives from one address, so per-IP counters
+        # would shed traffic the capture never saw shed
+        overrides['RATELIMIT_ENABLED'] = False
+        overrides['LOGIN_GUARD_ENABLED'] = False
+    overrides.update(config)
+    return create_app(overrides)
+
+
+class Replayer:
+    """Send captured requests to an app on their original schedule
+
+    An asyncio loop sleeps until each request's (scaled) offset from the
+    first one and hands it to a worker thread, so slow responses never
+    delay later arrivals, just as with real clients. speed=2 replays twice
+    as fast; speed=0 sends everything as fast as the workers allow. On a
+    schedule, lag_ms records how late each request left, which shows when
+    the replayer itself could not keep up.
+    """
+
+    def __init__(self, app, tokens=None, speed=1.0, workers=32):
+        self.app = app
+        self.tokens = dict(tokens or {})
+        self.speed = speed
+        self.workers = workers
+        self.materializer = Materializer()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            # No cookie jar: workers are shared by all users, who authenticate by token
+            client = self._local.client = self.app.test_client(use_cookies=False)
+        return client
+
+    def send(self, record, scheduled):
+        lag_ms = max(time.perf_counter() - scheduled, 0) * 1000 if scheduled is not None else 0.0
+        method, path, query, kwargs = self.materializer.request(record)
+        digest = placeholder_digest(record['user']) if record['user'] else None
+        headers = {}
+        if digest in self.tokens:
+            headers['Authorization'] = f'Bearer {self.tokens[digest]}'
+
+        started = time.perf_counter()
+        response = self._client().open(path, method=method, query_string=query, headers=headers, **kwargs)
+        body = response.get_data()
+        replay_ms = (time.perf_counter() - started) * 1000
+
+        if record['endpoint'] == 'auth.login' and response.status_code == 200:
+            # Later requests by this user carry the token of their latest login
+            login_digest = placeholder_digest((record['body'] or {}).get('email'))
+            with self._lock:
+                self.tokens[login_digest] = json.loads(body)['token']
+        response.close()
+        return ReplayResult(record['endpoint'], method, record['duration_ms'], replay_ms,
+                            record['status'], response.status_code, lag_ms)
+
+    async def run(self, records):
+        if not records:
+            return []
+        loop = asyncio.get_running_loop()
+        origin = records[0]['ts']
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='replay') as executor:
+            pending = []
+            for record in records:
+                scheduled = None
+                if self.speed:
+                    scheduled = start + (record['ts'] - origin) / self.speed
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                pending.append(loop.run_in_executor(executor, self.send, record, scheduled))
+            return await asyncio.gather(*pending)
+
+    def replay(self, records):
+        return asyncio.run(self.run(records))
@@ -0,0 +1,81 @@
+from collections import namedtuple
+import json
+import math
+
+EndpointStats = namedtuple('EndpointStats', [
+    'endpoint', 'count', 'captured_p50', 'captured_p95', 'replay_p50', 'replay_p95',
+    'status_mismatches', 'max_lag_ms'
+])
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(results):
+    """Per-endpoint latency percentiles for the capture and the replay"""
+    by_endpoint = {}
+    for result in results:
+        by_endpoint.setdefault(f'{result.method} {result.endpoint}', []).append(result)
+    stats = {}
+    for endpoint, rows in sorted(by_endpoint.items()):
+        captured = [r.captured_ms for r in rows]
+        replayed = [r.replay_ms for r in rows]
+        stats[endpoint] = EndpointStats(
+            endpoint, len(rows),
+            percentile(captured, 50), percentile(captured, 95),
+            percentile(replayed, 50), percentile(replayed, 95),
+            sum(r.status // 100 != r.captured_status // 100 for r in rows),
+            max(r.lag_ms for r in rows)
+        )
+    return stats
+
+
+def compare(stats, baseline=None):
+    """(endpoint, reference p50, p95, replay p50, p95) rows
+
+    The reference is the capture itself, or a saved earlier replay (another
+    build) when baseline is given; endpoints missing from it are skipped.
+    """
+    rows = []
+    for endpoint, s in stats.items():
+        if baseline is None:
+            rows.append((s, s.captured_p50, s.captured_p95))
+        elif endpoint in baseline:
+            rows.append((s, baseline[endpoint].replay_p50, baseline[endpoint].replay_p95))
+    return rows
+
+
+def _delta(new, old):
+    change = f'{(new - old) / old:+.0%}' if old else 'n/a'
+    return f'{new - old:+9.1f} {change:>6}'
+
+
+def format_report(stats, baseline=None):
+    reference = 'baseline' if baseline is not None else 'captured'
+    lines = [
+        f"{'endpoint':<36} {'n':>6} {reference + ' p50':>13} {'replay p50':>10} {'delta p50 ms':>16} "
+        f"{reference + ' p95':>13} {'replay p95':>10} {'delta p95 ms':>16} {'status!=':>8}"
+    ]
+    for s, ref_p50, ref_p95 in compare(stats, baseline):
+        lines.append(
+            f"{s.endpoint:<36} {s.count:>6} {ref_p50:>13.1f} {s.replay_p50:>10.1f} {_delta(s.replay_p50, ref_p50):>16} "
+            f"{ref_p95:>13.1f} {s.replay_p95:>10.1f} {_delta(s.replay_p95, ref_p95):>16} {s.status_mismatches:>8}"
+        )
+    lag = max((s.max_lag_ms for s in stats.values()), default=0)
+    if lag > 50:
+        lines.append(f"\nReplay fell up to {lag:.0f} ms behind schedule; raise --workers or lower --speed")
+    return '\n'.join(lines)
+
+
+def save_report(stats, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({endpoint: s._asdict() for endpoint, s in stats.items()}, f, indent=2)
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as f:
+        return {endpoint: EndpointStats(**row) for endpoint, row in json.load(f).items()}